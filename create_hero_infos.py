@@ -1,30 +1,58 @@
+import argparse
 import sqlite3
 import re
+import sys
 
+import hero_skills
+from export_log import IncrementalExport, heroes_with_skill_names, read_log
+from fehdb.skill_db import get_skill_db, iter_rows
+from hero_skills import load_hero_skill_map
+
+HERO_ARRAY = "const heroInfos"
+
+
+def create_hero_info_js_variable(hero_db_path, skill_db_path, out=None):
+    """英雄情報のJS変数定義を out（省略時は標準出力）に書き出す"""
+    out = out or sys.stdout
+    for chunk in iter_hero_info_js(hero_db_path, skill_db_path):
+        out.write(chunk)
+    return None
+
+
+def iter_hero_info_js(hero_db_path, skill_db_path):
+    """英雄情報のJS変数定義を、英雄1件ずつの文字列片として順に返す"""
+    return iter_hero_array_js(iter_hero_entries(hero_db_path, skill_db_path))
+
+
+def iter_hero_array_js(entries):
+    """(配列の宣言, 英雄ID, 行) をID順に並べたものから、JS変数定義の文字列片を返す"""
+    yield f"{HERO_ARRAY} = [\n"
+    separator = ""
+    for _, _, line in entries:
+        yield separator + line
+        separator = ",\n"
+    yield "\n];\n"
 
-def create_hero_info_js_variable(hero_db_path, skill_db_path):
-    # --- 1. スキルデータの辞書化 ---
-    skill_map = {}
-    try:
-        conn_skill = sqlite3.connect(skill_db_path)
-        cursor_skill = conn_skill.cursor()
-        # typeカラム: 武器, 補助, 奥義, A, B, C, X, 響心 など
-        cursor_skill.execute("SELECT name, id, type FROM skills")
-        for row in cursor_skill.fetchall():
-            name, skill_id, skill_type = row
-            skill_map[name] = {
-                'id': skill_id,
-                'type': skill_type
-            }
-        conn_skill.close()
-    except sqlite3.Error as e:
-        return f"Error reading skill database: {e}"
 
-    # --- 2. ヒーローデータの処理 ---
-    conn_hero = sqlite3.connect(hero_db_path)
+def iter_hero_entries(hero_db_path, skill_db_path, hero_ids=None):
+    """英雄ごとの (配列の宣言, 英雄ID, 行) をID順に返す
+
+    hero_ids 指定時はその英雄だけを返す（DBにないIDは返さない）。
+    """
+    # --- 1. 英雄ごとのスキル（hero_skills が最新ならそれを、古ければ heroes.skills を読む） ---
+    # 出力するだけなので読み取り専用で開く（hero_skills の再構築は hero_skills.py rebuild で行う）
+    conn_hero = sqlite3.connect(f"file:{hero_db_path}?mode=ro", uri=True)
     conn_hero.row_factory = sqlite3.Row
     cursor_hero = conn_hero.cursor()
 
+    # typeカラム: 武器, 補助, 奥義, A, B, C, X, 響心 など
+    try:
+        hero_skill_map = load_hero_skill_map(conn_hero, get_skill_db(skill_db_path))
+    except sqlite3.Error as e:
+        conn_hero.close()
+        print(f"Error reading skill database: {e}", file=sys.stderr)
+        return
+
     # Enum定義
     def get_move_type(jp_move):
         mapping = {
@@ -70,37 +98,26 @@ def create_hero_info_js_variable(hero_db_path, skill_db_path):
         # 3. 剣・槍・斧・杖: 色情報を削除
         return raw.replace('赤', '').replace('青', '').replace('緑', '').replace('無', '')
 
-    def parse_skill_string(skill_str):
-        if not skill_str: return []
-        parts = [p for p in skill_str.split('|') if p]
-        names = [p.split(':')[0] for p in parts]
-        return names
-
-    def classify_skills(skill_names):
+    def classify_skills(skills):
         classified = {
             'weapon': [], 'assist': [], 'special': [],
             'a': [], 'b': [], 'c': [], 'x': []
         }
-        for name in skill_names:
-            if name in skill_map:
-                s_data = skill_map[name]
-                s_id = s_data['id']
-                s_type = s_data['type']
-
-                if s_type == '武器':
-                    classified['weapon'].append(s_id)
-                elif s_type == 'サポート':
-                    classified['assist'].append(s_id)
-                elif s_type == '奥義':
-                    classified['special'].append(s_id)
-                elif s_type == 'パッシブA':
-                    classified['a'].append(s_id)
-                elif s_type == 'パッシブB':
-                    classified['b'].append(s_id)
-                elif s_type == 'パッシブC':
-                    classified['c'].append(s_id)
-                elif s_type in ['X', '響心']:
-                    classified['x'].append(s_id)
+        for s_id, s_type in skills:
+            if s_type == '武器':
+                classified['weapon'].append(s_id)
+            elif s_type == 'サポート':
+                classified['assist'].append(s_id)
+            elif s_type == '奥義':
+                classified['special'].append(s_id)
+            elif s_type == 'パッシブA':
+                classified['a'].append(s_id)
+            elif s_type == 'パッシブB':
+                classified['b'].append(s_id)
+            elif s_type == 'パッシブC':
+                classified['c'].append(s_id)
+            elif s_type in ['X', '響心']:
+                classified['x'].append(s_id)
         return classified
 
     def get_equipped_id(id_list):
@@ -110,95 +127,139 @@ def create_hero_info_js_variable(hero_db_path, skill_db_path):
         if not arr: return "[]"
         return "[" + ", ".join(map(str, arr)) + ",]"
 
-    # --- メイン処理 ---
-    output_lines = []
+    def format_hero_line(row, skills):
+        name = row['name']
+        internal_id = row['id']
+        thumb = row['thumb']
+        move_type = get_move_type(row['move_type'])
+
+        raw_weapon = row['weapon_type']
+        w_type_str = clean_weapon_type(raw_weapon)
+
+        is_melee = any(mw in raw_weapon for mw in ['剣', '槍', '斧', '竜', '獣'])
+        range_val = 1 if is_melee else 2
+
+        # Lv 40 (または基準値)
+        hp, atk, spd, df, res = (
+            row['hp_5'] or 40,
+            row['atk_5'] or 35,
+            row['spd_5'] or 35,
+            row['def_5'] or 35,
+            row['res_5'] or 35
+        )
 
+        # Lv 1
+        hp1, atk1, spd1, df1, res1 = (
+            row['hp_5_lv1'] or 15,
+            row['atk_5_lv1'] or 10,
+            row['spd_5_lv1'] or 10,
+            row['def_5_lv1'] or 10,
+            row['res_5_lv1'] or 10
+        )
+
+        s_dict = classify_skills(skills)
+
+        w_id = get_equipped_id(s_dict['weapon'])
+        a_id = get_equipped_id(s_dict['assist'])
+        sp_id = get_equipped_id(s_dict['special'])
+        pa_id = get_equipped_id(s_dict['a'])
+        pb_id = get_equipped_id(s_dict['b'])
+        pc_id = get_equipped_id(s_dict['c'])
+        px_id = get_equipped_id(s_dict['x'])
+
+        season = get_season(row['special_type'])
+        blessing = get_blessing_type(row['special_type'])
+        bst = get_bst(row['special_type'], default=0)
+
+        epithet = row['epithet'] if row['epithet'] else ""
+        p_names = row['pure_name'].strip('|').split('|') if row['pure_name'] else []
+        p_names_str = "[" + ", ".join([f"'{n}'" for n in p_names if n]) + ",]"
+
+        origin = row['origin'] if row['origin'] else ""
+        how_to_get = row['how_to_get'] if row['how_to_get'] else "恒常"
+        release_date = row['release_date']
+        is_resplendent = 'true' if row['resplendent'] else 'false'
+
+        special_type = row['special_type'].strip() if row['special_type'] else ""
+
+        # インデント(スペース2つ)をつけて可読性を向上
+        return (f"  new HeroInfo('{name}', '{thumb}', {move_type}, '{w_type_str}', {range_val}, "
+                f"{hp}, {atk}, {spd}, {df}, {res}, "
+                f"{hp1}, {atk1}, {spd1}, {df1}, {res1}, "
+                f"'0/0', '0/0', '0/0', '0/0', '0/0', "
+                f"{w_id}, {a_id}, {sp_id}, {pa_id}, {pb_id}, {pc_id}, {px_id}, "
+                f"{season}, {blessing}, '{epithet}', {p_names_str}, "
+                f"{bst}, {format_array(s_dict['weapon'])}, {format_array(s_dict['assist'])}, "
+                f"{internal_id}, {is_resplendent}, '{origin}', '{how_to_get}', '{release_date}', "
+                f"{format_array(s_dict['special'])}, {format_array(s_dict['a'])}, "
+                f"{format_array(s_dict['b'])}, {format_array(s_dict['c'])}, {format_array(s_dict['x'])}, "
+                f"'{special_type}'"
+                f")")
+
+    # --- メイン処理 ---
     try:
-        cursor_hero.execute("SELECT * FROM heroes")
-        heroes = cursor_hero.fetchall()
-
-        for row in heroes:
-            name = row['name']
-            internal_id = row['id']
-            thumb = row['thumb']
-            move_type = get_move_type(row['move_type'])
-
-            raw_weapon = row['weapon_type']
-            w_type_str = clean_weapon_type(raw_weapon)
-
-            is_melee = any(mw in raw_weapon for mw in ['剣', '槍', '斧', '竜', '獣'])
-            range_val = 1 if is_melee else 2
-
-            # Lv 40 (または基準値)
-            hp, atk, spd, df, res = (
-                row['hp_5'] or 40,
-                row['atk_5'] or 35,
-                row['spd_5'] or 35,
-                row['def_5'] or 35,
-                row['res_5'] or 35
-            )
-
-            # Lv 1
-            hp1, atk1, spd1, df1, res1 = (
-                row['hp_5_lv1'] or 15,
-                row['atk_5_lv1'] or 10,
-                row['spd_5_lv1'] or 10,
-                row['def_5_lv1'] or 10,
-                row['res_5_lv1'] or 10
-            )
-
-            skill_names = parse_skill_string(row['skills'])
-            s_dict = classify_skills(skill_names)
-
-            w_id = get_equipped_id(s_dict['weapon'])
-            a_id = get_equipped_id(s_dict['assist'])
-            sp_id = get_equipped_id(s_dict['special'])
-            pa_id = get_equipped_id(s_dict['a'])
-            pb_id = get_equipped_id(s_dict['b'])
-            pc_id = get_equipped_id(s_dict['c'])
-            px_id = get_equipped_id(s_dict['x'])
-
-            season = get_season(row['special_type'])
-            blessing = get_blessing_type(row['special_type'])
-            bst = get_bst(row['special_type'], default=0)
-
-            epithet = row['epithet'] if row['epithet'] else ""
-            p_names = row['pure_name'].strip('|').split('|') if row['pure_name'] else []
-            p_names_str = "[" + ", ".join([f"'{n}'" for n in p_names if n]) + ",]"
-
-            origin = row['origin'] if row['origin'] else ""
-            how_to_get = row['how_to_get'] if row['how_to_get'] else "恒常"
-            release_date = row['release_date']
-            is_resplendent = 'true' if row['resplendent'] else 'false'
-
-            special_type = row['special_type'].strip() if row['special_type'] else ""
-
-            # インデント(スペース2つ)をつけて可読性を向上
-            line = (f"  new HeroInfo('{name}', '{thumb}', {move_type}, '{w_type_str}', {range_val}, "
-                    f"{hp}, {atk}, {spd}, {df}, {res}, "
-                    f"{hp1}, {atk1}, {spd1}, {df1}, {res1}, "
-                    f"'0/0', '0/0', '0/0', '0/0', '0/0', "
-                    f"{w_id}, {a_id}, {sp_id}, {pa_id}, {pb_id}, {pc_id}, {px_id}, "
-                    f"{season}, {blessing}, '{epithet}', {p_names_str}, "
-                    f"{bst}, {format_array(s_dict['weapon'])}, {format_array(s_dict['assist'])}, "
-                    f"{internal_id}, {is_resplendent}, '{origin}', '{how_to_get}', '{release_date}', "
-                    f"{format_array(s_dict['special'])}, {format_array(s_dict['a'])}, "
-                    f"{format_array(s_dict['b'])}, {format_array(s_dict['c'])}, {format_array(s_dict['x'])}, "
-                    f"'{special_type}'"
-                    f")")
-            output_lines.append(line)
+        if hero_ids is None:
+            cursor_hero.execute("SELECT * FROM heroes")
+        else:
+            ids = list(hero_ids)
+            placeholders = ", ".join("?" * len(ids))
+            cursor_hero.execute(f"SELECT * FROM heroes WHERE id IN ({placeholders})", ids)
+
+        for row in iter_rows(cursor_hero):
+            yield HERO_ARRAY, row['id'], format_hero_line(row, hero_skill_map.get(row['id'], []))
 
     except sqlite3.Error as e:
         print(f"Database error: {e}")
     finally:
         conn_hero.close()
 
-    # JS変数定義として出力
-    print("const heroInfos = [")
-    print(",\n".join(output_lines))
-    print("];")
-    return None
+
+def export_incremental(hero_db_path, skill_db_path, out_path):
+    """前回の out_path の出力から、export_log に記録された変更のある英雄だけ整形し直す
+
+    英雄の行は所持スキルのID/タイプにも依存するため、スキルDBの export_log に
+    記録されたスキル名を所持する英雄も整形し直す。
+    """
+    export = IncrementalExport(out_path, [HERO_ARRAY], [__file__, hero_skills.__file__])
+    conn_hero = sqlite3.connect(f"file:{hero_db_path}?mode=ro", uri=True)
+    conn_skill = sqlite3.connect(f"file:{skill_db_path}?mode=ro", uri=True)
+    try:
+        hero_anchor, hero_changes = read_log(conn_hero, export.anchor("heroes"))
+        skill_anchor, skill_changes = read_log(conn_skill, export.anchor("skills"))
+        hero_ids = None
+        if hero_changes is not None and skill_changes is not None and export.previous is not None:
+            hero_ids = {row_id for row_id, _ in hero_changes}
+            hero_ids |= heroes_with_skill_names(conn_hero, {name for _, name in skill_changes if name})
+    finally:
+        conn_hero.close()
+        conn_skill.close()
+
+    if hero_ids is None:
+        entries = list(iter_hero_entries(hero_db_path, skill_db_path))
+    else:
+        entries = export.merge(hero_ids, iter_hero_entries(hero_db_path, skill_db_path, hero_ids))
+    export.write(iter_hero_array_js(entries), entries, {"heroes": hero_anchor, "skills": skill_anchor})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="feh-heroes.sqlite3 からシミュレーター用の英雄情報JSを生成")
+    parser.add_argument("--hero-db", default="feh-heroes.sqlite3", help="英雄DB（default: feh-heroes.sqlite3）")
+    parser.add_argument("--skill-db", default="feh-skills.sqlite3", help="スキルDB（default: feh-skills.sqlite3）")
+    parser.add_argument("--out", help="出力ファイル（省略時は標準出力）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="前回の --out の出力から、export_log に記録された変更のある英雄だけ整形し直す（--out 必須）")
+    args = parser.parse_args()
+
+    if args.incremental:
+        if not args.out:
+            parser.error("--incremental には --out が必要です")
+        export_incremental(args.hero_db, args.skill_db, args.out)
+    elif args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            create_hero_info_js_variable(args.hero_db, args.skill_db, f)
+    else:
+        create_hero_info_js_variable(args.hero_db, args.skill_db)
 
 
 if __name__ == "__main__":
-    create_hero_info_js_variable('feh-heroes.sqlite3', 'feh-skills.sqlite3')
+    main()
@@ -0,0 +1,269 @@
+"""JSエクスポートの差分更新（create_skill_info.py / create_hero_infos.py の --incremental）
+
+feh-skills.sqlite3 の skills と feh-heroes.sqlite3 の heroes の挿入・更新・削除を
+トリガーで export_log テーブルに記録し、エクスポーターは前回の出力以降に記録された
+行だけを整形し直して、前回の出力ファイルの該当エントリを差し替える。
+整形し直すのは変更のあった行だけで、それ以外は前回の出力の行をそのまま書き出す。
+
+- export_log(seq, row_id, name): 変更された行のIDと名前（更新は変更前・変更後の2行）。
+  英雄の行は所持スキルの名前→ID/タイプに依存するため、スキルの変更はその名前
+  （改名なら新旧両方）を heroes.skills に含む英雄の再整形として扱う
+- トリガーを作成するのは `install` だけで、エクスポーターはログを読むだけ
+  （hero_skills.py と同じく、参照側はDBファイルに書き込まない）
+- 出力ファイルの隣の `<出力ファイル>.export-state.json` に、最後に反映したログの
+  位置（seq と、その行の内容）と配列ごとのエントリIDの並びを保存する
+
+次の場合は差分を使わずに全件を整形し直す。
+- トリガーが未作成、またはトリガーが消えていた間の変更がある（install 時に記録する
+  row_id が NULL のマーカー行で検出）
+- 状態ファイル・出力ファイルがない、出力ファイルが前回の出力から書き換えられている、
+  またはエクスポートスクリプトが変更されている
+- 状態ファイルが指すログの行がない（DBファイルが古いものに置き換えられた等）
+
+使い方:
+    python export_log.py install                                    # 両DBにトリガーを作成
+    python create_skill_info.py --out skill-info.js --incremental
+    python create_hero_infos.py --out hero-info.js --incremental
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from fehdb.skill_db import SKILLS_DB_PATH
+from hero_skills import HEROES_DB_PATH
+
+STATE_SUFFIX = ".export-state.json"
+
+_TRIGGERS = ("export_log_on_insert", "export_log_on_update", "export_log_on_delete")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS export_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_id INTEGER,
+    name TEXT
+);
+CREATE TRIGGER IF NOT EXISTS export_log_on_insert AFTER INSERT ON {table}
+BEGIN
+    INSERT INTO export_log (row_id, name) VALUES (NEW.id, NEW.name);
+END;
+CREATE TRIGGER IF NOT EXISTS export_log_on_update AFTER UPDATE ON {table}
+BEGIN
+    INSERT INTO export_log (row_id, name) VALUES (OLD.id, OLD.name);
+    INSERT INTO export_log (row_id, name) VALUES (NEW.id, NEW.name);
+END;
+CREATE TRIGGER IF NOT EXISTS export_log_on_delete AFTER DELETE ON {table}
+BEGIN
+    INSERT INTO export_log (row_id, name) VALUES (OLD.id, OLD.name);
+END;
+"""
+
+
+def has_triggers(conn: sqlite3.Connection) -> bool:
+    """export_log の記録用トリガーがすべて作成済みならTrue"""
+    placeholders = ", ".join("?" * len(_TRIGGERS))
+    (count,) = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})", _TRIGGERS,
+    ).fetchone()
+    return count == len(_TRIGGERS)
+
+
+def install(conn: sqlite3.Connection, table: str) -> bool:
+    """export_log テーブルと table の変更を記録するトリガーを作成
+
+    トリガーが欠けていた場合は、その間の変更を追えないため全件出力を要求する
+    マーカー行（row_id が NULL）を記録する。
+
+    Returns:
+        トリガーを新たに作成したらTrue
+    """
+    missing = not has_triggers(conn)
+    script = _SCHEMA.format(table=table)
+    if missing:
+        script += "INSERT INTO export_log (row_id, name) VALUES (NULL, NULL);\n"
+    conn.executescript(f"BEGIN;\n{script}COMMIT;\n")
+    return missing
+
+
+def read_log(conn: sqlite3.Connection, anchor: list | None) -> tuple[list | None, list[tuple] | None]:
+    """anchor（前回反映したログの行）より後に記録された変更を読む
+
+    Returns:
+        (新しい anchor, 変更された (row_id, name) のリスト)。トリガー未作成なら anchor は None。
+        変更を追えない場合（前回の anchor なし・ログと不一致・全件出力マーカー）は変更が None
+    """
+    if not has_triggers(conn):
+        return None, None
+    if anchor is None:
+        return _last_entry(conn), None
+    seq, row_id, name = anchor
+    if conn.execute(
+        "SELECT 1 FROM export_log WHERE seq = ? AND row_id IS ? AND name IS ?", (seq, row_id, name),
+    ).fetchone() is None:
+        return _last_entry(conn), None
+    entries = conn.execute("SELECT seq, row_id, name FROM export_log WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+    if not entries:
+        return anchor, []
+    new_anchor = list(entries[-1])
+    if any(row_id is None for _, row_id, _ in entries):
+        return new_anchor, None
+    return new_anchor, [(row_id, name) for _, row_id, name in entries]
+
+
+def _last_entry(conn: sqlite3.Connection) -> list | None:
+    row = conn.execute("SELECT seq, row_id, name FROM export_log ORDER BY seq DESC LIMIT 1").fetchone()
+    return list(row) if row else None
+
+
+def heroes_with_skill_names(conn: sqlite3.Connection, names: set[str]) -> set[int]:
+    """heroes.skills（`|A|B:x|...|`）に指定のスキル名を含む英雄のID"""
+    hero_ids = set()
+    for name in names:
+        hero_ids.update(hero_id for (hero_id,) in conn.execute(
+            "SELECT id FROM heroes WHERE instr('|' || skills || '|', '|' || ? || '|') > 0 "
+            "OR instr('|' || skills || '|', '|' || ? || ':') > 0",
+            (name, name),
+        ))
+    return hero_ids
+
+
+def file_digest(path: str | Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class IncrementalExport:
+    """前回の出力のエントリを再利用しながらJSファイルを書き出す
+
+    エントリは (配列の宣言, 行ID, 行) のタプルで、出力は配列の宣言順・行ID順に並ぶ。
+
+    使い方:
+        export = IncrementalExport(out_path, arrays, [__file__])
+        anchor, changes = read_log(conn, export.anchor("skills"))
+        if changes is None or export.previous is None:
+            entries = list(全件のエントリ)
+        else:
+            entries = export.merge(変更された行ID, 変更された行のエントリ)
+        export.write(出力する文字列片, entries, {"skills": anchor})
+    """
+
+    def __init__(self, out_path: str | Path, arrays: list[str], sources: list[str | Path]):
+        self.out_path = Path(out_path)
+        self.state_path = self.out_path.with_name(self.out_path.name + STATE_SUFFIX)
+        self.arrays = arrays
+        self.exporter_digest = hashlib.sha256(
+            b"".join(Path(source).read_bytes() for source in sources)
+        ).hexdigest()
+        self._logs: dict[str, list] = {}
+        self.previous: list[tuple[str, int, str]] | None = self._load()
+        self.reformatted: int | None = None  # merge() で整形し直した件数（全件出力ならNone）
+
+    def anchor(self, log: str) -> list | None:
+        """前回の出力に反映したログの行（前回の出力を使えなければNone）"""
+        return self._logs.get(log) if self.previous is not None else None
+
+    def merge(self, changed_ids: set[int], entries) -> list[tuple[str, int, str]]:
+        """前回のエントリから changed_ids の行を除き、整形し直したエントリを加える
+
+        changed_ids のうち entries にない行（削除された行）は出力から消える。
+        """
+        merged = [entry for entry in self.previous if entry[1] not in changed_ids]
+        self.reformatted = 0
+        for entry in entries:
+            merged.append(entry)
+            self.reformatted += 1
+        merged.sort(key=lambda entry: (self.arrays.index(entry[0]), entry[1]))
+        return merged
+
+    def write(self, chunks, entries: list[tuple[str, int, str]], logs: dict[str, list | None]) -> None:
+        """出力ファイルと状態ファイルを書き出す（一時ファイル経由で置き換える）"""
+        tmp_path = self.out_path.with_name(self.out_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, self.out_path)
+
+        if any(anchor is None for anchor in logs.values()):
+            # トリガー未作成のDBがあると次回も全件出力になるため、状態は残さない
+            self.state_path.unlink(missing_ok=True)
+            print("差分出力: export_log のトリガーがないため全件出力しました"
+                  "（`python export_log.py install` で作成）", file=sys.stderr)
+            return
+
+        arrays: dict[str, list[int]] = {array: [] for array in self.arrays}
+        for array, row_id, _ in entries:
+            arrays[array].append(row_id)
+        state = {
+            "exporter": self.exporter_digest,
+            "output": file_digest(self.out_path),
+            "logs": logs,
+            "arrays": arrays,
+        }
+        self.state_path.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        if self.reformatted is None:
+            print(f"差分出力: 全件出力 {len(entries)}件", file=sys.stderr)
+        else:
+            print(f"差分出力: 再整形 {self.reformatted}件 / 全{len(entries)}件", file=sys.stderr)
+
+    def _load(self) -> list[tuple[str, int, str]] | None:
+        """前回の状態ファイルと出力ファイルからエントリを復元（使えなければNone）"""
+        if not self.state_path.exists() or not self.out_path.exists():
+            return None
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return None
+        if state.get("exporter") != self.exporter_digest or state.get("output") != file_digest(self.out_path):
+            return None
+
+        lines_by_array = _read_array_lines(self.out_path)
+        entries = []
+        for array in self.arrays:
+            row_ids = state.get("arrays", {}).get(array, [])
+            lines = lines_by_array.get(array, [])
+            if len(lines) != len(row_ids):
+                return None
+            entries.extend((array, row_id, line) for row_id, line in zip(row_ids, lines))
+        self._logs = state.get("logs", {})
+        return entries
+
+
+def _read_array_lines(path: Path) -> dict[str, list[str]]:
+    """`<宣言> = [` 〜 `];` の間のエントリ行（末尾のカンマを除く）を配列ごとに読み出す"""
+    arrays: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.rstrip("\n")
+            if current is None:
+                if line.endswith(" = ["):
+                    current = arrays.setdefault(line[:-len(" = [")], [])
+            elif line == "];":
+                current = None
+            elif line:
+                current.append(line[:-1] if line.endswith(",") else line)
+    return arrays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSエクスポートの差分更新に使う変更ログのトリガーを作成する")
+    parser.add_argument("--hero-db", default=str(HEROES_DB_PATH), help="英雄DB（default: feh-heroes.sqlite3）")
+    parser.add_argument("--skill-db", default=str(SKILLS_DB_PATH), help="スキルDB（default: feh-skills.sqlite3）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("install", help="skills / heroes の変更を export_log に記録するトリガーを作成")
+    args = parser.parse_args()
+
+    for db_path, table in ((args.skill_db, "skills"), (args.hero_db, "heroes")):
+        conn = sqlite3.connect(db_path)
+        try:
+            created = install(conn, table)
+        finally:
+            conn.close()
+        print(f"{db_path}: {'トリガーを作成しました（次回のエクスポートは全件出力）' if created else '作成済み'}")
+
+
+if __name__ == "__main__":
+    main()
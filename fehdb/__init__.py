@@ -0,0 +1,6 @@
+"""リポジトリ直下のスクリプトと scripts/ 配下のワークスペースメンバーで共有するモジュール
+
+ルートプロジェクト（fehdb）のパッケージとしてインストールされるため、
+scripts/ 配下からも sys.path を変更せずに `from fehdb.xxx import ...` で使える。
+リポジトリ直下のスクリプトはそのままインポートできる。
+"""
@@ -0,0 +1,154 @@
+"""feh-skills.sqlite3 のデータアクセス層
+
+スキル名→ID/タイプの参照や最大IDの取得を、呼び出しのたびにテーブル全体を
+読み直さずに済むようにまとめたもの。
+
+- DBファイルごとに読み取り専用の接続を1つだけ開いて使い回す（get_connection）。
+  参照だけのスクリプトがリポジトリ管理下のDBファイルを変更しないよう、
+  この接続ではDDLも書き込みも行わない
+- skills(name) / skills(english_name) / skills(type) のインデックスは、書き込む側
+  （query.py）が自分の接続で ensure_indexes() を呼んで作成する
+- 名前→ID/タイプの辞書や最大IDをキャッシュし、DBが更新されたら作り直す
+  （他接続・他プロセスの書き込みは PRAGMA data_version で検出する）
+"""
+
+import atexit
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+SKILLS_DB_PATH = Path(__file__).resolve().parent.parent / "feh-skills.sqlite3"
+
+SKILL_INDEXES = {
+    "idx_skills_name": "skills(name)",
+    "idx_skills_english_name": "skills(english_name)",
+    "idx_skills_type": "skills(type)",
+}
+
+# カーソルから一度に取り出す行数（全行を fetchall せずに少しずつ処理する）
+FETCH_CHUNK_SIZE = 256
+
+_connections: dict[Path, sqlite3.Connection] = {}
+_skill_dbs: dict[Path, "SkillDB"] = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class SkillRef:
+    """スキル名から引いたIDとタイプ"""
+
+    id: int
+    type: str
+
+
+def get_connection(db_path: str | Path = SKILLS_DB_PATH) -> sqlite3.Connection:
+    """DBファイルごとに共有する読み取り専用の接続を返す"""
+    path = Path(db_path).resolve()
+    with _lock:
+        conn = _connections.get(path)
+        if conn is None:
+            conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            _connections[path] = conn
+        return conn
+
+
+def close_connections() -> None:
+    """共有接続をすべて閉じる（プロセス終了時にも自動で呼ばれる）"""
+    with _lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+        _skill_dbs.clear()
+
+
+atexit.register(close_connections)
+
+
+def iter_rows(cursor: sqlite3.Cursor, chunk_size: int = FETCH_CHUNK_SIZE):
+    """実行済みカーソルの結果を chunk_size 行ずつ取り出して1行ずつ返す"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> None:
+    """skills テーブルの参照用インデックスを作成（作成済み・読み取り専用なら何もしない）
+
+    書き込み用の接続で呼ぶ（get_connection() の接続は読み取り専用のため作成できない）。
+    """
+    has_skills = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'skills'"
+    ).fetchone()
+    if not has_skills:
+        return
+    try:
+        for name, target in SKILL_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        conn.commit()
+    except sqlite3.OperationalError:
+        # 読み取り専用のDB等。インデックスなしでも参照はできる
+        conn.rollback()
+
+
+class SkillDB:
+    """skills テーブルのキャッシュ付き参照
+
+    キャッシュはDBの更新を検出した時点で作り直すため、query.py 等で書き込んだ後も
+    古い値を返すことはない。
+    """
+
+    def __init__(self, db_path: str | Path = SKILLS_DB_PATH):
+        self.db_path = Path(db_path).resolve()
+        self._version: int | None = None
+        self._skill_map: dict[str, SkillRef] = {}
+        self._max_id = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return get_connection(self.db_path)
+
+    def skill_map(self) -> dict[str, SkillRef]:
+        """スキル名→SkillRef の辞書（同名スキルはIDの大きい方）"""
+        self._refresh()
+        return self._skill_map
+
+    def lookup(self, name: str) -> SkillRef | None:
+        """スキル名からIDとタイプを引く（未登録ならNone）"""
+        return self.skill_map().get(name)
+
+    def names(self) -> set[str]:
+        """全スキル名のセット"""
+        return set(self.skill_map())
+
+    def max_id(self) -> int:
+        """現在の最大スキルID（テーブルが空なら0）"""
+        self._refresh()
+        return self._max_id
+
+    def _refresh(self) -> None:
+        conn = self.conn
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return
+        skill_map = {}
+        max_id = 0
+        for name, skill_id, skill_type in conn.execute("SELECT name, id, type FROM skills ORDER BY id"):
+            skill_map[name] = SkillRef(skill_id, skill_type)
+            max_id = skill_id
+        self._skill_map = skill_map
+        self._max_id = max_id
+        self._version = version
+
+
+def get_skill_db(db_path: str | Path = SKILLS_DB_PATH) -> SkillDB:
+    """DBファイルごとに共有する SkillDB を返す"""
+    path = Path(db_path).resolve()
+    with _lock:
+        skill_db = _skill_dbs.get(path)
+        if skill_db is None:
+            skill_db = SkillDB(path)
+            _skill_dbs[path] = skill_db
+        return skill_db
@@ -0,0 +1,106 @@
+"""順序付き文字列置換ルールのコンパイル
+
+replace.REPLACEMENTS や formatter.TEXT_REPLACEMENTS のような (検索, 置換) のリストは、
+先頭から順に str.replace を適用する（後のルールは前のルールの置換結果を見る）。
+ルール数の分だけテキストを走査し直すことになるため、互いに干渉しない連続したルールを
+1つの正規表現の選択（alternation）にまとめ、1回の走査で置換する。
+
+連続するルール a（先）, b（後）を同じ段にまとめてよいのは次の場合に限る。
+- a と b の検索文字列が、開始位置をずらして重なり合うことがない
+  （同じ位置から始まる場合は選択の順序で a が優先され、逐次適用と同じになる）
+- a の置換結果が b の検索文字列と重なり合うことがない（a の置換で b の一致が
+  新たにできない）。置換結果が空のルールは前後の文字をつなげるため、後ろにまとめない
+まとめられない場合は新しい段を始めるので、結果は逐次適用と常に一致する。
+
+コンパイルはルール数に比例して重いため、ルールのリストはモジュールの読み込み時に
+1回だけコンパイルし、置換のたびにはコンパイル済みの ReplacementRules を渡す。
+"""
+
+import re
+from functools import lru_cache
+
+
+def _can_overlap(p: str, q: str, same_start: bool = True) -> bool:
+    """文字列 p と q の出現がテキスト中で重なり得るか
+
+    same_start=False なら、開始位置が同じ重なり方は除く。
+    """
+    for offset in range(-(len(q) - 1), len(p)):
+        if offset == 0 and not same_start:
+            continue
+        start = max(offset, 0)
+        end = min(len(p), offset + len(q))
+        if start < end and p[start:end] == q[start - offset:end - offset]:
+            return True
+    return False
+
+
+def _interacts(earlier: tuple[str, str], later: tuple[str, str]) -> bool:
+    """earlier の後に later を逐次適用した結果が、1回の走査と異なり得るならTrue"""
+    search, replacement = earlier
+    later_search = later[0]
+    if not search or not later_search or not replacement:
+        return True
+    if _can_overlap(search, later_search, same_start=False):
+        return True
+    return _can_overlap(replacement, later_search)
+
+
+class ReplacementRules:
+    """コンパイル済みの順序付き置換ルール（逐次の str.replace と同じ結果を返す）"""
+
+    def __init__(self, rules):
+        self.rules = [(search, replacement) for search, replacement in rules]
+        self.stages: list[list[tuple[str, str]]] = []
+        for rule in self.rules:
+            stage = self.stages[-1] if self.stages else None
+            if stage is not None and not any(_interacts(earlier, rule) for earlier in stage):
+                stage.append(rule)
+            else:
+                self.stages.append([rule])
+        self._passes = [self._compile_stage(stage) for stage in self.stages]
+
+    @staticmethod
+    def _compile_stage(stage: list[tuple[str, str]]):
+        if len(stage) == 1:
+            search, replacement = stage[0]
+            return lambda text: text.replace(search, replacement)
+        table = {}
+        for search, replacement in stage:
+            table.setdefault(search, replacement)
+        if all(len(search) == 1 for search in table):
+            # 1文字の検索だけなら str.translate で置換できる
+            translation = str.maketrans(table)
+            return lambda text: text.translate(translation)
+        # 選択はルールの順序どおり（同じ位置で一致した場合は先のルールを優先）
+        pattern = re.compile("|".join(re.escape(search) for search in table))
+        substitute = lambda m: table[m.group()]  # noqa: E731
+        return lambda text: pattern.sub(substitute, text)
+
+    def apply(self, text: str) -> str:
+        for replace_pass in self._passes:
+            text = replace_pass(text)
+        return text
+
+    __call__ = apply
+
+    def apply_sequential(self, text: str) -> str:
+        """従来どおりルールごとに str.replace する（比較・検証用）"""
+        for search, replacement in self.rules:
+            text = text.replace(search, replacement)
+        return text
+
+
+@lru_cache(maxsize=None)
+def _compile(rules: tuple[tuple[str, str], ...]) -> ReplacementRules:
+    return ReplacementRules(rules)
+
+
+def compile_replacements(rules) -> ReplacementRules:
+    """置換ルールのリストをコンパイルする（同じ内容のルールはコンパイル結果を共有）
+
+    コンパイル済みの ReplacementRules はそのまま返す。
+    """
+    if isinstance(rules, ReplacementRules):
+        return rules
+    return _compile(tuple((search, replacement) for search, replacement in rules))
@@ -0,0 +1,200 @@
+"""heroes.skills（パイプ区切り）から導出する hero_skills 結合テーブル
+
+feh-heroes.sqlite3 の heroes.skills は `|重騎士の重槍|キラーランス+|...|` のような
+パイプ区切り文字列のため、スキル名での検索が `LIKE '%|X|%'` の全件走査になり、
+create_hero_infos.py も全英雄分の分割・名前引きをPythonで行っていた。
+これをインデックス付きの hero_skills(hero_id, skill_id, slot, rarity) に展開する。
+
+- slot: heroes.skills 内の位置（0始まり、同じタイプのスキルは後ろが装備中）
+- rarity: heroes.skill_rarity（`|スキル名:レアリティ|...|`）の習得レアリティ（不明ならNULL）
+
+heroes の挿入・削除・skills/skill_rarity の更新はトリガーで検出し、スキルDBの
+名前→IDの変化はダイジェストで検出する。hero_skills を書き込むのは `rebuild` だけで、
+参照側（load_hero_skill_map）は最新なら hero_skills を読み、古ければ heroes.skills を
+メモリ上で分割して同じ内容を得る（DBファイルには書き込まない）。
+
+使い方:
+    python hero_skills.py rebuild              # 再構築
+    python hero_skills.py heroes 重騎士の重槍   # スキルを持つ英雄の一覧
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import sys
+
+from fehdb.skill_db import SKILLS_DB_PATH, SkillDB, get_skill_db
+
+HEROES_DB_PATH = SKILLS_DB_PATH.parent / "feh-heroes.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hero_skills (
+    hero_id INTEGER NOT NULL,
+    skill_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    rarity INTEGER,
+    PRIMARY KEY (hero_id, slot)
+);
+CREATE INDEX IF NOT EXISTS idx_hero_skills_skill_id ON hero_skills(skill_id);
+CREATE TABLE IF NOT EXISTS hero_skills_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TRIGGER IF NOT EXISTS hero_skills_stale_on_insert AFTER INSERT ON heroes
+BEGIN
+    INSERT OR REPLACE INTO hero_skills_state (key, value) VALUES ('stale', '1');
+END;
+CREATE TRIGGER IF NOT EXISTS hero_skills_stale_on_update AFTER UPDATE OF id, skills, skill_rarity ON heroes
+BEGIN
+    INSERT OR REPLACE INTO hero_skills_state (key, value) VALUES ('stale', '1');
+END;
+CREATE TRIGGER IF NOT EXISTS hero_skills_stale_on_delete AFTER DELETE ON heroes
+BEGIN
+    INSERT OR REPLACE INTO hero_skills_state (key, value) VALUES ('stale', '1');
+END;
+"""
+
+
+def parse_skill_names(skill_str: str | None) -> list[str]:
+    """`|A|B:x|C|` 形式の文字列からスキル名のリストを取り出す"""
+    if not skill_str:
+        return []
+    return [p.split(':')[0] for p in skill_str.split('|') if p]
+
+
+def parse_skill_rarity(rarity_str: str | None) -> dict[str, int]:
+    """`|A:3|B:5|` 形式の文字列からスキル名→習得レアリティの辞書を作る"""
+    rarity = {}
+    for part in (rarity_str or '').split('|'):
+        name, sep, value = part.partition(':')
+        if sep and value.isdigit():
+            rarity[name] = int(value)
+    return rarity
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """hero_skills テーブル・インデックス・更新検出トリガーを作成"""
+    conn.executescript(_SCHEMA)
+
+
+def rebuild_hero_skills(conn: sqlite3.Connection, skill_db: SkillDB) -> tuple[int, list[str]]:
+    """heroes.skills から hero_skills を作り直す
+
+    Returns:
+        (挿入した行数, スキルDBに見つからなかったスキル名のリスト)
+    """
+    ensure_schema(conn)
+    skill_map = skill_db.skill_map()
+    rows = []
+    unresolved = []
+    for hero_id, skills, skill_rarity in conn.execute("SELECT id, skills, skill_rarity FROM heroes"):
+        rarity = parse_skill_rarity(skill_rarity)
+        for slot, name in enumerate(parse_skill_names(skills)):
+            ref = skill_map.get(name)
+            if ref is None:
+                unresolved.append(name)
+                continue
+            rows.append((hero_id, ref.id, slot, rarity.get(name)))
+
+    with conn:
+        conn.execute("DELETE FROM hero_skills")
+        conn.executemany(
+            "INSERT INTO hero_skills (hero_id, skill_id, slot, rarity) VALUES (?, ?, ?, ?)", rows,
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO hero_skills_state (key, value) VALUES (?, ?)",
+            [('stale', '0'), ('skills_digest', _skills_digest(skill_db))],
+        )
+    return len(rows), unresolved
+
+
+def is_stale(conn: sqlite3.Connection, skill_db: SkillDB) -> bool:
+    """hero_skills が未作成、または heroes / スキルDBの変更後に再構築されていなければTrue"""
+    has_state = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hero_skills_state'"
+    ).fetchone()
+    if not has_state:
+        return True
+    state = dict(conn.execute("SELECT key, value FROM hero_skills_state"))
+    return state.get('stale') != '0' or state.get('skills_digest') != _skills_digest(skill_db)
+
+
+def load_hero_skill_map(conn: sqlite3.Connection, skill_db: SkillDB) -> dict[int, list[tuple[int, str]]]:
+    """英雄ID→所持スキルの (スキルID, タイプ) リスト（slot順、スキルDBにない名前は除く）
+
+    hero_skills が最新ならそれを読み、未作成・古い場合は heroes.skills を分割して
+    スキル名を引く。どちらも読み取りだけで、hero_skills の再構築は行わない。
+    """
+    skill_map = skill_db.skill_map()
+    hero_skill_map: dict[int, list[tuple[int, str]]] = {}
+    if not is_stale(conn, skill_db):
+        skill_types = {ref.id: ref.type for ref in skill_map.values()}
+        for hero_id, skill_id in conn.execute("SELECT hero_id, skill_id FROM hero_skills ORDER BY hero_id, slot"):
+            hero_skill_map.setdefault(hero_id, []).append((skill_id, skill_types[skill_id]))
+        return hero_skill_map
+    for hero_id, skills in conn.execute("SELECT id, skills FROM heroes"):
+        refs = [skill_map.get(name) for name in parse_skill_names(skills)]
+        hero_skill_map[hero_id] = [(ref.id, ref.type) for ref in refs if ref is not None]
+    return hero_skill_map
+
+
+def heroes_with_skill(conn: sqlite3.Connection, skill_ids: list[int]) -> list[tuple[int, str]]:
+    """指定スキルを持つ英雄の (id, name) リスト"""
+    if not skill_ids:
+        return []
+    placeholders = ", ".join("?" * len(skill_ids))
+    return conn.execute(
+        f"SELECT DISTINCT h.id, h.name FROM hero_skills hs JOIN heroes h ON h.id = hs.hero_id "
+        f"WHERE hs.skill_id IN ({placeholders}) ORDER BY h.id",
+        skill_ids,
+    ).fetchall()
+
+
+def _skills_digest(skill_db: SkillDB) -> str:
+    """スキル名→IDの対応のハッシュ（スキルの追加・改名を検出するため）"""
+    h = hashlib.sha256()
+    for name, ref in sorted(skill_db.skill_map().items(), key=lambda item: item[1].id):
+        h.update(f"{ref.id}\t{name}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="heroes.skills から hero_skills テーブルを構築・検索する")
+    parser.add_argument("--hero-db", default=str(HEROES_DB_PATH), help="英雄DB（default: feh-heroes.sqlite3）")
+    parser.add_argument("--skill-db", default=str(SKILLS_DB_PATH), help="スキルDB（default: feh-skills.sqlite3）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="hero_skills を再構築")
+    heroes_parser = sub.add_parser("heroes", help="スキルを持つ英雄を表示")
+    heroes_parser.add_argument("skill_name", help="スキル名")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.hero_db)
+    skill_db = get_skill_db(args.skill_db)
+    try:
+        if args.command == "rebuild":
+            count, unresolved = rebuild_hero_skills(conn, skill_db)
+            print(f"hero_skills: {count}行")
+            if unresolved:
+                print(f"スキルDBに見つからないスキル名: {len(unresolved)}件", file=sys.stderr)
+                for name in sorted(set(unresolved)):
+                    print(f"  {name}", file=sys.stderr)
+        else:
+            if is_stale(conn, skill_db):
+                print("hero_skills が古いため、先に `python hero_skills.py rebuild` を実行してください", file=sys.stderr)
+                sys.exit(1)
+            skill_ids = [
+                skill_id for (skill_id,) in skill_db.conn.execute(
+                    "SELECT id FROM skills WHERE name = ?", (args.skill_name,),
+                )
+            ]
+            if not skill_ids:
+                print(f"スキルが見つかりません: {args.skill_name}", file=sys.stderr)
+                sys.exit(1)
+            for hero_id, name in heroes_with_skill(conn, skill_ids):
+                print(f"{hero_id}\t{name}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
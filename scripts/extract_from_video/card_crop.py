@@ -11,6 +11,7 @@ from pathlib import Path
 import numpy as np
 from PIL import Image
 
+from frame_store import load_frame, save_frame
 from models import FrameGroup, SkillCard
 
 # ボーダー検出用の狭い領域（テキストノイズが少ない）
@@ -133,7 +134,7 @@ def process_frame(
     Returns:
         (クロップされた行画像のリスト, ボーダーY座標のリスト)
     """
-    img = Image.open(frame_path)
+    img = load_frame(frame_path)
 
     detect_panel = _crop_region(img, DETECT_PANEL_CROP)
     border_ys = find_horizontal_borders(detect_panel)
@@ -165,6 +166,9 @@ def save_cropped_rows(
 ) -> list[str]:
     """クロップされた行画像を保存
 
+    フレームストアがストリーミングモードの場合はメモリ上に保持し、
+    PNGへの書き出しはOCRの直前まで遅らせる。
+
     Returns:
         保存されたファイルパスのリスト
     """
@@ -176,7 +180,7 @@ def save_cropped_rows(
     for i, row in enumerate(rows):
         filename = f"{stem}_{i:02d}.png"
         path = out / filename
-        row.save(path)
+        save_frame(path, row)
         saved.append(str(path))
 
     return saved
@@ -197,7 +201,7 @@ def crop_frame_groups(
 
     for group in frame_groups:
         frame_path = group.representative
-        img = Image.open(frame_path)
+        img = load_frame(frame_path)
 
         detect_panel = _crop_region(img, DETECT_PANEL_CROP)
         border_ys = find_horizontal_borders(detect_panel)
@@ -1,7 +1,9 @@
-import sqlite3
 import sys
 from pathlib import Path
 
+from fehdb.skill_db import SKILLS_DB_PATH, get_skill_db
+from fehdb.text_replace import compile_replacements
+
 from models import ExtractedSkill
 
 # replace.pyのREPLACEMENTSを再利用（importが難しいので必要なものだけ定義）
@@ -23,6 +25,9 @@ TEXT_REPLACEMENTS = [
     (',', '、'),
 ]
 
+# 1回の走査にまとめた TEXT_REPLACEMENTS（結果は順に str.replace した場合と同じ）
+_TEXT_REPLACER = compile_replacements(TEXT_REPLACEMENTS)
+
 # スキルタイプ→メタデータコメントのマッピング
 SKILL_TYPE_TO_COMMENT = {
     "奥義": "s",
@@ -33,7 +38,7 @@ SKILL_TYPE_TO_COMMENT = {
     "響心": "px",
 }
 
-DB_PATH = Path(__file__).resolve().parent.parent.parent / "feh-skills.sqlite3"
+DB_PATH = SKILLS_DB_PATH
 
 
 def get_max_skill_id() -> int:
@@ -41,29 +46,14 @@ def get_max_skill_id() -> int:
     if not DB_PATH.exists():
         print(f"警告: データベースが見つかりません: {DB_PATH}", file=sys.stderr)
         return 0
-
-    conn = sqlite3.connect(str(DB_PATH))
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(id) FROM skills")
-        row = cursor.fetchone()
-        return row[0] if row and row[0] is not None else 0
-    finally:
-        conn.close()
+    return get_skill_db(DB_PATH).max_id()
 
 
 def get_existing_skill_names() -> set[str]:
     """feh-skills.sqlite3から全スキル名のセットを取得"""
     if not DB_PATH.exists():
         return set()
-
-    conn = sqlite3.connect(str(DB_PATH))
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM skills")
-        return {row[0] for row in cursor.fetchall()}
-    finally:
-        conn.close()
+    return get_skill_db(DB_PATH).names()
 
 
 def format_output(
@@ -179,11 +169,12 @@ def _normalize_description(lines: list[str]) -> str:
     lines = [line.strip() for line in lines if line.strip()]
 
     # 基本的な正規化を適用
-    joined = "\n".join(lines)
-    for search, replace in TEXT_REPLACEMENTS:
-        joined = joined.replace(search, replace)
+    return apply_text_replacements("\n".join(lines))
+
 
-    return joined
+def apply_text_replacements(text: str) -> str:
+    """TEXT_REPLACEMENTS を順に適用（コンパイル済みの置換で1回の走査にまとめる）"""
+    return _TEXT_REPLACER.apply(text)
 
 
 import re as _re
@@ -0,0 +1,227 @@
+"""フレーム画像のインメモリキャッシュ
+
+スキル画面検出・重複除去・シャープネス評価・カードクロップ・ローカルOCRが
+同じPNGを何度も開いてデコードしていたため、パス単位でデコード済み画像を保持する。
+
+各段はフレームを同じ順序で先頭から読むため、LRUで追い出すと上限を超える
+フレーム数では先頭から追い出されて後段でヒットしない（1080pは1枚約6MBで、
+512MBでは約85枚しか載らない）。そのためメモリ上限に達したら新しいフレームは
+載せず、載っているフレームを後段まで残す。後段で読まないフレーム（スキル画面で
+なかったフレーム、重複除去で代表にならなかったフレーム）は release() で外し、
+空いた分に後段で読むフレームを載せる。
+
+キャッシュはプロセスごとに独立しているため、--workers で並列化した処理の
+子プロセス内でのデコード結果は親プロセスには共有されない。子プロセスの上限は
+worker_initializer() で親の上限をプロセス数で割った値に設定する。
+
+ストリーミングモード（--stream-frames）では、デコーダが切り出したフレームや
+カードクロップをPNGに書かずにストアへ直接登録する（未書き出しフレーム）。
+PNGへの書き出しはOCRバックエンドに渡す直前（materialize）か、メモリ上限を
+超えてストアに載せられないときだけ行うため、未書き出しフレームが失われることはない。
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class FrameStore:
+    """パスをキーにしたデコード済みフレーム画像のキャッシュ（上限に達したら新規は載せない）
+
+    返す Image は共有オブジェクトなので、呼び出し側で書き換えないこと
+    （crop / convert / filter は新しい Image を返すので問題ない）。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, streaming: bool = False):
+        self.max_bytes = max_bytes
+        self.streaming = streaming
+        self._images: OrderedDict[str, Image.Image] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._pending: set[str] = set()  # まだPNGに書き出していないフレーム
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    def get(self, frame_path: str | Path) -> Image.Image:
+        """フレーム画像を返す（未キャッシュならデコードして保持）"""
+        key = str(frame_path)
+        img = self._images.get(key)
+        if img is not None:
+            self.hits += 1
+            return img
+
+        self.misses += 1
+        with Image.open(key) as f:
+            f.load()
+            img = f.copy()
+
+        self._insert(key, img)
+        return img
+
+    def save(self, frame_path: str | Path, img: Image.Image) -> None:
+        """フレーム画像を保存する
+
+        通常はPNGに書き出してキャッシュにも載せる。ストリーミングモードでは
+        書き出しを materialize() または追い出し時まで遅らせる。
+        """
+        key = str(frame_path)
+        self.discard(key)
+        if not self.streaming:
+            img.save(key)
+            self.written += 1
+            self._insert(key, img)
+            return
+        self._pending.add(key)
+        if not self._insert(key, img):
+            self._write(key, img)
+
+    def materialize(self, frame_paths: list[str]) -> int:
+        """未書き出しのフレームをPNGに書き出す（OCRバックエンドに渡す直前に呼ぶ）
+
+        Returns:
+            新たに書き出した枚数
+        """
+        count = 0
+        for frame_path in frame_paths:
+            key = str(frame_path)
+            if key in self._pending:
+                self._write(key, self._images[key])
+                count += 1
+        return count
+
+    def flush(self) -> int:
+        """未書き出しのフレームをすべてPNGに書き出す（--keep-frames 用）"""
+        return self.materialize(list(self._pending))
+
+    @property
+    def pending(self) -> int:
+        """まだPNGに書き出していないフレーム数"""
+        return len(self._pending)
+
+    def release(self, frame_paths: list[str]) -> None:
+        """後段で読まないフレームをキャッシュから外す（PNG書き出し済みのものだけ）
+
+        未書き出しのフレームはOCRやフレーム保存で必要になり得るため残す。
+        """
+        for frame_path in frame_paths:
+            key = str(frame_path)
+            if key not in self._pending:
+                self.discard(key)
+
+    @property
+    def hit_rate(self) -> float:
+        """get() のうちキャッシュから返せた割合"""
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+    def discard(self, frame_path: str | Path) -> None:
+        """指定フレームをキャッシュから外す（ファイル削除・上書き時用）
+
+        未書き出しのフレームは書き出さずに破棄する。
+        """
+        key = str(frame_path)
+        self._pending.discard(key)
+        if self._images.pop(key, None) is not None:
+            self._total_bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        """キャッシュを空にする（統計はリセットしない、未書き出しのフレームも破棄）"""
+        self._images.clear()
+        self._sizes.clear()
+        self._pending.clear()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def __contains__(self, frame_path: object) -> bool:
+        return str(frame_path) in self._images
+
+    def _insert(self, key: str, img: Image.Image) -> bool:
+        """キャッシュに載せる（上限までの空きがなければ載せずにFalse）"""
+        size = _image_nbytes(img)
+        if self._total_bytes + size > self.max_bytes:
+            return False
+        self._images[key] = img
+        self._sizes[key] = size
+        self._total_bytes += size
+        return True
+
+    def _evict(self) -> None:
+        """上限を下げたとき、古いフレームから上限内に収まるまで破棄する"""
+        while self._total_bytes > self.max_bytes and self._images:
+            key, img = self._images.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(key)
+            if key in self._pending:
+                self._write(key, img)
+
+    def _write(self, key: str, img: Image.Image) -> None:
+        """未書き出しのフレームをPNGに書き出す"""
+        Path(key).parent.mkdir(parents=True, exist_ok=True)
+        img.save(key)
+        self._pending.discard(key)
+        self.written += 1
+
+
+def _image_nbytes(img: Image.Image) -> int:
+    """デコード済み画像のおおよそのメモリ使用量（バイト）"""
+    w, h = img.size
+    return w * h * len(img.getbands())
+
+
+_default_store = FrameStore()
+
+
+def get_frame_store() -> FrameStore:
+    """プロセス共通のフレームストアを返す"""
+    return _default_store
+
+
+def configure_frame_store(max_bytes: int, streaming: bool | None = None) -> FrameStore:
+    """プロセス共通フレームストアのメモリ上限・ストリーミングモードを変更する
+
+    上限を超えた分は即座に破棄（未書き出しのフレームはPNGに書き出してから破棄）する。
+    """
+    _default_store.max_bytes = max_bytes
+    if streaming is not None:
+        _default_store.streaming = streaming
+    _default_store._evict()
+    return _default_store
+
+
+def worker_initializer(max_bytes: int) -> None:
+    """子プロセス（--workers）のフレームストアの上限を設定する
+
+    spawn で起動した子プロセスは既定の上限で始まるため、親から上限を渡す。
+    fork で引き継いだフレームはそのまま残し、新規に載せる分だけ上限を適用する。
+    """
+    _default_store.max_bytes = max_bytes
+    _default_store.streaming = False
+
+
+def release_frames(frame_paths: list[str]) -> None:
+    """プロセス共通のフレームストアから後段で読まないフレームを外す"""
+    _default_store.release(frame_paths)
+
+
+def load_frame(frame_path: str | Path) -> Image.Image:
+    """プロセス共通のフレームストア経由でフレーム画像を取得"""
+    return _default_store.get(frame_path)
+
+
+def save_frame(frame_path: str | Path, img: Image.Image) -> None:
+    """プロセス共通のフレームストア経由でフレーム画像を保存"""
+    _default_store.save(frame_path, img)
+
+
+def materialize_frames(frame_paths: list[str]) -> int:
+    """プロセス共通のフレームストアの未書き出しフレームをPNGに書き出す"""
+    return _default_store.materialize(frame_paths)
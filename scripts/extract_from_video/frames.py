@@ -1,10 +1,15 @@
+import json
 import re
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
 import imagehash
-from PIL import Image, ImageFilter
+import numpy as np
+from PIL import Image
 
+from frame_store import get_frame_store, load_frame, release_frames, save_frame, worker_initializer
 from models import FrameGroup
 
 # スキルパネル領域のクロップ比率（右側のスキル説明パネル）
@@ -33,12 +38,18 @@ HASH_THRESHOLD = 8  # パーセプチュアルハッシュのハミング距離
 SCROLL_NAME_THRESHOLD = 5  # スキル名一致の閾値（低い=一致）
 SCROLL_DESC_THRESHOLD = 10  # 説明文差異の閾値（高い=異なる）
 
+# シングルパスデコードの静止判定
+LUMA_SAMPLE_STRIDE = 16  # 静止判定に使う輝度サンプルの間引き間隔（ピクセル）
+MAX_MIDPOINT_CANDIDATES = 8  # 静止区間ごとにメモリに保持する中間フレーム候補の上限
+
 
 def extract_static_frames(
     video_path: str,
     output_dir: str,
     min_duration: float = 1.5,
     noise: float = 0.003,
+    single_pass: bool = False,
+    analysis: "FreezeAnalysis | None" = None,
 ) -> list[str]:
     """ffmpegのfreezedetectで静止区間を検出し、各区間の中間フレームを抽出
 
@@ -47,10 +58,23 @@ def extract_static_frames(
         output_dir: フレーム出力ディレクトリ
         min_duration: 最低静止秒数（これより短い静止区間は無視）
         noise: ノイズ許容値（0〜1、低いほど厳密な静止判定）
+        single_pass: Trueなら動画を1回だけデコードし、静止区間検出と
+            中間フレーム抽出を同時に行う（区間ごとのffmpeg起動・シークなし）
+        analysis: 他の検出と共有する FreezeAnalysis（指定時は single_pass 扱い）
     """
     out = Path(output_dir)
     out.mkdir(parents=True, exist_ok=True)
 
+    if analysis is None and single_pass:
+        analysis = FreezeAnalysis(video_path)
+    if analysis is not None:
+        print(f"静止区間検出 + フレーム抽出中（シングルパス、{min_duration}秒以上）: {video_path}")
+        analysis.capture(noise, min_duration, out)
+        frames = [path for path, _ in analysis.frames(noise, min_duration)]
+        print(f"静止区間数: {len(analysis.intervals(noise, min_duration))}")
+        print(f"抽出フレーム数: {len(frames)}")
+        return frames
+
     # Step 1: freezedetect で静止区間を検出
     print(f"静止区間検出中（{min_duration}秒以上）: {video_path}")
     cmd = [
@@ -83,6 +107,234 @@ def extract_static_frames(
     return frames
 
 
+class FreezeAnalysis:
+    """動画を1回だけデコードし、複数の (noise, min_duration) の静止区間を導出する
+
+    capture() で解析前に登録した (noise, min_duration) については、同じデコード中に
+    静止区間を検出し、各区間の中間フレームも保存する（フレームストア経由。
+    ストリーミングモードではPNGに書き出さずメモリ上に保持する）。strict（スキル画面）と
+    loose（英雄紹介）の検出を1回のデコードで済ませるために使う。
+
+    未登録の組を解析後に intervals() で求めるには keep_lumas=True を指定する。
+    デコード中に各フレームの間引き輝度サンプルをキャッシュし、freezedetect と同じ規則
+    （静止区間先頭の基準フレームとの差分）をキャッシュ上で再実行する。差分は基準
+    フレームに対して取る必要があるため、隣接フレーム差分の1次元信号ではなく輝度
+    サンプル自体を保持する（1080pで1フレーム約8KB、60fpsの10分動画で約290MB）。
+    """
+
+    def __init__(self, video_path: str, keep_lumas: bool = False):
+        self.video_path = video_path
+        self.keep_lumas = keep_lumas
+        self._captures: dict[tuple[float, float], _FreezeTracker] = {}
+        self._intervals: dict[tuple[float, float], list[tuple[float, float]]] = {}
+        self._timestamps: list[float] = []
+        self._lumas: list[np.ndarray] = []
+        self._analyzed = False
+
+    def capture(
+        self,
+        noise: float,
+        min_duration: float,
+        output_dir: str | Path,
+        prefix: str = "frame",
+    ) -> None:
+        """中間フレームを保存する (noise, min_duration) を登録（解析前のみ）"""
+        key = (noise, min_duration)
+        if key in self._captures:
+            return
+        if self._analyzed:
+            raise RuntimeError(f"解析済みのため中間フレームを追加保存できません: noise={noise}, d={min_duration}")
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        self._captures[key] = _FreezeTracker(noise, min_duration, output_dir=out, prefix=prefix)
+
+    def analyze(self) -> None:
+        """動画をデコードし、輝度サンプルのキャッシュと登録済みの静止区間検出を行う"""
+        if self._analyzed:
+            return
+        print(f"動画デコード中（静止区間検出 {len(self._captures)} 件を同時実行）: {self.video_path}")
+        for ts, frame in _iter_video_frames(self.video_path):
+            luma = _sample_luma(frame)
+            if self.keep_lumas:
+                self._timestamps.append(ts)
+                self._lumas.append(luma)
+            for tracker in self._captures.values():
+                tracker.feed(ts, luma, frame)
+        for key, tracker in self._captures.items():
+            self._intervals[key] = tracker.intervals
+        self._analyzed = True
+
+    def intervals(self, noise: float, min_duration: float) -> list[tuple[float, float]]:
+        """静止区間の (start, end) リストを返す（未登録の組は輝度キャッシュから導出）"""
+        self.analyze()
+        key = (noise, min_duration)
+        if key not in self._intervals:
+            if not self.keep_lumas:
+                raise KeyError(
+                    f"capture() で登録されていません（keep_lumas=False）: noise={noise}, d={min_duration}"
+                )
+            tracker = _FreezeTracker(noise, min_duration)
+            for ts, luma in zip(self._timestamps, self._lumas):
+                tracker.feed(ts, luma)
+            self._intervals[key] = tracker.intervals
+        return self._intervals[key]
+
+    def timestamps(self, noise: float, min_duration: float) -> list[float]:
+        """静止区間の中間時刻リストを返す"""
+        return [(s + e) / 2 for s, e in self.intervals(noise, min_duration)]
+
+    def frames(self, noise: float, min_duration: float) -> list[tuple[str, float]]:
+        """capture() で登録した組の [(frame_path, 中間時刻), ...] を返す"""
+        key = (noise, min_duration)
+        if key not in self._captures:
+            raise KeyError(f"capture() で登録されていません: noise={noise}, d={min_duration}")
+        self.analyze()
+        return self._captures[key].frames
+
+
+def _probe_video(video_path: str) -> tuple[int, int, float]:
+    """ffprobeで動画の (width, height, fps) を取得"""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate",
+        "-of", "json", video_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe エラー: {video_path}\n{result.stderr}")
+    stream = json.loads(result.stdout)["streams"][0]
+    num, den = stream["avg_frame_rate"].split("/")
+    return int(stream["width"]), int(stream["height"]), int(num) / int(den)
+
+
+def _iter_video_frames(video_path: str):
+    """ffmpegで動画をデコードし、(timestamp, RGB配列) を1フレームずつ返すジェネレータ
+
+    フレームは固定フレームレート（-fps_mode cfr）で出力されるため、
+    タイムスタンプはフレーム番号 / fps で求める。
+    """
+    width, height, fps = _probe_video(video_path)
+    frame_size = width * height * 3
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", video_path,
+        "-an", "-fps_mode", "cfr",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        index = 0
+        while True:
+            buf = proc.stdout.read(frame_size)
+            if len(buf) < frame_size:
+                break
+            yield index / fps, np.frombuffer(buf, dtype=np.uint8).reshape(height, width, 3)
+            index += 1
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def _sample_luma(frame: np.ndarray) -> np.ndarray:
+    """静止判定用に、RGBフレームから間引きサンプリングした輝度配列を返す
+
+    freezedetect は全プレーンの全画素を比較するが、ここでは速度のため
+    LUMA_SAMPLE_STRIDE ピクセルおきの輝度だけを使う近似になる。
+    """
+    sub = frame[::LUMA_SAMPLE_STRIDE, ::LUMA_SAMPLE_STRIDE].astype(np.uint16)
+    # ITU-R BT.601 の整数近似（Y = 0.299R + 0.587G + 0.114B）
+    luma = (sub[..., 0] * 77 + sub[..., 1] * 150 + sub[..., 2] * 29) >> 8
+    return luma.astype(np.uint8)
+
+
+def _mafd(a: np.ndarray, b: np.ndarray) -> float:
+    """平均絶対フレーム差分（freezedetectと同じく 0〜1 に正規化）"""
+    return float(np.abs(a.astype(np.int16) - b).mean()) / 256
+
+
+class _FreezeTracker:
+    """freezedetectと同じ区間規則で静止区間を追跡し、各区間の中間フレームを保存する
+
+    各フレームを基準フレーム（静止区間の先頭）と比較し、差分が noise を超えた
+    フレームの時刻が基準フレームから min_duration 以上離れていれば、
+    [基準フレーム時刻, そのフレーム時刻] を静止区間とする（freezedetect と同じく
+    区間は変化したフレームで閉じ、そのときの経過時間で判定する。静止中に
+    min_duration を超えた時点では確定しない）。動画末尾で終わらない区間は捨てる。
+
+    差分は _sample_luma の輝度サンプル（LUMA_SAMPLE_STRIDE ピクセルおき）で取る。
+    freezedetect の全プレーン・全画素の比較とは一致しないため、noise の境界付近では
+    区間がずれることがある。
+
+    中間フレームは区間が終わるまで確定しないため、候補フレームを間引きながら
+    最大 MAX_MIDPOINT_CANDIDATES 枚だけメモリに保持する。
+    """
+
+    def __init__(
+        self,
+        noise: float,
+        min_duration: float,
+        output_dir: Path | None = None,
+        prefix: str = "frame",
+    ):
+        self.noise = noise
+        self.min_duration = min_duration
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.intervals: list[tuple[float, float]] = []
+        self.frames: list[tuple[str, float]] = []  # [(frame_path, 中間時刻), ...]
+        self._ref_luma: np.ndarray | None = None
+        self._ref_ts = 0.0
+        self._candidates: list[tuple[float, np.ndarray]] = []
+        self._stride = 1
+        self._seen = 0
+
+    def feed(self, ts: float, luma: np.ndarray, frame: np.ndarray | None = None) -> None:
+        """1フレーム分の輝度サンプル（と保存用のRGBフレーム）を入力"""
+        frozen = self._ref_luma is not None and _mafd(self._ref_luma, luma) <= self.noise
+        if not frozen:
+            if self._ref_luma is not None and ts - self._ref_ts >= self.min_duration:
+                self._close(ts)
+            self._ref_luma = luma
+            self._ref_ts = ts
+            self._candidates = []
+            self._stride = 1
+            self._seen = 0
+
+        if self.output_dir is not None and frame is not None:
+            self._keep_candidate(ts, frame)
+
+    def _keep_candidate(self, ts: float, frame: np.ndarray) -> None:
+        """中間フレーム候補を間引きながら保持"""
+        self._seen += 1
+        if (self._seen - 1) % self._stride:
+            return
+        self._candidates.append((ts, frame))
+
+        # 中間時刻は単調増加するので、それより前の候補（直前の1枚を除く）は二度と選ばれない
+        mid = (self._ref_ts + ts) / 2
+        while len(self._candidates) >= 2 and self._candidates[1][0] <= mid:
+            self._candidates.pop(0)
+
+        if len(self._candidates) > MAX_MIDPOINT_CANDIDATES:
+            self._candidates = self._candidates[::2]
+            self._stride *= 2
+
+    def _close(self, end_ts: float) -> None:
+        """静止区間を確定し、中間時刻に最も近い候補フレームを保存"""
+        start = self._ref_ts
+        index = len(self.intervals)
+        self.intervals.append((start, end_ts))
+        if self.output_dir is None or not self._candidates:
+            return
+
+        mid = (start + end_ts) / 2
+        _, frame = min(self._candidates, key=lambda c: abs(c[0] - mid))
+        path = self.output_dir / f"{self.prefix}_{index:05d}.png"
+        save_frame(path, Image.fromarray(frame))
+        self.frames.append((str(path), mid))
+
+
 def _parse_freezedetect(stderr: str) -> list[tuple[float, float]]:
     """freezedetectの出力から静止区間の(start, end)リストをパース"""
     intervals = []
@@ -105,25 +357,17 @@ def _parse_freezedetect(stderr: str) -> list[tuple[float, float]]:
 def detect_skill_frames(
     frame_paths: list[str],
     crop_ratios: tuple[float, float, float, float] = DEFAULT_SKILL_PANEL_CROP,
+    workers: int = 1,
 ) -> list[str]:
-    """水平エッジ検出＋色分析でスキル説明画面のフレームを検出"""
-    skill_frames = []
+    """水平エッジ検出＋色分析でスキル説明画面のフレームを検出
 
-    for path in frame_paths:
-        img = Image.open(path)
-        w, h = img.size
-
-        # スキルパネル領域をクロップ
-        left = int(w * crop_ratios[0])
-        top = int(h * crop_ratios[1])
-        right = int(w * crop_ratios[2])
-        bottom = int(h * crop_ratios[3])
-        panel = img.crop((left, top, right, bottom))
-
-        _, dark_ratio, bright_ratio = _analyze_skill_panel(panel)
-        h_lines = _count_horizontal_edges(panel)
-        is_skill = h_lines >= MIN_HORIZONTAL_LINES and bright_ratio >= MIN_BRIGHT_RATIO
+    Args:
+        workers: フレーム解析の並列プロセス数（1なら逐次処理）
+    """
+    skill_frames = []
 
+    results = classify_skill_frames(frame_paths, crop_ratios, workers=workers)
+    for path, (is_skill, h_lines, dark_ratio, bright_ratio) in zip(frame_paths, results):
         name = Path(path).name
         if is_skill:
             skill_frames.append(path)
@@ -137,69 +381,125 @@ def detect_skill_frames(
             print(f"  {name}: × スキップ ({', '.join(reasons)})")
 
     print(f"スキル画面候補（エッジ＋色分析）: {len(skill_frames)}/{len(frame_paths)} フレーム")
+    # スキル画面でないフレームは以降読まないので、空いた分を後段のフレームに回す
+    skill_set = set(skill_frames)
+    release_frames([path for path in frame_paths if path not in skill_set])
     return skill_frames
 
 
-def _count_horizontal_edges(panel: Image.Image) -> int:
+def classify_skill_frames(
+    frame_paths: list[str],
+    crop_ratios: tuple[float, float, float, float] = DEFAULT_SKILL_PANEL_CROP,
+    workers: int = 1,
+) -> list[tuple[bool, int, float, float]]:
+    """複数フレームのスキルパネルを一括で判定
+
+    Returns:
+        frame_paths と1:1対応する (is_skill, h_lines, dark_ratio, bright_ratio) のリスト
+    """
+    return _map_frames(partial(_classify_frame, crop_ratios=crop_ratios), frame_paths, workers)
+
+
+def _classify_frame(
+    frame_path: str,
+    crop_ratios: tuple[float, float, float, float],
+) -> tuple[bool, int, float, float]:
+    """1フレーム分のスキルパネル判定（プロセスプールから呼ばれる）"""
+    return classify_skill_panel(_crop_skill_panel(frame_path, crop_ratios))
+
+
+def _map_frames(func, items: list, workers: int) -> list:
+    """フレームごとに独立した処理を実行し、結果を入力順で返す
+
+    workers > 1 ならプロセスプールで並列実行する。後段のグルーピングは
+    入力順に依存するため、executor.map で順序を保ったまま回収する。
+    子プロセスのフレームストアは親の上限をプロセス数で分け合う。
+    """
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=worker_initializer,
+        initargs=(get_frame_store().max_bytes // workers,),
+    ) as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
+
+
+def classify_skill_panel(panel: Image.Image | np.ndarray) -> tuple[bool, int, float, float]:
+    """パネル画像がスキル説明画面かどうかを水平エッジ数＋明色比率で判定
+
+    Returns:
+        (is_skill, h_lines, dark_ratio, bright_ratio) のタプル
+    """
+    pixels = np.asarray(panel)
+    _, dark_ratio, bright_ratio = _analyze_skill_panel(pixels)
+    h_lines = _count_horizontal_edges(pixels)
+    is_skill = h_lines >= MIN_HORIZONTAL_LINES and bright_ratio >= MIN_BRIGHT_RATIO
+    return is_skill, h_lines, dark_ratio, bright_ratio
+
+
+def _crop_skill_panel(
+    frame_path: str,
+    crop_ratios: tuple[float, float, float, float],
+) -> np.ndarray:
+    """フレーム画像からスキルパネル領域をクロップしてRGB配列で返す"""
+    img = load_frame(frame_path)
+    w, h = img.size
+    panel = img.convert("RGB").crop((
+        int(w * crop_ratios[0]), int(h * crop_ratios[1]),
+        int(w * crop_ratios[2]), int(h * crop_ratios[3]),
+    ))
+    return np.asarray(panel)
+
+
+def _count_horizontal_edges(panel: Image.Image | np.ndarray) -> int:
     """パネル画像の水平エッジ（輝度急変行）をカウント
 
     スキルカードの金色ボーダーはパネル幅全体に渡る強い水平エッジを生成する。
     行ごとの平均輝度の急変をカウントすることでカード数を推定する。
     """
-    gray = panel.convert("L")
-    width, height = gray.size
-    pixels = list(gray.getdata())
-
-    # 各行の平均輝度を計算
-    row_means = []
-    for y in range(height):
-        row = pixels[y * width : (y + 1) * width]
-        row_means.append(sum(row) / width)
-
-    # 隣接行との輝度差がしきい値以上の行を「エッジ行」として検出
-    edge_rows = [
-        y for y in range(1, height)
-        if abs(row_means[y] - row_means[y - 1]) >= ROW_GRADIENT_THRESHOLD
-    ]
+    gray = _to_gray(panel)
+    if gray.size == 0:
+        return 0
 
-    if not edge_rows:
+    # 各行の平均輝度 → 隣接行との輝度差がしきい値以上の行を「エッジ行」として検出
+    row_means = gray.mean(axis=1)
+    edge_rows = np.flatnonzero(np.abs(np.diff(row_means)) >= ROW_GRADIENT_THRESHOLD) + 1
+
+    if edge_rows.size == 0:
         return 0
 
     # 連続するエッジ行をグルーピングして1本の水平線としてカウント
-    line_count = 1
-    for i in range(1, len(edge_rows)):
-        if edge_rows[i] - edge_rows[i - 1] > MIN_GAP_BETWEEN_EDGES:
-            line_count += 1
+    return 1 + int(np.count_nonzero(np.diff(edge_rows) > MIN_GAP_BETWEEN_EDGES))
+
 
-    return line_count
+def _to_gray(panel: Image.Image | np.ndarray) -> np.ndarray:
+    """PIL画像またはRGB配列をPILの "L" 変換と同じ輝度配列にする"""
+    if isinstance(panel, Image.Image):
+        return np.asarray(panel.convert("L"))
+    if panel.ndim == 2:
+        return panel
+    # PILの "L" 変換と同じ整数近似（ITU-R 601-2 luma、丸めあり）
+    rgb = panel[..., :3].astype(np.uint32)
+    return ((rgb[..., 0] * 19595 + rgb[..., 1] * 38470 + rgb[..., 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
 
 
-def _analyze_skill_panel(panel: Image.Image) -> tuple[bool, float, float]:
+def _analyze_skill_panel(panel: Image.Image | np.ndarray) -> tuple[bool, float, float]:
     """クロップされたパネル画像がスキル説明画面かどうかを色分析で判定
 
     Returns:
         (is_skill, dark_ratio, bright_ratio) のタプル
     """
-    pixels = list(panel.getdata())
-    total = len(pixels)
-    if total == 0:
+    pixels = np.asarray(panel)
+    if pixels.ndim != 3 or pixels.shape[0] * pixels.shape[1] == 0:
         return False, 0.0, 0.0
 
-    dark_count = 0
-    bright_count = 0
-
-    for pixel in pixels:
-        # RGBの場合（アルファチャネルがある場合も対応）
-        r, g, b = pixel[0], pixel[1], pixel[2]
-        avg = (r + g + b) / 3
-
-        if avg <= DARK_PIXEL_THRESHOLD:
-            dark_count += 1
-        elif avg >= BRIGHT_PIXEL_THRESHOLD:
-            bright_count += 1
-
-    dark_ratio = dark_count / total
-    bright_ratio = bright_count / total
+    # RGB平均の閾値判定は、整数のRGB合計を3倍の閾値と比べるのと等価
+    rgb_sum = pixels[..., :3].sum(axis=2, dtype=np.uint16)
+    total = rgb_sum.size
+    dark_ratio = int(np.count_nonzero(rgb_sum <= DARK_PIXEL_THRESHOLD * 3)) / total
+    bright_ratio = int(np.count_nonzero(rgb_sum >= BRIGHT_PIXEL_THRESHOLD * 3)) / total
 
     is_skill = dark_ratio >= MIN_DARK_RATIO and bright_ratio >= MIN_BRIGHT_RATIO
     return is_skill, dark_ratio, bright_ratio
@@ -210,44 +510,22 @@ def deduplicate_frames(
     crop_ratios: tuple[float, float, float, float] = DEFAULT_SKILL_PANEL_CROP,
     name_crop: tuple[float, float, float, float] = DEFAULT_SKILL_NAME_CROP,
     desc_crop: tuple[float, float, float, float] = DEFAULT_SKILL_DESC_CROP,
+    workers: int = 1,
 ) -> list[FrameGroup]:
-    """パーセプチュアルハッシュでフレームを重複除去し、FrameGroupのリストを返す"""
+    """パーセプチュアルハッシュでフレームを重複除去し、FrameGroupのリストを返す
+
+    Args:
+        workers: ハッシュ計算の並列プロセス数（1なら逐次処理）
+    """
     if not frame_paths:
         return []
 
     # 各フレームのハッシュを計算
-    frame_data = []
-    for path in frame_paths:
-        img = Image.open(path)
-        w, h = img.size
-
-        # パネル全体のハッシュ
-        panel = img.crop((
-            int(w * crop_ratios[0]), int(h * crop_ratios[1]),
-            int(w * crop_ratios[2]), int(h * crop_ratios[3]),
-        ))
-        panel_hash = imagehash.phash(panel)
-
-        # スキル名領域のハッシュ
-        name_region = img.crop((
-            int(w * name_crop[0]), int(h * name_crop[1]),
-            int(w * name_crop[2]), int(h * name_crop[3]),
-        ))
-        name_hash = imagehash.phash(name_region)
-
-        # 説明文領域のハッシュ
-        desc_region = img.crop((
-            int(w * desc_crop[0]), int(h * desc_crop[1]),
-            int(w * desc_crop[2]), int(h * desc_crop[3]),
-        ))
-        desc_hash = imagehash.phash(desc_region)
-
-        frame_data.append({
-            "path": path,
-            "panel_hash": panel_hash,
-            "name_hash": name_hash,
-            "desc_hash": desc_hash,
-        })
+    frame_data = _map_frames(
+        partial(_hash_frame, crop_ratios=crop_ratios, name_crop=name_crop, desc_crop=desc_crop),
+        frame_paths,
+        workers,
+    )
 
     # グループ化
     groups: list[list[dict]] = []
@@ -289,28 +567,79 @@ def deduplicate_frames(
         ))
 
     print(f"重複除去後: {len(result)} グループ（元: {len(frame_paths)} フレーム）")
+    # 以降（カードクロップ・ローカルOCR）で読むのは代表フレームだけ
+    representatives = {group.representative for group in result}
+    release_frames([path for path in frame_paths if path not in representatives])
     return result
 
 
+def _hash_frame(
+    frame_path: str,
+    crop_ratios: tuple[float, float, float, float],
+    name_crop: tuple[float, float, float, float],
+    desc_crop: tuple[float, float, float, float],
+) -> dict:
+    """1フレーム分のパネル・スキル名・説明文領域のハッシュとシャープネスを計算（プロセスプールから呼ばれる）"""
+    img = load_frame(frame_path)
+    w, h = img.size
+
+    # パネル全体のハッシュ
+    panel = img.crop((
+        int(w * crop_ratios[0]), int(h * crop_ratios[1]),
+        int(w * crop_ratios[2]), int(h * crop_ratios[3]),
+    ))
+    panel_hash = imagehash.phash(panel)
+
+    # スキル名領域のハッシュ
+    name_region = img.crop((
+        int(w * name_crop[0]), int(h * name_crop[1]),
+        int(w * name_crop[2]), int(h * name_crop[3]),
+    ))
+    name_hash = imagehash.phash(name_region)
+
+    # 説明文領域のハッシュ
+    desc_region = img.crop((
+        int(w * desc_crop[0]), int(h * desc_crop[1]),
+        int(w * desc_crop[2]), int(h * desc_crop[3]),
+    ))
+    desc_hash = imagehash.phash(desc_region)
+
+    return {
+        "path": frame_path,
+        "panel_hash": panel_hash,
+        "name_hash": name_hash,
+        "desc_hash": desc_hash,
+        "sharpness": _sharpness(img),
+    }
+
+
 def _select_sharpest(group: list[dict]) -> str:
-    """グループ内で最もシャープなフレームを返す"""
-    best_path = group[0]["path"]
-    best_sharpness = -1.0
-
-    for item in group:
-        img = Image.open(item["path"]).convert("L")
-        # ラプラシアンフィルタの分散でシャープネスを推定
-        edges = img.filter(ImageFilter.FIND_EDGES)
-        pixels = list(edges.getdata())
-        if not pixels:
-            continue
-        mean = sum(pixels) / len(pixels)
-        variance = sum((p - mean) ** 2 for p in pixels) / len(pixels)
-        if variance > best_sharpness:
-            best_sharpness = variance
-            best_path = item["path"]
-
-    return best_path
+    """グループ内で最もシャープなフレームを返す（_hash_frame で計算済みのスコアを比較）"""
+    best = group[0]
+    for item in group[1:]:
+        if item["sharpness"] > best["sharpness"]:
+            best = item
+    return best["path"]
+
+
+def _sharpness(img: Image.Image) -> float:
+    """ラプラシアンフィルタ（FIND_EDGES相当）の分散でシャープネスを推定
+
+    PIL の FIND_EDGES と同じく 8近傍ラプラシアンを0〜255にクリップし、
+    外周1ピクセルは元の輝度をそのまま使う。
+    """
+    gray = np.asarray(img.convert("L"), dtype=np.int32)
+    if gray.size == 0:
+        return -1.0
+    edges = gray.copy()
+    if gray.shape[0] >= 3 and gray.shape[1] >= 3:
+        neighbors = (
+            gray[:-2, :-2] + gray[:-2, 1:-1] + gray[:-2, 2:]
+            + gray[1:-1, :-2] + gray[1:-1, 2:]
+            + gray[2:, :-2] + gray[2:, 1:-1] + gray[2:, 2:]
+        )
+        edges[1:-1, 1:-1] = np.clip(8 * gray[1:-1, 1:-1] - neighbors, 0, 255)
+    return float(edges.var())
 
 
 def _collect_scroll_frames(group: list[dict]) -> list[str]:
@@ -330,8 +659,8 @@ def _collect_scroll_frames(group: list[dict]) -> list[str]:
             unique_descs.append(item)
 
     if len(unique_descs) > 1:
-        # スクロールがある場合、各ユニークな説明文から最もシャープなフレームを選択
-        return [_select_sharpest([d]) for d in unique_descs]
+        # スクロールがある場合、各ユニークな説明文のフレームを収集（1枚ずつなのでシャープネス比較は不要）
+        return [d["path"] for d in unique_descs]
     else:
         return [_select_sharpest(group)]
 
@@ -343,6 +672,7 @@ def extract_hero_intro_candidates(
     noise: float = 0.08,
     min_duration: float = 1.5,
     tolerance: float = 2.0,
+    analysis: FreezeAnalysis | None = None,
 ) -> list[tuple[str, float]]:
     """差分法で英雄紹介候補フレームを抽出
 
@@ -356,6 +686,7 @@ def extract_hero_intro_candidates(
         noise: loose検出のノイズ許容値
         min_duration: 最低静止秒数
         tolerance: タイムスタンプ照合の許容誤差（秒）
+        analysis: strict検出と共有する FreezeAnalysis（指定時は追加デコードなし）
 
     Returns:
         [(frame_path, timestamp), ...] のリスト（差分候補のみ）
@@ -363,8 +694,13 @@ def extract_hero_intro_candidates(
     out = Path(output_dir)
     out.mkdir(parents=True, exist_ok=True)
 
-    # loose パラメータで freezedetect 実行
     print(f"英雄紹介候補検出中（noise={noise}, d={min_duration}）")
+    if analysis is not None:
+        return _select_hero_intro_candidates_from_analysis(
+            analysis, strict_timestamps, out, noise, min_duration, tolerance,
+        )
+
+    # loose パラメータで freezedetect 実行
     cmd = [
         "ffmpeg", "-i", video_path,
         "-vf", f"freezedetect=n={noise}:d={min_duration}",
@@ -399,3 +735,34 @@ def extract_hero_intro_candidates(
 
     print(f"  抽出フレーム数: {len(frames)}")
     return frames
+
+
+def _select_hero_intro_candidates_from_analysis(
+    analysis: FreezeAnalysis,
+    strict_timestamps: list[float],
+    out: Path,
+    noise: float,
+    min_duration: float,
+    tolerance: float,
+) -> list[tuple[str, float]]:
+    """FreezeAnalysisで保存済みのloose中間フレームから差分候補を選ぶ
+
+    候補にならなかったフレームは削除し、出力ディレクトリを従来と同じ状態にする。
+    """
+    store = get_frame_store()
+    analysis.capture(noise, min_duration, out, prefix="hero_candidate")
+    loose_frames = analysis.frames(noise, min_duration)
+
+    print(f"  loose検出: {len(loose_frames)} 区間")
+    print(f"  strict検出: {len(strict_timestamps)} 区間")
+
+    frames = []
+    for path, ts in loose_frames:
+        if any(abs(ts - s) <= tolerance for s in strict_timestamps):
+            store.discard(path)
+            Path(path).unlink(missing_ok=True)
+        else:
+            frames.append((path, ts))
+    print(f"  差分候補: {len(frames)} フレーム")
+    print(f"  抽出フレーム数: {len(frames)}")
+    return frames
@@ -86,12 +86,44 @@ LINE_START_PATTERNS: list[str] = [
     r'^竜、',  # 竜、獣の味方は
 ]
 
-_compiled_patterns: list[re.Pattern[str]] = [re.compile(p) for p in LINE_START_PATTERNS]
+
+class LineStartMatcher:
+    """行頭パターンを1つの正規表現の選択にまとめた判定器
+
+    パターンはすべて `^` 始まりなので、`^` を外した各パターンをルールごとの名前付き
+    グループにして選択でつなぎ、行頭で1回だけ照合する。選択はリストの順に試すため、
+    一致したルールは「リストで最初に一致するパターン」になる。
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = list(patterns)
+        alternatives = []
+        for i, pattern in enumerate(self.patterns):
+            if not pattern.startswith('^'):
+                raise ValueError(f"行頭パターンは ^ で始めてください: {pattern}")
+            alternatives.append(f"(?P<r{i}>{pattern[1:]})")
+        self._regex = re.compile("|".join(alternatives))
+
+    def match(self, line: str) -> str | None:
+        """一致したパターン（LINE_START_PATTERNS の要素）を返す（なければNone）"""
+        m = self._regex.match(line)
+        if m is None:
+            return None
+        # 各ルールの名前付きグループは内側のグループより後に閉じるので lastgroup で特定できる
+        return self.patterns[int(m.lastgroup[1:])]
+
+
+_line_start_matcher = LineStartMatcher(LINE_START_PATTERNS)
+
+
+def match_line_start(line: str) -> str | None:
+    """行が一致した開始パターンを返す（診断用。一致しなければNone）"""
+    return _line_start_matcher.match(line)
 
 
 def _is_line_start(line: str) -> bool:
     """行が独立した行の開始パターンにマッチするか判定"""
-    return any(p.search(line) for p in _compiled_patterns)
+    return _line_start_matcher.match(line) is not None
 
 
 def merge_lines(lines: list[str]) -> list[str]:
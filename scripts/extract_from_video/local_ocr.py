@@ -6,6 +6,7 @@ from pathlib import Path
 
 from PIL import Image
 
+from frame_store import load_frame
 from frames import DEFAULT_SKILL_PANEL_CROP
 
 # Apple Vision / Tesseract の言語コードマッピング
@@ -110,7 +111,7 @@ def _ocr_single_frame(
     Returns:
         OCR結果テキスト
     """
-    img = Image.open(frame_path)
+    img = load_frame(frame_path)
     w, h = img.size
 
     # スキルパネル領域にクロップ
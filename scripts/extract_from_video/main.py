@@ -20,16 +20,28 @@
 """
 
 import argparse
+import dataclasses
 import re
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from download import download_video, load_local_video
-from frames import extract_static_frames, extract_hero_intro_candidates, detect_skill_frames, deduplicate_frames
-from ocr import create_backend
+from frames import (
+    FreezeAnalysis, extract_static_frames, extract_hero_intro_candidates,
+    detect_skill_frames, deduplicate_frames,
+)
+from ocr import ImageEncoding, OCRDispatcher, create_backend, format_bytes_sent, resolve_image_encoding
+from ocr_cache import OCRCache
+from frame_store import configure_frame_store, get_frame_store, materialize_frames, release_frames
 from formatter import format_output, format_en_output, write_output, get_max_skill_id
-from models import VideoInfo
+from manifest import (
+    STAGES, RunManifest, digest, file_digest,
+    frame_group_files, frame_groups_from_json, frame_groups_to_json,
+    skills_from_json, skills_to_json,
+)
+from models import ExtractedSkill, FrameGroup, VideoInfo
 
 SOURCES_DIR = Path(__file__).resolve().parent.parent.parent / "sources" / "skill-desc"
 WORK_DIR_BASE = Path(".work")
@@ -76,8 +88,35 @@ def main():
     parser.add_argument("--frames-only", action="store_true",
                         help="フレーム抽出・スキル画面検出まで実行（OCRは行わない）")
     parser.add_argument("--keep-frames", action="store_true", help="デバッグ用にフレーム画像を残す")
+    parser.add_argument("--resume-from", choices=STAGES,
+                        help="指定ステージから再開（それより前のステージは manifest.json の記録を再利用）")
     parser.add_argument("--min-duration", type=float, default=1.4,
                         help="静止区間の最低秒数（これより短い静止を無視、デフォルト: 1.4秒）")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="動画を1回だけデコードして静止区間検出とフレーム抽出を同時に行う"
+                             "（--detect-weapon の strict/loose 検出も同じデコードで行う）")
+    parser.add_argument("--stream-frames", action="store_true",
+                        help="フレームをPNGに書かずメモリ上で検出・重複除去・クロップまで流し、"
+                             "OCRに渡すフレームだけ書き出す（--single-pass を含む）")
+    parser.add_argument("--sequential", action="store_true",
+                        help="JP/EN版のパイプラインを並列化せず順番に実行する（ログを読みやすくしたい場合）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="スキル画面検出・重複除去のフレーム解析に使うプロセス数（デフォルト: 1）")
+    parser.add_argument("--frame-cache-mb", type=int, default=512,
+                        help="デコード済みフレーム画像を保持するメモリ上限MB（JP/EN各プロセス。--workers の子プロセスはこれを分け合う。デフォルト: 512、0で無効）")
+    parser.add_argument("--ocr-concurrency", type=int, default=4,
+                        help="Claude/GeminiのOCRリクエスト（JP/EN合計）・武器種ヒントの同時実行数（デフォルト: 4、1で逐次）")
+    parser.add_argument("--card-batch", action="store_true",
+                        help="同じフレームのスキルカードを1リクエストにまとめてOCRする（Claude/Gemini、失敗時はカード単位に戻す）")
+    parser.add_argument("--image-format", choices=["png", "jpeg", "webp"], default="png",
+                        help="OCRに送る画像の形式（Claude/Gemini、デフォルト: png）")
+    parser.add_argument("--image-quality", type=int, default=90,
+                        help="--image-format jpeg/webp の品質（1〜100、デフォルト: 90）")
+    parser.add_argument("--image-max-pixels", type=int,
+                        help="OCRに送る画像の画素数上限（超える画像は縮小、0で無制限、"
+                             "デフォルト: Claudeは1150000、Geminiは無制限）")
+    parser.add_argument("--no-ocr-cache", action="store_true",
+                        help="OCRレスポンスキャッシュを使わずに常にAPIへ送信する")
     parser.add_argument("--local-ocr",
                         choices=["auto", "apple", "tesseract", "none"],
                         default="none",
@@ -92,16 +131,27 @@ def main():
     # 外部ツールの確認
     _check_dependencies()
 
+    # ストリーミング時のフレームはこのプロセスのメモリ上にしかないため、
+    # 子プロセスでのフレーム解析（--workers）は使えない
+    if args.stream_frames:
+        args.single_pass = True
+        if args.workers > 1:
+            print("注意: --stream-frames 指定時は --workers を無視します（フレームはメモリ上で解析）")
+            args.workers = 1
+
     work_dir = WORK_DIR_BASE / args.id if args.id else WORK_DIR_BASE
+    configure_frame_store(args.frame_cache_mb * 1024 * 1024, streaming=args.stream_frames)
+
+    completed = _run_pipeline(args, work_dir)
 
-    try:
-        _run_pipeline(args, work_dir)
-    finally:
-        if not args.keep_frames and not args.frames_only and work_dir.exists():
-            # フレーム画像のみ削除（動画はキャッシュとして残す）
-            frames_dir = work_dir / "frames"
-            if frames_dir.exists():
-                shutil.rmtree(frames_dir)
+    # 全ステージが記録できた場合のみフレーム画像を削除（動画はキャッシュとして残す）。
+    # 次回は manifest の ocr ステージを再利用するため、フレーム画像は不要になる。
+    # OCRに失敗したグループがある場合や例外で終了した場合は、ocr ステージだけを
+    # 再実行できるようにフレームを残す
+    if completed and not args.keep_frames and not args.frames_only and work_dir.exists():
+        frames_dir = work_dir / "frames"
+        if frames_dir.exists():
+            shutil.rmtree(frames_dir)
 
 
 def _check_dependencies():
@@ -115,13 +165,114 @@ def _check_dependencies():
         sys.exit(1)
 
 
-def _run_pipeline(args, work_dir: Path):
-    """メインパイプラインの実行"""
+def _run_pipeline(args, work_dir: Path) -> bool:
+    """メインパイプラインの実行
+
+    frames（動画取得〜カードクロップ）→ ocr（ローカルOCR〜JP/ENマッチング）→ output の
+    3ステージで構成し、各ステージの入力と出力を work_dir/manifest.json に記録する。
+    入力が前回と同じステージは出力を再利用し、--resume-from 指定時はそれより前の
+    ステージを入力の比較なしに再利用する。ocr ステージを再利用できる場合は、
+    frames ステージのフレーム画像が削除済みでも frames の出力（JSON）をそのまま使う。
+
+    Returns:
+        ocr ステージまで失敗なく記録できたら True
+    """
 
     if args.id and not _VALID_ID_RE.match(args.id):
         print(f"エラー: --id に使用できない文字が含まれています: {args.id!r}（英数字, -, _ のみ）", file=sys.stderr)
         sys.exit(1)
 
+    manifest = RunManifest(work_dir)
+
+    if args.resume_from == "output":
+        ocr_outputs = _require_stage_outputs(manifest, "ocr")
+        print("ocr ステージ: 前回の結果を再利用")
+        jp_skills = skills_from_json(ocr_outputs["jp_skills"])
+        en_skills = skills_from_json(ocr_outputs["en_skills"])
+        _write_outputs(args, jp_skills, en_skills)
+        return True
+
+    # === frames ステージ ===
+    frames_inputs = _frames_stage_inputs(args, work_dir)
+    frames_outputs = None
+    if args.resume_from == "ocr":
+        frames_outputs = _require_stage_outputs(manifest, "frames")
+    elif args.resume_from is None:
+        frames_outputs = manifest.outputs("frames", frames_inputs)
+
+    # ocr ステージの結果を再利用できるなら、フレーム画像が残っていなくてよい
+    ocr_outputs = None
+    if frames_outputs is not None and args.resume_from is None and not args.frames_only:
+        ocr_outputs = manifest.outputs("ocr", _ocr_stage_inputs(args, frames_outputs))
+
+    weapon_llm_calls = 0
+    if frames_outputs is not None and (ocr_outputs is not None or _frame_files_exist(frames_outputs)):
+        reason = "--resume-from 指定" if args.resume_from else "入力に変更がない"
+        print(f"frames ステージ: {reason}ため前回の結果を再利用")
+        jp_frame_groups = frame_groups_from_json(frames_outputs["jp_frame_groups"])
+        en_frame_groups = frame_groups_from_json(frames_outputs["en_frame_groups"])
+    else:
+        if args.resume_from == "ocr":
+            print("エラー: 前回のフレーム画像が残っていないため ocr から再開できません", file=sys.stderr)
+            sys.exit(1)
+        jp_frame_groups, en_frame_groups, weapon_llm_calls = _run_frames_stage(args, work_dir)
+        frames_outputs = {
+            "jp_frame_groups": frame_groups_to_json(jp_frame_groups),
+            "en_frame_groups": frame_groups_to_json(en_frame_groups),
+        }
+        # URL指定の動画はダウンロード後にハッシュが確定するため、入力を取り直して記録する
+        manifest.record("frames", _frames_stage_inputs(args, work_dir), frames_outputs)
+
+    if args.frames_only:
+        print("\n--frames-only: フレーム抽出完了。OCRはスキップします。")
+        print(f"フレーム保存先: {work_dir / 'frames'}")
+        return False
+
+    # === ocr ステージ ===
+    completed = True
+    if ocr_outputs is not None:
+        print("ocr ステージ: 入力に変更がないため前回の結果を再利用")
+        jp_skills = skills_from_json(ocr_outputs["jp_skills"])
+        en_skills = skills_from_json(ocr_outputs["en_skills"])
+    else:
+        jp_skills, en_skills, failed_groups = _run_ocr_stage(args, jp_frame_groups, en_frame_groups, weapon_llm_calls)
+        if failed_groups:
+            # エラーを含む結果（__OCR_ERROR_i__ 等）を次回再利用しないよう記録しない
+            manifest.discard("ocr")
+            completed = False
+            print(f"\nocr ステージ: {failed_groups}グループのOCRに失敗したため記録しません（次回は ocr ステージから再実行）")
+        else:
+            manifest.record("ocr", _ocr_stage_inputs(args, frames_outputs), {
+                "jp_skills": skills_to_json(jp_skills),
+                "en_skills": skills_to_json(en_skills),
+            })
+
+    # === output ステージ（既存スキル名・DB最大IDに依存するため毎回実行） ===
+    _write_outputs(args, jp_skills, en_skills)
+    return completed
+
+
+def _run_frames_stage(args, work_dir: Path) -> tuple[list[FrameGroup], list[FrameGroup] | None, int]:
+    """動画取得〜スキル画面検出・重複除去・カードクロップ
+
+    Returns:
+        (JP FrameGroupリスト, EN FrameGroupリスト（EN動画なしならNone）, 武器種LLM呼び出し数)
+    """
+    # 前回のフレームキャッシュを削除（残骸防止）
+    frames_dir = work_dir / "frames"
+    if frames_dir.exists():
+        shutil.rmtree(frames_dir)
+    get_frame_store().clear()
+
+    # EN版は match_jp_en_skills まで JP版と共有するものがないため、
+    # 動画取得〜カードクロップを別プロセスで並列に進める
+    has_en = bool(args.en_url or args.en_video)
+    en_future = None
+    if has_en and not args.sequential:
+        en_executor = ProcessPoolExecutor(max_workers=1)
+        en_future = en_executor.submit(_prepare_en_frame_groups, args, work_dir)
+        en_executor.shutdown(wait=False)
+
     # === Step 1: 動画の取得 ===
     print("=" * 50)
     print("Step 1: 動画の取得")
@@ -129,7 +280,6 @@ def _run_pipeline(args, work_dir: Path):
 
     video_dir = work_dir / "videos"
     jp_video = _get_video(args.jp_url, args.jp_video, "jp", video_dir=video_dir)
-    en_video = _get_video(args.en_url, args.en_video, "en", video_dir=video_dir) if (args.en_url or args.en_video) else None
 
     # === Step 2: 静止区間検出 + フレーム抽出 ===
     print()
@@ -137,24 +287,22 @@ def _run_pipeline(args, work_dir: Path):
     print("Step 2: 静止区間検出 + フレーム抽出")
     print("=" * 50)
 
-    # 前回のフレームキャッシュを削除（残骸防止）
-    frames_dir = work_dir / "frames"
-    if frames_dir.exists():
-        shutil.rmtree(frames_dir)
-
     jp_frames_dir = str(work_dir / "frames" / "jp")
+    hero_candidates_dir = str(work_dir / "frames" / "hero_candidates")
+
+    # シングルパス時は strict（スキル画面）と loose（英雄紹介）の検出を1回のデコードで行う
+    jp_analysis = None
+    if args.single_pass:
+        jp_analysis = FreezeAnalysis(jp_video.path)
+        jp_analysis.capture(0.003, args.min_duration, jp_frames_dir)
+        if args.detect_weapon:
+            jp_analysis.capture(0.08, 1.5, hero_candidates_dir, prefix="hero_candidate")
+
     jp_static_frames = extract_static_frames(
         jp_video.path, jp_frames_dir, min_duration=args.min_duration,
+        analysis=jp_analysis,
     )
 
-    en_frame_groups = None
-    en_static_frames = None
-    if en_video:
-        en_frames_dir = str(work_dir / "frames" / "en")
-        en_static_frames = extract_static_frames(
-            en_video.path, en_frames_dir, min_duration=args.min_duration,
-        )
-
     # === Step 2.5: 英雄紹介フレーム検出（武器種ヒント取得） ===
     # timestamp → weapon_type のヒント（LLM推定、確度低）
     hero_weapon_hints: dict[float, str] = {}
@@ -170,21 +318,26 @@ def _run_pipeline(args, work_dir: Path):
         print("Step 2.5: 英雄紹介フレーム検出（武器種ヒント取得）")
         print("=" * 50)
 
-        strict_timestamps = _extract_timestamps(jp_video.path, min_duration=args.min_duration)
+        strict_timestamps = _extract_timestamps(
+            jp_video.path, min_duration=args.min_duration, analysis=jp_analysis,
+        )
 
-        hero_candidates_dir = str(work_dir / "frames" / "hero_candidates")
         hero_candidates = extract_hero_intro_candidates(
             jp_video.path,
             strict_timestamps=strict_timestamps,
             output_dir=hero_candidates_dir,
             noise=0.08,
             min_duration=1.5,
+            analysis=jp_analysis,
         )
 
         if hero_candidates:
             # テンプレートマッチングで英雄紹介フレームを検出
             candidate_paths = [path for path, _ in hero_candidates]
+            materialize_frames(candidate_paths)
             tm_results = detect_weapon_types_batch(candidate_paths)
+            # 英雄紹介候補はPNGから読むので、フレームストアの空きをスキル画面に回す
+            release_frames(candidate_paths)
 
             # テンプレートマッチングで検出されたフレームのみLLM分類
             hero_frames = [
@@ -200,6 +353,7 @@ def _run_pipeline(args, work_dir: Path):
                 llm_results = classify_weapon_hints_batch(
                     [path for path, _ in hero_frames],
                     model=gemini_model,
+                    concurrency=args.ocr_concurrency,
                 )
                 for (_, weapon_hint), (_, ts) in zip(llm_results, hero_frames):
                     if weapon_hint:
@@ -214,16 +368,10 @@ def _run_pipeline(args, work_dir: Path):
     print("Step 3: スキル画面検出 + 重複除去")
     print("=" * 50)
 
-    jp_skill_frames = detect_skill_frames(jp_static_frames)
-    jp_frame_groups = deduplicate_frames(jp_skill_frames)
-
-    if en_static_frames:
-        en_skill_frames = detect_skill_frames(en_static_frames)
-        en_frame_groups = deduplicate_frames(en_skill_frames)
+    jp_skill_frames = detect_skill_frames(jp_static_frames, workers=args.workers)
+    jp_frame_groups = deduplicate_frames(jp_skill_frames, workers=args.workers)
 
     print(f"\nJP スキル数: {len(jp_frame_groups)}")
-    if en_frame_groups:
-        print(f"EN スキル数: {len(en_frame_groups)}")
 
     # 武器種ヒントをFrameGroupに関連付け
     if hero_weapon_hints and strict_timestamps:
@@ -242,16 +390,31 @@ def _run_pipeline(args, work_dir: Path):
         jp_cropped_dir = work_dir / "frames" / "cropped_jp"
         crop_frame_groups(jp_frame_groups, jp_cropped_dir)
 
+    _finish_streamed_frames(args, jp_frame_groups, jp_static_frames)
+
+    # EN版の完了を待つ（--sequential 時はここで実行）
+    en_frame_groups = None
+    if has_en:
+        en_frame_groups = en_future.result() if en_future else _prepare_en_frame_groups(args, work_dir)
         if en_frame_groups:
-            print("\n[英語版]")
-            en_cropped_dir = work_dir / "frames" / "cropped_en"
-            crop_frame_groups(en_frame_groups, en_cropped_dir)
+            print(f"\nEN スキル数: {len(en_frame_groups)}")
+
+    _print_frame_store_stats()
+
+    return jp_frame_groups, en_frame_groups, len(hero_weapon_hints)
 
-    if args.frames_only:
-        print("\n--frames-only: フレーム抽出完了。OCRはスキップします。")
-        print(f"フレーム保存先: {work_dir / 'frames'}")
-        return
 
+def _run_ocr_stage(
+    args,
+    jp_frame_groups: list[FrameGroup],
+    en_frame_groups: list[FrameGroup] | None,
+    weapon_llm_calls: int = 0,
+) -> tuple[list[ExtractedSkill], list[ExtractedSkill], int]:
+    """ローカルOCRヒント〜VLM OCR〜JP/ENマッチング
+
+    Returns:
+        (JPスキル, ENスキル, OCRに失敗したグループ数)
+    """
     # === Step 3.7: ローカルOCRヒント ===
     if args.local_ocr != "none":
         from local_ocr import detect_local_ocr_engine, run_local_ocr
@@ -264,14 +427,20 @@ def _run_pipeline(args, work_dir: Path):
             run_local_ocr(jp_frame_groups, engine, lang="ja")
 
     # === Step 4: OCR ===
-    backend_kwargs = {}
+    backend_kwargs = {"cache": OCRCache(enabled=not args.no_ocr_cache)}
     if args.ocr == "gemini":
         backend_kwargs["model"] = args.gemini_model
+        backend_kwargs["concurrency"] = args.ocr_concurrency
+        backend_kwargs["card_batch"] = args.card_batch
+        backend_kwargs["image_encoding"] = _image_encoding(args)
         backend_label = f"Gemini ({args.gemini_model})"
     elif args.ocr == "ollama":
         backend_kwargs["model"] = args.ollama_model
         backend_label = f"Ollama ({args.ollama_model})"
     else:
+        backend_kwargs["concurrency"] = args.ocr_concurrency
+        backend_kwargs["card_batch"] = args.card_batch
+        backend_kwargs["image_encoding"] = _image_encoding(args)
         backend_label = "Claude Vision API"
 
     new_only = not args.all
@@ -284,23 +453,25 @@ def _run_pipeline(args, work_dir: Path):
 
     backend = create_backend(args.ocr, **backend_kwargs)
 
-    print("\n[日本語版]")
-    jp_skills = backend.ocr_jp_skills(jp_frame_groups, new_only=new_only)
+    # EN版OCRはJP版OCRと並行してスレッドで実行（ネットワーク待ちを重ねる）。
+    # Ollamaはローカルで1リクエストずつ処理するため、JP版の後に逐次実行する。
+    # ディスパッチャ経由なので、EN版のログは結果を取り出す時点でまとめて表示される。
+    # APIリクエストの同時実行数はバックエンドが JP/EN 合計で --ocr-concurrency に制限する
+    en_concurrent = not args.sequential and args.ocr != "ollama"
+    en_skills = []
+    with OCRDispatcher(2 if en_concurrent else 1) as en_dispatcher:
+        en_ocr_call = None
+        if en_frame_groups:
+            en_ocr_call = en_dispatcher.submit(backend.ocr_en_skills, en_frame_groups, new_only=False)
 
-    # DB照合: LLMのis_new誤判定を補正し、既存スキルを除去
-    from formatter import get_existing_skill_names
-    existing_names = get_existing_skill_names()
-    if existing_names:
-        before_count = len(jp_skills)
-        jp_skills = [s for s in jp_skills if s.jp_name.startswith("__") or s.jp_name not in existing_names]
-        removed = before_count - len(jp_skills)
-        if removed > 0:
-            print(f"  DB照合: {removed}件の既存スキルを除去（残り{len(jp_skills)}件）")
+        print("\n[日本語版]")
+        jp_skills = backend.ocr_jp_skills(jp_frame_groups, new_only=new_only)
+
+        if en_frame_groups:
+            print("\n[英語版 OCR]")
+            en_skills = en_ocr_call.result()
 
-    en_skills = []
     if en_frame_groups:
-        print("\n[英語版 OCR]")
-        en_skills = backend.ocr_en_skills(en_frame_groups, new_only=False)
         print(f"  EN スキル数: {len(en_skills)}")
 
         print("\n[JP↔ENマッチング]")
@@ -320,12 +491,49 @@ def _run_pipeline(args, work_dir: Path):
         matched = sum(1 for s in jp_skills if s.en_name)
         print(f"  マッチング結果: {matched}/{len(jp_valid)} スキル")
 
+    # LLM API呼び出し回数の集計
+    llm_calls = 0
+    if hasattr(backend, "api_call_count"):
+        llm_calls += backend.api_call_count
+    llm_calls += weapon_llm_calls  # classify_weapon_hints_batch の呼び出し数
+    if llm_calls > 0:
+        print(f"\nLLM API呼び出し回数: {llm_calls}")
+    if backend.cache.enabled:
+        print(f"OCRキャッシュ: ヒット {backend.cache.hits} / ミス {backend.cache.misses}")
+    if hasattr(backend, "image_bytes_sent"):
+        encoding = backend.image_encoding
+        limit = f"{encoding.max_pixels}画素" if encoding.max_pixels else "無制限"
+        print(f"{format_bytes_sent(backend.image_bytes_sent)} [{encoding.format}, 上限 {limit}]")
+
+    return jp_skills, en_skills, backend.failed_groups
+
+
+def _image_encoding(args) -> ImageEncoding | None:
+    """OCRに送る画像のエンコード設定（Ollamaはローカル実行のため対象外）"""
+    if args.ocr == "ollama":
+        return None
+    return resolve_image_encoding(args.ocr, args.image_format, args.image_quality, args.image_max_pixels)
+
+
+def _write_outputs(args, jp_skills: list[ExtractedSkill], en_skills: list[ExtractedSkill]) -> None:
+    """DB照合（既存スキルの除去）と出力ファイルの生成"""
     # === Step 5: 出力生成 ===
     print()
     print("=" * 50)
     print("Step 5: 出力生成")
     print("=" * 50)
 
+    # DB照合: LLMのis_new誤判定を補正し、既存スキルを除去。
+    # DBの内容に依存するため ocr ステージの記録には含めず、出力のたびに照合する
+    from formatter import get_existing_skill_names
+    existing_names = get_existing_skill_names()
+    if existing_names:
+        before_count = len(jp_skills)
+        jp_skills = [s for s in jp_skills if s.jp_name.startswith("__") or s.jp_name not in existing_names]
+        removed = before_count - len(jp_skills)
+        if removed > 0:
+            print(f"DB照合: {removed}件の既存スキルを除去（残り{len(jp_skills)}件）")
+
     start_id = args.start_id
     if start_id is None:
         max_id = get_max_skill_id()
@@ -349,15 +557,6 @@ def _run_pipeline(args, work_dir: Path):
         print(en_output_content)
         print("-" * 40)
 
-    # LLM API呼び出し回数の集計
-    llm_calls = 0
-    if hasattr(backend, "api_call_count"):
-        llm_calls += backend.api_call_count
-    if hero_weapon_hints:
-        llm_calls += len(hero_weapon_hints)  # classify_weapon_hints_batch の呼び出し数
-    if llm_calls > 0:
-        print(f"\nLLM API呼び出し回数: {llm_calls}")
-
     if args.dry_run:
         print(f"[ドライラン] JP スキル数: {len(jp_skills)}")
         if en_skills:
@@ -377,6 +576,164 @@ def _run_pipeline(args, work_dir: Path):
             print(f"完了: {len(en_skills)} ENスキルを {en_output_path} に出力しました")
 
 
+def _frames_stage_inputs(args, work_dir: Path) -> dict:
+    """frames ステージの入力（動画内容・抽出パラメータ・クロップ領域）"""
+    from card_crop import DETECT_PANEL_CROP, OUTPUT_PANEL_CROP
+    from frames import DEFAULT_SKILL_PANEL_CROP, DEFAULT_SKILL_NAME_CROP, DEFAULT_SKILL_DESC_CROP
+
+    video_dir = work_dir / "videos"
+    return {
+        "jp_source": _video_source(args.jp_url, args.jp_video, video_dir / "jp_video.mp4"),
+        "en_source": _video_source(args.en_url, args.en_video, video_dir / "en_video.mp4"),
+        "min_duration": args.min_duration,
+        # シングルパスは静止判定が freezedetect の近似なので、抽出されるフレームが変わり得る
+        "single_pass": args.single_pass,
+        "stream_frames": args.stream_frames,
+        "detect_weapon": args.detect_weapon,
+        "weapon_model": args.gemini_model if args.detect_weapon else None,
+        "card_crop": not args.no_card_crop,
+        "crop": {
+            "skill_panel": DEFAULT_SKILL_PANEL_CROP,
+            "skill_name": DEFAULT_SKILL_NAME_CROP,
+            "skill_desc": DEFAULT_SKILL_DESC_CROP,
+            "card_detect": DETECT_PANEL_CROP,
+            "card_output": OUTPUT_PANEL_CROP,
+        },
+    }
+
+
+def _video_source(url: str | None, local_path: str | None, downloaded_path: Path) -> dict | None:
+    """動画ソースの識別情報
+
+    ローカルファイルは内容のハッシュ、URLはURLとダウンロード済み動画のハッシュ
+    （未ダウンロードなら None）。download_video は work_dir/videos に残った動画を
+    再利用するため、同じURLの動画が差し替えられても自動では再ダウンロードしない。
+    """
+    if local_path:
+        return {"video_sha256": file_digest(local_path)}
+    if url:
+        return {
+            "url": url,
+            "video_sha256": file_digest(downloaded_path) if downloaded_path.exists() else None,
+        }
+    return None
+
+
+def _ocr_stage_inputs(args, frames_outputs: dict) -> dict:
+    """ocr ステージの入力（frames ステージの出力・バックエンド・モデル・プロンプト）"""
+    if args.ocr == "gemini":
+        model = args.gemini_model
+    elif args.ocr == "ollama":
+        model = args.ollama_model
+    else:
+        from ocr_claude import MODEL as model
+    encoding = _image_encoding(args)
+
+    return {
+        "frames": digest(frames_outputs),
+        "backend": args.ocr,
+        "model": model,
+        "prompts": _prompt_digest(args.ocr),
+        "new_only": not args.all,
+        "local_ocr": args.local_ocr,
+        "card_batch": args.card_batch,
+        "image_encoding": dataclasses.asdict(encoding) if encoding else None,
+    }
+
+
+def _prompt_digest(backend_name: str) -> str:
+    """OCRで使うプロンプト定数のハッシュ（プロンプト変更時に ocr ステージを再実行するため）"""
+    import importlib
+    import ocr
+
+    prompts = {}
+    for module in (ocr, importlib.import_module(f"ocr_{backend_name}")):
+        for name, value in vars(module).items():
+            if "PROMPT" in name and isinstance(value, str):
+                prompts[f"{module.__name__}.{name}"] = value
+    return digest(prompts)
+
+
+def _require_stage_outputs(manifest: RunManifest, stage: str) -> dict:
+    """--resume-from で再利用するステージの出力を取得（未記録ならエラー終了）"""
+    outputs = manifest.outputs(stage)
+    if outputs is None:
+        print(f"エラー: {manifest.path} に {stage} ステージの記録がありません", file=sys.stderr)
+        sys.exit(1)
+    return outputs
+
+
+def _frame_files_exist(frames_outputs: dict) -> bool:
+    """frames ステージの出力が参照するフレーム・カード画像が残っているか"""
+    groups = (
+        frame_group_files(frame_groups_from_json(frames_outputs["jp_frame_groups"]))
+        + frame_group_files(frame_groups_from_json(frames_outputs["en_frame_groups"]))
+    )
+    return all(Path(path).exists() for path in groups)
+
+
+def _prepare_en_frame_groups(args, work_dir: Path) -> list[FrameGroup] | None:
+    """EN版の動画取得〜スキル画面検出・重複除去・カードクロップ
+
+    JP版と並列に別プロセスで実行されるため、フレームストアはこのプロセス内で設定する。
+    """
+    configure_frame_store(args.frame_cache_mb * 1024 * 1024, streaming=args.stream_frames)
+
+    print("\n[英語版] 動画の取得")
+    en_video = _get_video(args.en_url, args.en_video, "en", video_dir=work_dir / "videos")
+
+    print("\n[英語版] 静止区間検出 + フレーム抽出")
+    en_frames_dir = str(work_dir / "frames" / "en")
+    en_static_frames = extract_static_frames(
+        en_video.path, en_frames_dir, min_duration=args.min_duration,
+        single_pass=args.single_pass,
+    )
+    if not en_static_frames:
+        return None
+
+    print("\n[英語版] スキル画面検出 + 重複除去")
+    en_skill_frames = detect_skill_frames(en_static_frames, workers=args.workers)
+    en_frame_groups = deduplicate_frames(en_skill_frames, workers=args.workers)
+
+    if not args.no_card_crop:
+        from card_crop import crop_frame_groups
+
+        print("\n[英語版] スキルカードクロップ")
+        crop_frame_groups(en_frame_groups, work_dir / "frames" / "cropped_en")
+
+    _finish_streamed_frames(args, en_frame_groups, en_static_frames)
+    _print_frame_store_stats("[英語版] ")
+    return en_frame_groups
+
+
+def _print_frame_store_stats(label: str = "") -> None:
+    """フレームストアのヒット率を表示（--workers の子プロセス内の読み込みは含まない）"""
+    store = get_frame_store()
+    print(
+        f"\n{label}フレームキャッシュ: ヒット率 {store.hit_rate:.0%}（ヒット {store.hits} / デコード {store.misses}、"
+        f"保持 {len(store)}枚 {store.total_bytes / (1024 * 1024):.0f}MB、PNG書き出し {store.written}枚）"
+    )
+
+
+def _finish_streamed_frames(args, frame_groups: list[FrameGroup], static_frames: list[str]) -> None:
+    """ストリーミング時、OCRが参照するフレームだけPNGに書き出し、残りをメモリから解放
+
+    --keep-frames / --frames-only 時はデバッグ用にすべて書き出す。
+    """
+    store = get_frame_store()
+    if not store.streaming:
+        return
+    keep = frame_group_files(frame_groups)
+    if args.keep_frames or args.frames_only:
+        keep = keep + static_frames
+    written = store.materialize(keep)
+    keep_set = set(keep)
+    for path in static_frames:
+        if path not in keep_set:
+            store.discard(path)
+    print(f"PNG書き出し: {written}枚（静止フレーム {len(static_frames)}枚）")
+
+
 def _get_video(url: str | None, local_path: str | None, language: str, *, video_dir: Path) -> VideoInfo:
     """URLまたはローカルパスから動画を取得"""
     if local_path:
@@ -390,8 +747,15 @@ def _extract_timestamps(
     video_path: str,
     min_duration: float = 1.5,
     noise: float = 0.003,
+    analysis: FreezeAnalysis | None = None,
 ) -> list[float]:
-    """動画からfreezedetectでタイムスタンプを取得（フレーム抽出なし）"""
+    """動画からfreezedetectでタイムスタンプを取得（フレーム抽出なし）
+
+    analysis 指定時はデコード済みのキャッシュから求める（ffmpegを再実行しない）。
+    """
+    if analysis is not None:
+        return analysis.timestamps(noise, min_duration)
+
     import subprocess
     from frames import _parse_freezedetect
 
@@ -0,0 +1,115 @@
+"""パイプラインのステージ単位の実行記録（マニフェスト）
+
+`.work/<id>/manifest.json` に各ステージの入力（動画ハッシュ・パラメータ・モデル等）と
+出力（FrameGroup / ExtractedSkill のJSON）を保存する。入力が前回と同じステージは
+再実行せずに出力を再利用し、`--resume-from` で任意のステージから再開できる。
+"""
+
+import dataclasses
+import hashlib
+import json
+from pathlib import Path
+
+from models import ExtractedSkill, FrameGroup, SkillCard
+
+STAGES = ("frames", "ocr", "output")
+MANIFEST_NAME = "manifest.json"
+
+
+class RunManifest:
+    """ステージごとの入力・出力を記録するマニフェスト"""
+
+    def __init__(self, work_dir: Path):
+        self.path = work_dir / MANIFEST_NAME
+        self.stages: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self.stages = json.loads(self.path.read_text(encoding="utf-8")).get("stages", {})
+            except (json.JSONDecodeError, OSError):
+                self.stages = {}
+
+    def outputs(self, stage: str, inputs: dict | None = None) -> dict | None:
+        """記録済みの出力を返す
+
+        inputs 指定時は、記録時の入力と一致する場合のみ返す（不一致・未記録ならNone）。
+        """
+        entry = self.stages.get(stage)
+        if entry is None:
+            return None
+        if inputs is not None and entry.get("inputs") != _normalize(inputs):
+            return None
+        return entry.get("outputs")
+
+    def record(self, stage: str, inputs: dict, outputs: dict) -> None:
+        """ステージの入力・出力を保存し、後続ステージの記録を破棄"""
+        self.stages[stage] = {"inputs": _normalize(inputs), "outputs": outputs}
+        for later in STAGES[STAGES.index(stage) + 1:]:
+            self.stages.pop(later, None)
+        self._save()
+
+    def discard(self, stage: str) -> None:
+        """ステージとその後続ステージの記録を破棄（失敗を含む結果を再利用させないため）"""
+        for later in STAGES[STAGES.index(stage):]:
+            self.stages.pop(later, None)
+        self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"stages": self.stages}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+
+def _normalize(data: dict) -> dict:
+    """tuple → list 等、JSON往復後と同じ形に揃える（入力比較用）"""
+    return json.loads(json.dumps(data, ensure_ascii=False))
+
+
+def digest(data) -> str:
+    """JSON化可能な値のハッシュ（ステージ間の依存関係の記録用）"""
+    text = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str | Path) -> str:
+    """ファイル内容のSHA-256"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_groups_to_json(groups: list[FrameGroup] | None) -> list[dict] | None:
+    if groups is None:
+        return None
+    return [dataclasses.asdict(g) for g in groups]
+
+
+def frame_groups_from_json(data: list[dict] | None) -> list[FrameGroup] | None:
+    if data is None:
+        return None
+    groups = []
+    for d in data:
+        cards = [SkillCard(**c) for c in d.get("skill_cards", [])]
+        groups.append(FrameGroup(**{**d, "skill_cards": cards}))
+    return groups
+
+
+def frame_group_files(groups: list[FrameGroup] | None) -> list[str]:
+    """FrameGroup が参照する画像ファイルのパス一覧（再利用可否の確認用）"""
+    paths = []
+    for g in groups or []:
+        paths.append(g.representative)
+        paths.extend(g.all_frames)
+        paths.extend(c.image_path for c in g.skill_cards)
+    return paths
+
+
+def skills_to_json(skills: list[ExtractedSkill]) -> list[dict]:
+    return [dataclasses.asdict(s) for s in skills]
+
+
+def skills_from_json(data: list[dict]) -> list[ExtractedSkill]:
+    return [ExtractedSkill(**d) for d in data]
@@ -1,11 +1,19 @@
 """OCRバックエンド共通インターフェース + ファクトリ + 共有ユーティリティ"""
 
 import base64
+import io
 import json
 import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol, runtime_checkable
 
+from PIL import Image
+
 from line_merger import merge_lines
 from models import ExtractedSkill, FrameGroup, SkillCard
 
@@ -234,6 +242,59 @@ Output as JSON array only (no other text):
 ```"""
 
 
+def build_card_batch_prompt(single_card_prompt: str, card_count: int, lang: str) -> str:
+    """単一カード用プロンプトを、複数カードを1リクエストで送るバッチ用に包む
+
+    1枚分の抽出指示はそのまま再利用し、出力を card_index 付きのJSON配列にするよう指示する。
+    """
+    if lang == "ja":
+        return f"""\
+以下の{card_count}枚の画像は、それぞれ1つのスキルカードのクロップです（画像の順番 = card_index、0始まり）。
+各画像について下記「1枚分の抽出指示」に従って抽出し、各JSONオブジェクトに card_index（integer）を追加して、
+画像の順番どおりに{card_count}要素のJSON配列として出力してください。
+
+=== 1枚分の抽出指示 ===
+{single_card_prompt}
+
+=== 最終的な出力形式 ===
+1枚分の出力形式の指示にかかわらず、{card_count}要素のJSON配列のみを出力してください:
+```json
+[{{"card_index": 0, "skill_name": "スキル名", ...}}, {{"card_index": 1, ...}}]
+```"""
+    return f"""\
+The following {card_count} images are each a crop of a single skill card (image order = card_index, starting at 0).
+Extract each image according to the "Per-card instructions" below, add card_index (integer) to each JSON object,
+and output a JSON array of {card_count} elements in image order.
+
+=== Per-card instructions ===
+{single_card_prompt}
+
+=== Final output format ===
+Regardless of the per-card output format, output only a JSON array of {card_count} elements:
+```json
+[{{"card_index": 0, "skill_name": "Skill Name", ...}}, {{"card_index": 1, ...}}]
+```"""
+
+
+def split_card_batch_response(data, card_count: int) -> list[dict]:
+    """バッチOCRのJSON配列をカード順の辞書リストに分割
+
+    card_index が揃っていればそれに従い、なければ配列の順番で対応付ける。
+
+    Raises:
+        ValueError: 要素数や card_index がカード枚数と対応しない場合
+    """
+    if not isinstance(data, list) or len(data) != card_count or not all(isinstance(d, dict) for d in data):
+        raise ValueError(f"バッチOCRの応答が{card_count}要素の配列ではありません")
+
+    indices = [d.get("card_index") for d in data]
+    if all(isinstance(i, int) for i in indices):
+        if sorted(indices) != list(range(card_count)):
+            raise ValueError(f"バッチOCRの card_index が不正です: {indices}")
+        data = sorted(data, key=lambda d: d["card_index"])
+    return [{k: v for k, v in d.items() if k != "card_index"} for d in data]
+
+
 def augment_prompt_with_ocr_hint(prompt: str, ocr_hint: str | None) -> str:
     """OCRヒントテキストをプロンプトに追加"""
     if not ocr_hint:
@@ -283,6 +344,189 @@ def create_backend(name: str, **kwargs) -> OCRBackend:
     raise ValueError(f"Unknown OCR backend: {name}")
 
 
+# === 並列実行 ===
+
+
+class RateLimitGate:
+    """全ワーカーで共有するレート制限バックオフ
+
+    1つのワーカーが429/5xxを受けたら、全ワーカーが同じ時刻まで新規リクエストを控える。
+    各ワーカーが個別に time.sleep すると、待機明けに一斉に再送して再び制限に当たるため。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        """バックオフ中なら解除時刻まで待機"""
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def backoff(self, seconds: float) -> None:
+        """全ワーカーの新規リクエストを seconds 秒停止"""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+class _DeferredCall:
+    """並列数1のときに使う、最初の result() 呼び出し時に実行する遅延呼び出し
+
+    結果（例外を含む）は保持し、2回目以降の result() では再実行しない。
+    """
+
+    def __init__(self, func, args, kwargs):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._done = False
+        self._value = None
+        self._error: BaseException | None = None
+
+    def result(self):
+        if not self._done:
+            try:
+                self._value = self._func(*self._args, **self._kwargs)
+            except Exception as e:
+                self._error = e
+            self._done = True
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class BatchSlice:
+    """バッチ呼び出し結果（リスト）の index 番目を返す Future 互換オブジェクト"""
+
+    def __init__(self, batch, index: int):
+        self._batch = batch
+        self._index = index
+
+    def result(self):
+        return self._batch.result()[self._index]
+
+
+class _ThreadOutput:
+    """sys.stdout の代理。出力先バッファが設定されたスレッドの print をそこに溜める
+
+    バッファのないスレッド（メインスレッド等）の出力はそのまま元の stdout に流す。
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, buffer: io.StringIO | None) -> None:
+        """このスレッドの出力先バッファを設定（None で解除）"""
+        self._local.buffer = buffer
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            return self._stream.write(text)
+        return buffer.write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, "buffer", None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_install_lock = threading.Lock()
+_install_count = 0  # sys.stdout の差し替えを使用中の OCRDispatcher 数
+
+
+def _acquire_thread_output() -> _ThreadOutput:
+    """sys.stdout を _ThreadOutput に差し替えて返す（差し替え済みならそれを返す）"""
+    global _install_count
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        _install_count += 1
+        return sys.stdout
+
+
+def _release_thread_output(output: _ThreadOutput) -> None:
+    """使用中の OCRDispatcher がなくなったら sys.stdout を元に戻す"""
+    global _install_count
+    with _install_lock:
+        _install_count -= 1
+        if _install_count == 0 and sys.stdout is output:
+            sys.stdout = output._stream
+
+
+class _BufferedCall:
+    """ワーカースレッドで実行した呼び出しの Future と、その間の出力を保持する
+
+    最初の result() で溜めた出力を表示してから結果を返す（例外も同様）。
+    """
+
+    def __init__(self, future, buffer: io.StringIO):
+        self._future = future
+        self._buffer = buffer
+        self._replayed = False
+
+    def result(self):
+        try:
+            return self._future.result()
+        finally:
+            if not self._replayed:
+                self._replayed = True
+                sys.stdout.write(self._buffer.getvalue())
+
+
+class OCRDispatcher:
+    """OCR API呼び出しを最大 concurrency 並列で先行実行する
+
+    submit() は Future 互換のオブジェクトを返す。呼び出し側は投入順に result() を
+    取り出すことで、出力順（フレーム順・カード順）を逐次実行時と同じに保つ。
+    ワーカースレッド内の print（JSON表示・リトライ通知等）は呼び出しごとに溜め、
+    result() で取り出した時点で表示するため、ログの順序も逐次実行と同じになる
+    （バックオフ待ちの通知は、その呼び出しの結果を取り出すまで表示されない）。
+    concurrency <= 1 の場合はスレッドを使わず、result() の時点で逐次実行する。
+    sys.stdout の差し替えは生成から shutdown() までの間だけ有効なため、
+    with 文で使うか、例外時も含めて shutdown() を呼ぶこと。
+    """
+
+    def __init__(self, concurrency: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+        self._output = _acquire_thread_output() if self._executor is not None else None
+
+    def submit(self, func, *args, **kwargs):
+        if self._executor is None:
+            return _DeferredCall(func, args, kwargs)
+        buffer = io.StringIO()
+        return _BufferedCall(self._executor.submit(self._run, buffer, func, args, kwargs), buffer)
+
+    def _run(self, buffer: io.StringIO, func, args, kwargs):
+        self._output.capture(buffer)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._output.capture(None)
+
+    def shutdown(self) -> None:
+        """実行中の呼び出しの完了を待ち、未着手の呼び出しは取り消す"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._output is not None:
+            _release_thread_output(self._output)
+            self._output = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
 # === 共有ユーティリティ ===
 
 _FULLWIDTH_DIGIT_TABLE = str.maketrans('０１２３４５６７８９', '0123456789')
@@ -418,23 +662,105 @@ def weapon_type_to_code(weapon_type: str | None) -> str | None:
     return mapping.get(weapon_type)
 
 
-def load_images(paths: list[str]) -> list[dict]:
-    """画像ファイルをbase64エンコードしたメッセージコンテンツに変換"""
+# === 送信画像のエンコード ===
+
+IMAGE_MEDIA_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# バックエンドごとの既定の画素数上限。Claudeは長辺1568px / 約1.15MPを超える画像を
+# API側で縮小するため、送信前に同じ程度まで縮小しても認識精度は変わらない
+BACKEND_MAX_PIXELS: dict[str, int | None] = {
+    "claude": 1_150_000,
+    "gemini": None,
+}
+
+
+@dataclass(frozen=True)
+class ImageEncoding:
+    """OCRバックエンドへ送る画像のエンコード設定
+
+    format="png" かつ画素数上限以内の画像は、ファイルのバイト列をそのまま送る
+    （再エンコードしないため、従来とOCRキャッシュのキーも変わらない）。
+    """
+
+    format: str = "png"
+    quality: int = 90  # JPEG/WebP の品質（1〜100）
+    max_pixels: int | None = None  # 超える画像はアスペクト比を保って縮小（Noneで無制限）
+
+    def __post_init__(self):
+        if self.format not in IMAGE_MEDIA_TYPES:
+            raise ValueError(f"未対応の画像形式: {self.format}")
+
+
+def resolve_image_encoding(
+    backend: str,
+    format: str = "png",
+    quality: int = 90,
+    max_pixels: int | None = None,
+) -> ImageEncoding:
+    """CLI指定からエンコード設定を作る（max_pixels=None はバックエンド既定、0 は無制限）"""
+    if max_pixels is None:
+        max_pixels = BACKEND_MAX_PIXELS.get(backend)
+    return ImageEncoding(format=format, quality=quality, max_pixels=max_pixels or None)
+
+
+def encode_image(path: str, encoding: ImageEncoding | None = None) -> tuple[bytes, str]:
+    """画像ファイルを送信用にエンコード
+
+    Returns:
+        (画像バイト列, MIMEタイプ)
+    """
+    encoding = encoding or ImageEncoding()
+    data = Path(path).read_bytes()
+    with Image.open(io.BytesIO(data)) as img:
+        w, h = img.size
+        over_budget = encoding.max_pixels is not None and w * h > encoding.max_pixels
+        if encoding.format == "png" and img.format == "PNG" and not over_budget:
+            return data, IMAGE_MEDIA_TYPES["png"]
+
+        img.load()
+        out = img
+        if over_budget:
+            scale = (encoding.max_pixels / (w * h)) ** 0.5
+            out = img.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
+
+    if encoding.format == "jpeg" and out.mode not in ("RGB", "L"):
+        out = out.convert("RGB")
+    buf = io.BytesIO()
+    if encoding.format == "png":
+        out.save(buf, format="PNG")
+    else:
+        out.save(buf, format=encoding.format.upper(), quality=encoding.quality)
+    return buf.getvalue(), IMAGE_MEDIA_TYPES[encoding.format]
+
+
+def load_images(paths: list[str], encoding: ImageEncoding | None = None) -> list[dict]:
+    """画像ファイルをエンコードし、base64のメッセージコンテンツに変換"""
     contents = []
     for path in paths:
-        data = Path(path).read_bytes()
+        data, media_type = encode_image(path, encoding)
         b64 = base64.standard_b64encode(data).decode("utf-8")
         contents.append({
             "type": "image",
             "source": {
                 "type": "base64",
-                "media_type": "image/png",
+                "media_type": media_type,
                 "data": b64,
             },
         })
     return contents
 
 
+def format_bytes_sent(sizes: list[int]) -> str:
+    """APIリクエストごとの画像送信バイト数を集計した表示文字列"""
+    if not sizes:
+        return "画像送信量: 0 KB（APIリクエストなし）"
+    total = sum(sizes)
+    return (
+        f"画像送信量: {total / 1024:.0f} KB（{len(sizes)}リクエスト、"
+        f"平均 {total / len(sizes) / 1024:.1f} KB / 最大 {max(sizes) / 1024:.1f} KB）"
+    )
+
+
 # === 後方互換関数（デフォルトClaude） ===
 
 
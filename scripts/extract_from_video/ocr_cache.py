@@ -0,0 +1,93 @@
+"""OCRバックエンドのレスポンスキャッシュ（SQLite）
+
+同じ --id での再実行やプロンプト調整（tuning/verify_ocr_prompts.py）のたびに
+同一画像・同一プロンプトをAPIへ送り直さないよう、レスポンステキストを保存する。
+キーは (バックエンド, モデル, システムプロンプト, ユーザープロンプト, 画像バイト列) のハッシュ。
+
+JSONとしてパースできたレスポンスのみ保存するため、壊れた応答がキャッシュに残って
+リトライを妨げることはない。
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(".work") / "ocr_cache.sqlite3"
+
+
+class OCRCache:
+    """画像内容とプロンプトをキーにしたOCRレスポンスの永続キャッシュ"""
+
+    def __init__(self, path: str | Path = DEFAULT_CACHE_PATH, enabled: bool = True):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._stored: set[str] = set()
+
+    @staticmethod
+    def make_key(
+        backend: str,
+        model: str,
+        system_prompt: str | None,
+        prompt: str,
+        images: list[bytes | str],
+    ) -> str:
+        """キャッシュキー（SHA-256の16進文字列）を生成"""
+        h = hashlib.sha256()
+        for part in (backend, model, system_prompt or "", prompt):
+            data = part.encode("utf-8")
+            h.update(len(data).to_bytes(8, "big"))
+            h.update(data)
+        for image in images:
+            data = image.encode("ascii") if isinstance(image, str) else image
+            h.update(len(data).to_bytes(8, "big"))
+            h.update(data)
+        return h.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """キャッシュ済みレスポンステキストを返す（なければNone）"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT response FROM ocr_responses WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._stored.add(key)
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """レスポンステキストを保存"""
+        if not self.enabled or key in self._stored:
+            return
+        with self._lock:
+            self._stored.add(key)
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_responses (key, response) VALUES (?, ?)",
+                (key, response),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL)"
+            )
+        return self._conn
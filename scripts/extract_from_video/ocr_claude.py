@@ -1,11 +1,15 @@
 """Claude Vision APIによるOCRバックエンド"""
 
+import threading
 import time
 
 import anthropic
 
 from models import ExtractedSkill, FrameGroup, SkillCard
+from ocr_cache import OCRCache
 from ocr import (
+    BatchSlice, ImageEncoding, OCRDispatcher, RateLimitGate, resolve_image_encoding,
+    build_card_batch_prompt, split_card_batch_response,
     extract_json, print_json, parse_jp_response, parse_en_response,
     load_images, build_match_prompt, augment_prompt_with_ocr_hint, augment_prompt_with_weapon_hint,
     JP_USER_PROMPT_NEW_ONLY, EN_USER_PROMPT_NEW_ONLY,
@@ -77,67 +81,107 @@ If the screen does not contain this card structure (e.g., hero introduction or c
 indicate that no skills are present.
 Extract only the skill names from the screenshots."""
 
+
+def _image_data(images: list[dict]) -> list[str]:
+    """load_images() の結果からキャッシュキー用の画像データ（base64）を取り出す"""
+    return [img["source"]["data"] for img in images]
+
+
+def _request_image_bytes(messages: list[dict]) -> int:
+    """リクエストに含まれる画像のバイト数（base64デコード後）"""
+    total = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            continue
+        for item in content:
+            if item.get("type") == "image":
+                data = item["source"]["data"]
+                total += len(data) * 3 // 4 - data[-2:].count("=")
+    return total
+
+
 class ClaudeOCRBackend:
     """Claude Vision APIを使用するOCRバックエンド"""
 
-    def __init__(self, model: str = MODEL):
+    def __init__(
+        self,
+        model: str = MODEL,
+        cache: OCRCache | None = None,
+        concurrency: int = 1,
+        card_batch: bool = False,
+        image_encoding: ImageEncoding | None = None,
+    ):
         self.model = model
         self.client = anthropic.Anthropic()
+        self.cache = cache if cache is not None else OCRCache()
+        self.concurrency = concurrency
+        self.card_batch = card_batch
+        self.image_encoding = image_encoding or resolve_image_encoding("claude")
+        self.rate_limit = RateLimitGate()
+        # JP/EN のOCRを並行実行しても、APIリクエストの同時実行数は concurrency まで
+        self._request_slots = threading.BoundedSemaphore(max(1, concurrency))
+        self.api_call_count = 0
+        self.failed_groups = 0  # OCRに失敗したグループ数（JP/EN合計）
+        self.image_bytes_sent: list[int] = []  # APIリクエストごとの画像バイト数
+        self._count_lock = threading.Lock()
 
     def ocr_jp_skills(self, frame_groups: list[FrameGroup], new_only: bool = True) -> list[ExtractedSkill]:
         """日本語版スキル画面をOCRし、ExtractedSkillリストを返す"""
         from pathlib import Path
 
         results = []
-        for i, group in enumerate(frame_groups):
-            print(f"  JP OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
-
-            try:
-                if group.skill_cards:
-                    # カードクロップあり: 個別カードをOCR
-                    print(f"    カードクロップ: {len(group.skill_cards)}枚")
-                    for card in group.skill_cards:
-                        card_images = load_images([card.image_path])
-                        skill_data = self._call_vision_api_jp_single_card(card_images, ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint)
-                        skill = parse_jp_response(skill_data, group.frame_index)
-                        if not skill.jp_name:
-                            print(f"    → カード{card.card_index}: 非スキル（スキップ）")
-                            continue
-                        is_new = skill_data.get("is_new", True)
-                        if new_only and not is_new:
-                            print(f"    → カード{card.card_index}: {skill.jp_name}（既存スキル、スキップ）")
+        with OCRDispatcher(self.concurrency) as dispatcher:
+            pending = [self._submit_jp(dispatcher, group, new_only) for group in frame_groups]
+
+            for i, (group, calls) in enumerate(zip(frame_groups, pending)):
+                print(f"  JP OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
+
+                try:
+                    if group.skill_cards:
+                        # カードクロップあり: 個別カードをOCR
+                        print(f"    カードクロップ: {len(group.skill_cards)}枚")
+                        for card, call in zip(group.skill_cards, calls):
+                            skill_data = call.result()
+                            skill = parse_jp_response(skill_data, group.frame_index)
+                            if not skill.jp_name:
+                                print(f"    → カード{card.card_index}: 非スキル（スキップ）")
+                                continue
+                            is_new = skill_data.get("is_new", True)
+                            if new_only and not is_new:
+                                print(f"    → カード{card.card_index}: {skill.jp_name}（既存スキル、スキップ）")
+                                continue
+                            results.append(skill)
+                            print(f"    → カード{card.card_index}: {skill.jp_name}")
+                    elif new_only:
+                        # カードクロップなし（単体画面等）: 従来の全画面OCR
+                        skills_data = calls[0].result()
+                        if not skills_data:
+                            print("    → 新スキルなし（スキップ）")
                             continue
-                        results.append(skill)
-                        print(f"    → カード{card.card_index}: {skill.jp_name}")
-                elif new_only:
-                    # カードクロップなし（単体画面等）: 従来の全画面OCR
-                    images = load_images(group.all_frames)
-                    skills_data = self._call_vision_api_jp_new_only(images, ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint)
-                    if not skills_data:
-                        print("    → 新スキルなし（スキップ）")
-                        continue
-                    for skill_data in skills_data:
+                        for skill_data in skills_data:
+                            skill = parse_jp_response(skill_data, group.frame_index)
+                            if not skill.jp_name:
+                                print("    → 非スキル画面（スキップ）")
+                                continue
+                            results.append(skill)
+                            print(f"    → {skill.jp_name}")
+                    else:
+                        skill_data = calls[0].result()
                         skill = parse_jp_response(skill_data, group.frame_index)
                         if not skill.jp_name:
                             print("    → 非スキル画面（スキップ）")
                             continue
                         results.append(skill)
-                        print(f"    → {skill.jp_name}")
-                else:
-                    images = load_images(group.all_frames)
-                    skill_data = self._call_vision_api_jp(images, ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint)
-                    skill = parse_jp_response(skill_data, group.frame_index)
-                    if not skill.jp_name:
-                        print("    → 非スキル画面（スキップ）")
-                        continue
-                    results.append(skill)
-            except Exception as e:
-                print(f"    エラー: {e}")
-                results.append(ExtractedSkill(
-                    jp_name=f"__OCR_ERROR_{i}__",
-                    description_lines=[f"OCRエラー: {e}"],
-                    frame_index=group.frame_index,
-                ))
+                except Exception as e:
+                    print(f"    エラー: {e}")
+                    with self._count_lock:
+                        self.failed_groups += 1
+                    results.append(ExtractedSkill(
+                        jp_name=f"__OCR_ERROR_{i}__",
+                        description_lines=[f"OCRエラー: {e}"],
+                        frame_index=group.frame_index,
+                    ))
 
         return results
 
@@ -146,54 +190,119 @@ class ClaudeOCRBackend:
         from pathlib import Path
 
         results = []
-        for i, group in enumerate(frame_groups):
-            print(f"  EN OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
-
-            try:
-                if group.skill_cards:
-                    # カードクロップあり: 個別カードをOCR
-                    print(f"    カードクロップ: {len(group.skill_cards)}枚")
-                    for card in group.skill_cards:
-                        card_images = load_images([card.image_path])
-                        skill_data = self._call_vision_api_en_single_card(card_images)
-                        skill = parse_en_response(skill_data, group.frame_index)
-                        if not skill.en_name:
-                            print(f"    → カード{card.card_index}: 非スキル（スキップ）")
-                            continue
-                        is_new = skill_data.get("is_new", True)
-                        if new_only and not is_new:
-                            print(f"    → カード{card.card_index}: {skill.en_name}（既存スキル、スキップ）")
-                            continue
-                        results.append(skill)
-                        print(f"    → カード{card.card_index}: {skill.en_name}")
-                elif new_only:
-                    images = load_images(group.all_frames)
-                    skills_data = self._call_vision_api_en_new_only(images)
-                    for skill_data in skills_data:
-                        skill = parse_en_response(skill_data, group.frame_index)
-                        if skill.en_name:
+        with OCRDispatcher(self.concurrency) as dispatcher:
+            pending = [self._submit_en(dispatcher, group, new_only) for group in frame_groups]
+
+            for i, (group, calls) in enumerate(zip(frame_groups, pending)):
+                print(f"  EN OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
+
+                try:
+                    if group.skill_cards:
+                        # カードクロップあり: 個別カードをOCR
+                        print(f"    カードクロップ: {len(group.skill_cards)}枚")
+                        for card, call in zip(group.skill_cards, calls):
+                            skill_data = call.result()
+                            skill = parse_en_response(skill_data, group.frame_index)
+                            if not skill.en_name:
+                                print(f"    → カード{card.card_index}: 非スキル（スキップ）")
+                                continue
+                            is_new = skill_data.get("is_new", True)
+                            if new_only and not is_new:
+                                print(f"    → カード{card.card_index}: {skill.en_name}（既存スキル、スキップ）")
+                                continue
                             results.append(skill)
-                            print(f"    → {skill.en_name}")
-                    if not skills_data:
-                        print("    → 新スキルなし（スキップ）")
-            except Exception as e:
-                print(f"    エラー: {e}")
+                            print(f"    → カード{card.card_index}: {skill.en_name}")
+                    elif new_only:
+                        skills_data = calls[0].result()
+                        for skill_data in skills_data:
+                            skill = parse_en_response(skill_data, group.frame_index)
+                            if skill.en_name:
+                                results.append(skill)
+                                print(f"    → {skill.en_name}")
+                        if not skills_data:
+                            print("    → 新スキルなし（スキップ）")
+                except Exception as e:
+                    print(f"    エラー: {e}")
+                    with self._count_lock:
+                        self.failed_groups += 1
 
         return results
 
+    def _submit_jp(self, dispatcher: OCRDispatcher, group: FrameGroup, new_only: bool) -> list:
+        """1グループ分のJP OCR呼び出しを投入（カードクロップありならカードごと）"""
+        hints = {"ocr_hint": group.ocr_hint, "weapon_hint": group.weapon_hint}
+        if group.skill_cards and self.card_batch and len(group.skill_cards) > 1:
+            card_paths = [card.image_path for card in group.skill_cards]
+            batch = dispatcher.submit(self._ocr_jp_card_batch, card_paths, **hints)
+            return [BatchSlice(batch, i) for i in range(len(card_paths))]
+        if group.skill_cards:
+            return [
+                dispatcher.submit(self._ocr_jp_single_card, card.image_path, **hints)
+                for card in group.skill_cards
+            ]
+        if new_only:
+            return [dispatcher.submit(self._ocr_jp_frames, self._call_vision_api_jp_new_only, group.all_frames, **hints)]
+        return [dispatcher.submit(self._ocr_jp_frames, self._call_vision_api_jp, group.all_frames, **hints)]
+
+    def _submit_en(self, dispatcher: OCRDispatcher, group: FrameGroup, new_only: bool) -> list:
+        """1グループ分のEN OCR呼び出しを投入（カードクロップありならカードごと）"""
+        if group.skill_cards and self.card_batch and len(group.skill_cards) > 1:
+            card_paths = [card.image_path for card in group.skill_cards]
+            batch = dispatcher.submit(self._ocr_en_card_batch, card_paths)
+            return [BatchSlice(batch, i) for i in range(len(card_paths))]
+        if group.skill_cards:
+            return [
+                dispatcher.submit(self._ocr_en_single_card, card.image_path)
+                for card in group.skill_cards
+            ]
+        if new_only:
+            return [dispatcher.submit(self._ocr_en_new_only, group.all_frames)]
+        return []
+
+    def _ocr_jp_single_card(self, image_path: str, ocr_hint: str | None, weapon_hint: str | None) -> dict:
+        return self._call_vision_api_jp_single_card(load_images([image_path], self.image_encoding), ocr_hint=ocr_hint, weapon_hint=weapon_hint)
+
+    def _ocr_jp_frames(self, call, frame_paths: list[str], ocr_hint: str | None, weapon_hint: str | None):
+        return call(load_images(frame_paths, self.image_encoding), ocr_hint=ocr_hint, weapon_hint=weapon_hint)
+
+    def _ocr_en_single_card(self, image_path: str) -> dict:
+        return self._call_vision_api_en_single_card(load_images([image_path], self.image_encoding))
+
+    def _ocr_jp_card_batch(self, image_paths: list[str], ocr_hint: str | None, weapon_hint: str | None) -> list[dict]:
+        """同一グループのJPカードを1リクエストでOCR（応答が不正ならカード単位にフォールバック）"""
+        try:
+            return self._call_vision_api_jp_card_batch(load_images(image_paths, self.image_encoding), ocr_hint=ocr_hint, weapon_hint=weapon_hint)
+        except Exception as e:
+            print(f"    バッチOCR失敗、カード単位で再実行: {e}")
+            return [self._ocr_jp_single_card(path, ocr_hint, weapon_hint) for path in image_paths]
+
+    def _ocr_en_card_batch(self, image_paths: list[str]) -> list[dict]:
+        """同一グループのENカードを1リクエストでOCR（応答が不正ならカード単位にフォールバック）"""
+        try:
+            return self._call_vision_api_en_card_batch(load_images(image_paths, self.image_encoding))
+        except Exception as e:
+            print(f"    バッチOCR失敗、カード単位で再実行: {e}")
+            return [self._ocr_en_single_card(path) for path in image_paths]
+
+    def _ocr_en_new_only(self, frame_paths: list[str]) -> list[dict]:
+        return self._call_vision_api_en_new_only(load_images(frame_paths, self.image_encoding))
+
     def match_jp_en_skills(self, jp_skills: list[ExtractedSkill], en_skills: list[ExtractedSkill]) -> dict[str, str | None]:
         """JP/ENスキルリストをテキストLLMでマッチング"""
         prompt = build_match_prompt(jp_skills, en_skills)
 
+        key = self.cache.make_key("claude", self.model, None, prompt, [])
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=1024,
                     messages=[{"role": "user", "content": prompt}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, dict):
                     return data
@@ -201,7 +310,7 @@ class ClaudeOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -213,28 +322,44 @@ class ClaudeOCRBackend:
 
         return {}
 
+    def _create_text(self, key: str, **kwargs) -> str:
+        """キャッシュがあればそれを、なければClaude APIを呼び出してレスポンステキストを返す"""
+        text = self.cache.get(key)
+        if text is None:
+            with self._request_slots:
+                self.rate_limit.wait()
+                with self._count_lock:
+                    self.api_call_count += 1
+                    self.image_bytes_sent.append(_request_image_bytes(kwargs["messages"]))
+                response = self.client.messages.create(**kwargs)
+            text = response.content[0].text
+        return text
+
     def _call_vision_api_jp_single_card(self, images: list[dict], ocr_hint: str | None = None, weapon_hint: str | None = None) -> dict:
         """JPカードクロップ画像をClaude Vision APIに送信し、単一スキルJSONを返す"""
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_SINGLE_CARD, ocr_hint)
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         content = images + [{"type": "text", "text": prompt}]
 
+        key = self.cache.make_key("claude", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=2048,
                     system=JP_SYSTEM_PROMPT,
                     messages=[{"role": "user", "content": content}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -249,22 +374,25 @@ class ClaudeOCRBackend:
         """ENカードクロップ画像をClaude Vision APIに送信し、単一スキルJSONを返す"""
         content = images + [{"type": "text", "text": EN_USER_PROMPT_SINGLE_CARD}]
 
+        key = self.cache.make_key("claude", self.model, EN_SYSTEM_PROMPT, EN_USER_PROMPT_SINGLE_CARD, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=2048,
                     system=EN_SYSTEM_PROMPT,
                     messages=[{"role": "user", "content": content}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -275,22 +403,64 @@ class ClaudeOCRBackend:
 
         raise RuntimeError("EN OCR (single_card): 最大リトライ回数超過")
 
+    def _call_vision_api_jp_card_batch(self, images: list[dict], ocr_hint: str | None = None, weapon_hint: str | None = None) -> list[dict]:
+        """複数のJPカードクロップ画像を1回のClaude Vision API呼び出しで送信し、カード順のJSONリストを返す"""
+        prompt = build_card_batch_prompt(JP_USER_PROMPT_SINGLE_CARD, len(images), "ja")
+        prompt = augment_prompt_with_ocr_hint(prompt, ocr_hint)
+        prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
+        return self._call_card_batch(images, JP_SYSTEM_PROMPT, prompt)
+
+    def _call_vision_api_en_card_batch(self, images: list[dict]) -> list[dict]:
+        """複数のENカードクロップ画像を1回のClaude Vision API呼び出しで送信し、カード順のJSONリストを返す"""
+        prompt = build_card_batch_prompt(EN_USER_PROMPT_SINGLE_CARD, len(images), "en")
+        return self._call_card_batch(images, EN_SYSTEM_PROMPT, prompt)
+
+    def _call_card_batch(self, images: list[dict], system_prompt: str, prompt: str) -> list[dict]:
+        """カードバッチ共通処理（パース失敗・要素数不一致は例外を送出し、リトライしない）"""
+        content = images + [{"type": "text", "text": prompt}]
+
+        key = self.cache.make_key("claude", self.model, system_prompt, prompt, _image_data(images))
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                text = self._create_text(
+                    key,
+                    model=self.model,
+                    max_tokens=2048 * len(images),
+                    system=system_prompt,
+                    messages=[{"role": "user", "content": content}],
+                )
+            except _RETRYABLE_ERRORS:
+                wait = 2 ** attempt
+                print(f"    サーバーエラー/レート制限、{wait}秒待機...")
+                self.rate_limit.backoff(wait)
+                continue
+            cards = split_card_batch_response(extract_json(text), len(images))
+            self.cache.put(key, text)
+            print_json(cards)
+            return cards
+
+        raise RuntimeError("OCR (card_batch): 最大リトライ回数超過")
+
     def _call_vision_api_jp_new_only(self, images: list[dict], ocr_hint: str | None = None, weapon_hint: str | None = None) -> list[dict]:
         """JP画像をClaude Vision APIに送信し、新スキルのみJSON配列で返す"""
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_NEW_ONLY, ocr_hint)
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         content = images + [{"type": "text", "text": prompt}]
 
+        key = self.cache.make_key("claude", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=4096,
                     system=JP_SYSTEM_PROMPT,
                     messages=[{"role": "user", "content": content}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, list):
                     return data
@@ -298,7 +468,7 @@ class ClaudeOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -315,22 +485,25 @@ class ClaudeOCRBackend:
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         content = images + [{"type": "text", "text": prompt}]
 
+        key = self.cache.make_key("claude", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=2048,
                     system=JP_SYSTEM_PROMPT,
                     messages=[{"role": "user", "content": content}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -345,16 +518,19 @@ class ClaudeOCRBackend:
         """EN画像をClaude Vision APIに送信し、新スキルのみJSON配列で返す"""
         content = images + [{"type": "text", "text": EN_USER_PROMPT_NEW_ONLY}]
 
+        key = self.cache.make_key("claude", self.model, EN_SYSTEM_PROMPT, EN_USER_PROMPT_NEW_ONLY, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.client.messages.create(
+                text = self._create_text(
+                    key,
                     model=self.model,
                     max_tokens=4096,
                     system=EN_SYSTEM_PROMPT,
                     messages=[{"role": "user", "content": content}],
                 )
-                text = response.content[0].text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, list):
                     return data
@@ -362,7 +538,7 @@ class ClaudeOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -1,5 +1,6 @@
 """Gemini Vision APIによるOCRバックエンド"""
 
+import threading
 import time
 from pathlib import Path
 
@@ -7,7 +8,10 @@ from google import genai
 from google.genai import types
 
 from models import ExtractedSkill, FrameGroup, SkillCard
+from ocr_cache import OCRCache
 from ocr import (
+    BatchSlice, ImageEncoding, OCRDispatcher, RateLimitGate, encode_image, resolve_image_encoding,
+    build_card_batch_prompt, split_card_batch_response,
     extract_json, print_json, parse_jp_response, parse_en_response,
     build_match_prompt, augment_prompt_with_ocr_hint, augment_prompt_with_weapon_hint,
     JP_USER_PROMPT_NEW_ONLY, EN_USER_PROMPT_NEW_ONLY,
@@ -28,132 +32,203 @@ _RETRYABLE_ERRORS = (
 )
 
 
-def _load_image_parts(paths: list[str]) -> list[types.Part]:
-    """画像ファイルをGemini用のPartオブジェクトに変換"""
-    parts = []
-    for path in paths:
-        data = Path(path).read_bytes()
-        parts.append(types.Part.from_bytes(data=data, mime_type="image/png"))
-    return parts
+def _encode_images(paths: list[str], encoding: ImageEncoding) -> list[tuple[bytes, str]]:
+    """画像ファイルを送信用にエンコードし、(バイト列, MIMEタイプ) のリストを返す"""
+    return [encode_image(path, encoding) for path in paths]
+
+
+def _image_data(images: list[tuple[bytes, str]]) -> list[bytes]:
+    """_encode_images() の結果からキャッシュキー用の画像バイト列を取り出す"""
+    return [data for data, _ in images]
+
+
+def _load_image_parts(images: list[tuple[bytes, str]]) -> list[types.Part]:
+    """エンコード済み画像をGemini用のPartオブジェクトに変換"""
+    return [types.Part.from_bytes(data=data, mime_type=mime_type) for data, mime_type in images]
+
+
+def _request_image_bytes(contents) -> int:
+    """リクエストに含まれる画像のバイト数"""
+    if not isinstance(contents, list):
+        return 0
+    return sum(
+        len(part.inline_data.data)
+        for part in contents
+        if isinstance(part, types.Part) and part.inline_data is not None
+    )
 
 
 class GeminiOCRBackend:
     """Gemini Vision APIを使用するOCRバックエンド"""
 
-    def __init__(self, model: str = MODEL):
+    def __init__(
+        self,
+        model: str = MODEL,
+        cache: OCRCache | None = None,
+        concurrency: int = 1,
+        card_batch: bool = False,
+        image_encoding: ImageEncoding | None = None,
+    ):
         self.model = model
         self.client = genai.Client()
+        self.cache = cache if cache is not None else OCRCache()
+        self.concurrency = concurrency
+        self.card_batch = card_batch
+        self.image_encoding = image_encoding or resolve_image_encoding("gemini")
+        self.rate_limit = RateLimitGate()
+        # JP/EN のOCRを並行実行しても、APIリクエストの同時実行数は concurrency まで
+        self._request_slots = threading.BoundedSemaphore(max(1, concurrency))
         self.api_call_count = 0
+        self.failed_groups = 0  # OCRに失敗したグループ数（JP/EN合計）
+        self.image_bytes_sent: list[int] = []  # APIリクエストごとの画像バイト数
+        self._count_lock = threading.Lock()
 
     def ocr_jp_skills(self, frame_groups: list[FrameGroup], new_only: bool = True) -> list[ExtractedSkill]:
         """日本語版スキル画面をOCRし、ExtractedSkillリストを返す"""
         results = []
-        for i, group in enumerate(frame_groups):
-            print(f"  JP OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
-
-            try:
-                if group.skill_cards:
-                    # カードクロップあり: 個別カードをOCR
-                    print(f"    カードクロップ: {len(group.skill_cards)}枚")
-                    for card in group.skill_cards:
-                        skill_data = self._call_vision_api_jp_single_card(
-                            [card.image_path], ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint,
-                        )
-                        skill = parse_jp_response(skill_data, group.frame_index)
-                        if not skill.jp_name:
-                            print(f"    → カード{card.card_index}: 非スキル（スキップ）")
-                            continue
-                        is_new = skill_data.get("is_new", True)
-                        if new_only and not is_new:
-                            print(f"    → カード{card.card_index}: {skill.jp_name}（既存スキル、スキップ）")
+        with OCRDispatcher(self.concurrency) as dispatcher:
+            pending = [self._submit_jp(dispatcher, group, new_only) for group in frame_groups]
+
+            for i, (group, calls) in enumerate(zip(frame_groups, pending)):
+                print(f"  JP OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
+
+                try:
+                    if group.skill_cards:
+                        # カードクロップあり: 個別カードをOCR
+                        print(f"    カードクロップ: {len(group.skill_cards)}枚")
+                        for card, call in zip(group.skill_cards, calls):
+                            skill_data = call.result()
+                            skill = parse_jp_response(skill_data, group.frame_index)
+                            if not skill.jp_name:
+                                print(f"    → カード{card.card_index}: 非スキル（スキップ）")
+                                continue
+                            is_new = skill_data.get("is_new", True)
+                            if new_only and not is_new:
+                                print(f"    → カード{card.card_index}: {skill.jp_name}（既存スキル、スキップ）")
+                                continue
+                            results.append(skill)
+                            print(f"    → カード{card.card_index}: {skill.jp_name}")
+                    elif new_only:
+                        skills_data = calls[0].result()
+                        if not skills_data:
+                            print("    → 新スキルなし（スキップ）")
                             continue
-                        results.append(skill)
-                        print(f"    → カード{card.card_index}: {skill.jp_name}")
-                elif new_only:
-                    skills_data = self._call_vision_api_jp_new_only(
-                        group.all_frames, ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint,
-                    )
-                    if not skills_data:
-                        print("    → 新スキルなし（スキップ）")
-                        continue
-                    for skill_data in skills_data:
+                        for skill_data in skills_data:
+                            skill = parse_jp_response(skill_data, group.frame_index)
+                            if not skill.jp_name:
+                                print("    → 非スキル画面（スキップ）")
+                                continue
+                            results.append(skill)
+                            print(f"    → {skill.jp_name}")
+                    else:
+                        skill_data = calls[0].result()
                         skill = parse_jp_response(skill_data, group.frame_index)
                         if not skill.jp_name:
                             print("    → 非スキル画面（スキップ）")
                             continue
                         results.append(skill)
-                        print(f"    → {skill.jp_name}")
-                else:
-                    skill_data = self._call_vision_api_jp(
-                        group.all_frames, ocr_hint=group.ocr_hint, weapon_hint=group.weapon_hint,
-                    )
-                    skill = parse_jp_response(skill_data, group.frame_index)
-                    if not skill.jp_name:
-                        print("    → 非スキル画面（スキップ）")
-                        continue
-                    results.append(skill)
-            except Exception as e:
-                print(f"    エラー: {e}")
-                results.append(ExtractedSkill(
-                    jp_name=f"__OCR_ERROR_{i}__",
-                    description_lines=[f"OCRエラー: {e}"],
-                    frame_index=group.frame_index,
-                ))
+                except Exception as e:
+                    print(f"    エラー: {e}")
+                    with self._count_lock:
+                        self.failed_groups += 1
+                    results.append(ExtractedSkill(
+                        jp_name=f"__OCR_ERROR_{i}__",
+                        description_lines=[f"OCRエラー: {e}"],
+                        frame_index=group.frame_index,
+                    ))
 
         return results
 
     def ocr_en_skills(self, frame_groups: list[FrameGroup], new_only: bool = True) -> list[ExtractedSkill]:
         """英語版スキル画面をOCRし、ExtractedSkillリストを返す"""
         results = []
-        for i, group in enumerate(frame_groups):
-            print(f"  EN OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
-
-            try:
-                if group.skill_cards:
-                    # カードクロップあり: 個別カードをOCR
-                    print(f"    カードクロップ: {len(group.skill_cards)}枚")
-                    for card in group.skill_cards:
-                        skill_data = self._call_vision_api_en_single_card([card.image_path])
-                        skill = parse_en_response(skill_data, group.frame_index)
-                        if not skill.en_name:
-                            print(f"    → カード{card.card_index}: 非スキル（スキップ）")
-                            continue
-                        is_new = skill_data.get("is_new", True)
-                        if new_only and not is_new:
-                            print(f"    → カード{card.card_index}: {skill.en_name}（既存スキル、スキップ）")
-                            continue
-                        results.append(skill)
-                        print(f"    → カード{card.card_index}: {skill.en_name}")
-                elif new_only:
-                    skills_data = self._call_vision_api_en_new_only(group.all_frames)
-                    for skill_data in skills_data:
-                        skill = parse_en_response(skill_data, group.frame_index)
-                        if skill.en_name:
+        with OCRDispatcher(self.concurrency) as dispatcher:
+            pending = [self._submit_en(dispatcher, group, new_only) for group in frame_groups]
+
+            for i, (group, calls) in enumerate(zip(frame_groups, pending)):
+                print(f"  EN OCR [{i + 1}/{len(frame_groups)}]: {Path(group.representative).name}")
+
+                try:
+                    if group.skill_cards:
+                        # カードクロップあり: 個別カードをOCR
+                        print(f"    カードクロップ: {len(group.skill_cards)}枚")
+                        for card, call in zip(group.skill_cards, calls):
+                            skill_data = call.result()
+                            skill = parse_en_response(skill_data, group.frame_index)
+                            if not skill.en_name:
+                                print(f"    → カード{card.card_index}: 非スキル（スキップ）")
+                                continue
+                            is_new = skill_data.get("is_new", True)
+                            if new_only and not is_new:
+                                print(f"    → カード{card.card_index}: {skill.en_name}（既存スキル、スキップ）")
+                                continue
                             results.append(skill)
-                            print(f"    → {skill.en_name}")
-                    if not skills_data:
-                        print("    → 新スキルなし（スキップ）")
-            except Exception as e:
-                print(f"    エラー: {e}")
+                            print(f"    → カード{card.card_index}: {skill.en_name}")
+                    elif new_only:
+                        skills_data = calls[0].result()
+                        for skill_data in skills_data:
+                            skill = parse_en_response(skill_data, group.frame_index)
+                            if skill.en_name:
+                                results.append(skill)
+                                print(f"    → {skill.en_name}")
+                        if not skills_data:
+                            print("    → 新スキルなし（スキップ）")
+                except Exception as e:
+                    print(f"    エラー: {e}")
+                    with self._count_lock:
+                        self.failed_groups += 1
 
         return results
 
+    def _submit_jp(self, dispatcher: OCRDispatcher, group: FrameGroup, new_only: bool) -> list:
+        """1グループ分のJP OCR呼び出しを投入（カードクロップありならカードごと）"""
+        hints = {"ocr_hint": group.ocr_hint, "weapon_hint": group.weapon_hint}
+        if group.skill_cards and self.card_batch and len(group.skill_cards) > 1:
+            card_paths = [card.image_path for card in group.skill_cards]
+            batch = dispatcher.submit(self._ocr_jp_card_batch, card_paths, **hints)
+            return [BatchSlice(batch, i) for i in range(len(card_paths))]
+        if group.skill_cards:
+            return [
+                dispatcher.submit(self._call_vision_api_jp_single_card, [card.image_path], **hints)
+                for card in group.skill_cards
+            ]
+        if new_only:
+            return [dispatcher.submit(self._call_vision_api_jp_new_only, group.all_frames, **hints)]
+        return [dispatcher.submit(self._call_vision_api_jp, group.all_frames, **hints)]
+
+    def _submit_en(self, dispatcher: OCRDispatcher, group: FrameGroup, new_only: bool) -> list:
+        """1グループ分のEN OCR呼び出しを投入（カードクロップありならカードごと）"""
+        if group.skill_cards and self.card_batch and len(group.skill_cards) > 1:
+            card_paths = [card.image_path for card in group.skill_cards]
+            batch = dispatcher.submit(self._ocr_en_card_batch, card_paths)
+            return [BatchSlice(batch, i) for i in range(len(card_paths))]
+        if group.skill_cards:
+            return [
+                dispatcher.submit(self._call_vision_api_en_single_card, [card.image_path])
+                for card in group.skill_cards
+            ]
+        if new_only:
+            return [dispatcher.submit(self._call_vision_api_en_new_only, group.all_frames)]
+        return []
+
     def match_jp_en_skills(self, jp_skills: list[ExtractedSkill], en_skills: list[ExtractedSkill]) -> dict[str, str | None]:
         """JP/ENスキルリストをテキストLLMでマッチング"""
         prompt = build_match_prompt(jp_skills, en_skills)
 
+        key = self.cache.make_key("gemini", self.model, None, prompt, [])
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=[prompt],
                     config=types.GenerateContentConfig(
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, dict):
                     return data
@@ -161,7 +236,7 @@ class GeminiOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -173,17 +248,52 @@ class GeminiOCRBackend:
 
         return {}
 
+    def _ocr_jp_card_batch(self, frame_paths: list[str], ocr_hint: str | None, weapon_hint: str | None) -> list[dict]:
+        """同一グループのJPカードを1リクエストでOCR（応答が不正ならカード単位にフォールバック）"""
+        try:
+            return self._call_vision_api_jp_card_batch(frame_paths, ocr_hint=ocr_hint, weapon_hint=weapon_hint)
+        except Exception as e:
+            print(f"    バッチOCR失敗、カード単位で再実行: {e}")
+            return [
+                self._call_vision_api_jp_single_card([path], ocr_hint=ocr_hint, weapon_hint=weapon_hint)
+                for path in frame_paths
+            ]
+
+    def _ocr_en_card_batch(self, frame_paths: list[str]) -> list[dict]:
+        """同一グループのENカードを1リクエストでOCR（応答が不正ならカード単位にフォールバック）"""
+        try:
+            return self._call_vision_api_en_card_batch(frame_paths)
+        except Exception as e:
+            print(f"    バッチOCR失敗、カード単位で再実行: {e}")
+            return [self._call_vision_api_en_single_card([path]) for path in frame_paths]
+
+    def _generate_text(self, key: str, **kwargs) -> str:
+        """キャッシュがあればそれを、なければGemini APIを呼び出してレスポンステキストを返す"""
+        text = self.cache.get(key)
+        if text is None:
+            with self._request_slots:
+                self.rate_limit.wait()
+                with self._count_lock:
+                    self.api_call_count += 1
+                    self.image_bytes_sent.append(_request_image_bytes(kwargs["contents"]))
+                response = self.client.models.generate_content(**kwargs)
+            text = response.text
+        return text
+
     def _call_vision_api_jp_single_card(self, frame_paths: list[str], ocr_hint: str | None = None, weapon_hint: str | None = None) -> dict:
         """JPカードクロップ画像をGemini Vision APIに送信し、単一スキルJSONを返す"""
-        image_parts = _load_image_parts(frame_paths)
+        images = _encode_images(frame_paths, self.image_encoding)
+        image_parts = _load_image_parts(images)
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_SINGLE_CARD, ocr_hint)
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         contents = image_parts + [prompt]
 
+        key = self.cache.make_key("gemini", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=contents,
                     config=types.GenerateContentConfig(
@@ -191,14 +301,14 @@ class GeminiOCRBackend:
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -211,13 +321,16 @@ class GeminiOCRBackend:
 
     def _call_vision_api_en_single_card(self, frame_paths: list[str]) -> dict:
         """ENカードクロップ画像をGemini Vision APIに送信し、単一スキルJSONを返す"""
-        image_parts = _load_image_parts(frame_paths)
+        images = _encode_images(frame_paths, self.image_encoding)
+        image_parts = _load_image_parts(images)
         contents = image_parts + [EN_USER_PROMPT_SINGLE_CARD]
 
+        key = self.cache.make_key("gemini", self.model, EN_SYSTEM_PROMPT, EN_USER_PROMPT_SINGLE_CARD, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=contents,
                     config=types.GenerateContentConfig(
@@ -225,14 +338,14 @@ class GeminiOCRBackend:
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -243,17 +356,62 @@ class GeminiOCRBackend:
 
         raise RuntimeError("EN OCR (single_card): 最大リトライ回数超過")
 
+    def _call_vision_api_jp_card_batch(self, frame_paths: list[str], ocr_hint: str | None = None, weapon_hint: str | None = None) -> list[dict]:
+        """複数のJPカードクロップ画像を1回のGemini Vision API呼び出しで送信し、カード順のJSONリストを返す"""
+        prompt = build_card_batch_prompt(JP_USER_PROMPT_SINGLE_CARD, len(frame_paths), "ja")
+        prompt = augment_prompt_with_ocr_hint(prompt, ocr_hint)
+        prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
+        return self._call_card_batch(frame_paths, JP_SYSTEM_PROMPT, prompt)
+
+    def _call_vision_api_en_card_batch(self, frame_paths: list[str]) -> list[dict]:
+        """複数のENカードクロップ画像を1回のGemini Vision API呼び出しで送信し、カード順のJSONリストを返す"""
+        prompt = build_card_batch_prompt(EN_USER_PROMPT_SINGLE_CARD, len(frame_paths), "en")
+        return self._call_card_batch(frame_paths, EN_SYSTEM_PROMPT, prompt)
+
+    def _call_card_batch(self, frame_paths: list[str], system_prompt: str, prompt: str) -> list[dict]:
+        """カードバッチ共通処理（パース失敗・要素数不一致は例外を送出し、リトライしない）"""
+        images = _encode_images(frame_paths, self.image_encoding)
+        contents = _load_image_parts(images) + [prompt]
+
+        key = self.cache.make_key("gemini", self.model, system_prompt, prompt, _image_data(images))
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                text = self._generate_text(
+                    key,
+                    model=self.model,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        system_instruction=system_prompt,
+                        temperature=0,
+                    ),
+                )
+            except _RETRYABLE_ERRORS:
+                wait = 2 ** attempt
+                print(f"    サーバーエラー/レート制限、{wait}秒待機...")
+                self.rate_limit.backoff(wait)
+                continue
+            cards = split_card_batch_response(extract_json(text), len(frame_paths))
+            self.cache.put(key, text)
+            print_json(cards)
+            return cards
+
+        raise RuntimeError("OCR (card_batch): 最大リトライ回数超過")
+
     def _call_vision_api_jp_new_only(self, frame_paths: list[str], ocr_hint: str | None = None, weapon_hint: str | None = None) -> list[dict]:
         """JP画像をGemini Vision APIに送信し、新スキルのみJSON配列で返す"""
-        image_parts = _load_image_parts(frame_paths)
+        images = _encode_images(frame_paths, self.image_encoding)
+        image_parts = _load_image_parts(images)
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_NEW_ONLY, ocr_hint)
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         contents = image_parts + [prompt]
 
+        key = self.cache.make_key("gemini", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=contents,
                     config=types.GenerateContentConfig(
@@ -261,8 +419,8 @@ class GeminiOCRBackend:
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, list):
                     return data
@@ -270,7 +428,7 @@ class GeminiOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -283,15 +441,18 @@ class GeminiOCRBackend:
 
     def _call_vision_api_jp(self, frame_paths: list[str], ocr_hint: str | None = None, weapon_hint: str | None = None) -> dict:
         """JP画像をGemini Vision APIに送信し、JSONレスポンスを返す"""
-        image_parts = _load_image_parts(frame_paths)
+        images = _encode_images(frame_paths, self.image_encoding)
+        image_parts = _load_image_parts(images)
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT, ocr_hint)
         prompt = augment_prompt_with_weapon_hint(prompt, weapon_hint)
         contents = image_parts + [prompt]
 
+        key = self.cache.make_key("gemini", self.model, JP_SYSTEM_PROMPT, prompt, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=contents,
                     config=types.GenerateContentConfig(
@@ -299,14 +460,14 @@ class GeminiOCRBackend:
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 return data
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
@@ -319,13 +480,16 @@ class GeminiOCRBackend:
 
     def _call_vision_api_en_new_only(self, frame_paths: list[str]) -> list[dict]:
         """EN画像をGemini Vision APIに送信し、新スキルのみJSON配列で返す"""
-        image_parts = _load_image_parts(frame_paths)
+        images = _encode_images(frame_paths, self.image_encoding)
+        image_parts = _load_image_parts(images)
         contents = image_parts + [EN_USER_PROMPT_NEW_ONLY]
 
+        key = self.cache.make_key("gemini", self.model, EN_SYSTEM_PROMPT, EN_USER_PROMPT_NEW_ONLY, _image_data(images))
+
         for attempt in range(MAX_RETRIES):
             try:
-                self.api_call_count += 1
-                response = self.client.models.generate_content(
+                text = self._generate_text(
+                    key,
                     model=self.model,
                     contents=contents,
                     config=types.GenerateContentConfig(
@@ -333,8 +497,8 @@ class GeminiOCRBackend:
                         temperature=0,
                     ),
                 )
-                text = response.text
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, list):
                     return data
@@ -342,7 +506,7 @@ class GeminiOCRBackend:
             except _RETRYABLE_ERRORS:
                 wait = 2 ** attempt
                 print(f"    サーバーエラー/レート制限、{wait}秒待機...")
-                time.sleep(wait)
+                self.rate_limit.backoff(wait)
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait = 2 ** attempt
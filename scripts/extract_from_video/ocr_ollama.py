@@ -1,6 +1,7 @@
 """Ollama VLMによるOCRバックエンド"""
 
 import json
+import threading
 import time
 from pathlib import Path
 
@@ -8,6 +9,7 @@ import ollama
 from pydantic import BaseModel, ValidationError
 
 from models import ExtractedSkill, FrameGroup
+from ocr_cache import OCRCache
 from ocr import parse_jp_response, parse_en_response, extract_json, print_json, build_match_prompt, augment_prompt_with_ocr_hint, EN_USER_PROMPT_NEW_ONLY, JP_LINEBREAK_RULES
 
 # Claude版と同じプロンプトを流用（EN系のみ）
@@ -70,11 +72,20 @@ descriptionの改行ルール:
 {"skill_name": "フィンブルの花", "skill_type": "武器", "weapon_type": "青魔法", "might": 14, "range": 2, "special_count": null, "description": ["ターン開始時、自身のHPが25%以上の時、自分と周囲2マスの味方の攻撃、速さ+6（1ターン）"], "hero_name": "春風の配達人 エイリーク"}"""
 
 
+def _read_images(paths: list[str]) -> list[bytes]:
+    """キャッシュキー用に画像ファイルのバイト列を読み込む"""
+    return [Path(path).read_bytes() for path in paths]
+
+
 class OllamaOCRBackend:
     """Ollama VLMを使用するOCRバックエンド"""
 
-    def __init__(self, model: str = "qwen2.5vl"):
+    def __init__(self, model: str = "qwen2.5vl", cache: OCRCache | None = None):
         self.model = model
+        self.cache = cache if cache is not None else OCRCache()
+        self.api_call_count = 0
+        self.failed_groups = 0  # OCRに失敗したグループ数（JP/EN合計）
+        self._count_lock = threading.Lock()
 
     def ocr_jp_skills(self, frame_groups: list[FrameGroup], new_only: bool = True) -> list[ExtractedSkill]:
         """日本語版スキル画面をOCRし、ExtractedSkillリストを返す"""
@@ -105,6 +116,8 @@ class OllamaOCRBackend:
                     results.append(skill)
             except Exception as e:
                 print(f"    エラー: {e}")
+                with self._count_lock:
+                    self.failed_groups += 1
                 results.append(ExtractedSkill(
                     jp_name=f"__OCR_ERROR_{i}__",
                     description_lines=[f"OCRエラー: {e}"],
@@ -132,16 +145,20 @@ class OllamaOCRBackend:
                         print("    → 新スキルなし（スキップ）")
             except Exception as e:
                 print(f"    エラー: {e}")
+                with self._count_lock:
+                    self.failed_groups += 1
 
         return results
 
     def match_jp_en_skills(self, jp_skills: list[ExtractedSkill], en_skills: list[ExtractedSkill]) -> dict[str, str | None]:
         """JP/ENスキルリストをテキストLLMでマッチング"""
         prompt = build_match_prompt(jp_skills, en_skills)
+        key = self.cache.make_key("ollama", self.model, None, prompt, [])
 
         for attempt in range(MAX_RETRIES):
             try:
-                response = ollama.chat(
+                text = self._chat_text(
+                    key,
                     model=self.model,
                     messages=[{
                         "role": "user",
@@ -150,8 +167,8 @@ class OllamaOCRBackend:
                     format="json",
                     options={"temperature": 0},
                 )
-                text = response.message.content
                 data = extract_json(text)
+                self.cache.put(key, text)
                 print_json(data)
                 if isinstance(data, dict):
                     return data
@@ -167,12 +184,24 @@ class OllamaOCRBackend:
 
         return {}
 
+    def _chat_text(self, key: str, **kwargs) -> str:
+        """キャッシュがあればそれを、なければOllamaを呼び出してレスポンステキストを返す"""
+        text = self.cache.get(key)
+        if text is None:
+            with self._count_lock:
+                self.api_call_count += 1
+            response = ollama.chat(**kwargs)
+            text = response.message.content
+        return text
+
     def _call_jp_new_only(self, image_paths: list[str], ocr_hint: str | None = None) -> list[dict]:
         """JP画像をOllama VLMに送信し、新スキルのみJSON配列で返す"""
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_OLLAMA_NEW_ONLY, ocr_hint)
+        key = self.cache.make_key("ollama", self.model, None, prompt, _read_images(image_paths))
         for attempt in range(MAX_RETRIES):
             try:
-                response = ollama.chat(
+                text = self._chat_text(
+                    key,
                     model=self.model,
                     messages=[{
                         "role": "user",
@@ -182,9 +211,9 @@ class OllamaOCRBackend:
                     format=SkillListResponse.model_json_schema(),
                     options={"temperature": 0},
                 )
-                text = response.message.content
                 print_json(json.loads(text))
                 parsed = SkillListResponse.model_validate_json(text)
+                self.cache.put(key, text)
                 return [entry.model_dump() for entry in parsed.skills]
             except (ollama.ResponseError, ConnectionError, ValidationError) as e:
                 if attempt < MAX_RETRIES - 1:
@@ -199,9 +228,11 @@ class OllamaOCRBackend:
     def _call_jp(self, image_paths: list[str], ocr_hint: str | None = None) -> dict:
         """JP画像をOllama VLMに送信し、JSONレスポンスを返す"""
         prompt = augment_prompt_with_ocr_hint(JP_USER_PROMPT_OLLAMA, ocr_hint)
+        key = self.cache.make_key("ollama", self.model, None, prompt, _read_images(image_paths))
         for attempt in range(MAX_RETRIES):
             try:
-                response = ollama.chat(
+                text = self._chat_text(
+                    key,
                     model=self.model,
                     messages=[{
                         "role": "user",
@@ -211,9 +242,9 @@ class OllamaOCRBackend:
                     format=SkillEntry.model_json_schema(),
                     options={"temperature": 0},
                 )
-                text = response.message.content
                 print_json(json.loads(text))
                 parsed = SkillEntry.model_validate_json(text)
+                self.cache.put(key, text)
                 return parsed.model_dump()
             except (ollama.ResponseError, ConnectionError, ValidationError) as e:
                 if attempt < MAX_RETRIES - 1:
@@ -228,10 +259,12 @@ class OllamaOCRBackend:
     def _call_en_new_only(self, image_paths: list[str]) -> list[dict]:
         """EN画像をOllama VLMに送信し、新スキルのみJSON配列で返す"""
         prompt = f"{EN_SYSTEM_PROMPT}\n\n{EN_USER_PROMPT_NEW_ONLY}"
+        key = self.cache.make_key("ollama", self.model, None, prompt, _read_images(image_paths))
 
         for attempt in range(MAX_RETRIES):
             try:
-                response = ollama.chat(
+                text = self._chat_text(
+                    key,
                     model=self.model,
                     messages=[{
                         "role": "user",
@@ -241,9 +274,9 @@ class OllamaOCRBackend:
                     format="json",
                     options={"temperature": 0},
                 )
-                text = response.message.content
                 print_json(json.loads(text))
                 data = extract_json(text)
+                self.cache.put(key, text)
                 if isinstance(data, list):
                     return data
                 # {"skills": [...]} のようなラッパーを処理
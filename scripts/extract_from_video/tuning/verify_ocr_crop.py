@@ -3,6 +3,9 @@
 card_crop.py によるスキルカード個別クロップがOCR精度を改善しているか検証する。
 .work/10-03-06/ の既存フレーム画像を使い、「クロップあり」と「クロップなし」の
 2モードでOCRを実行し、正解ファイルとの一致率を比較する。
+
+--image-format / --image-quality / --image-max-pixels で送信画像のエンコードを変え、
+画像送信量（APIリクエストごとのバイト数）とOCR精度のトレードオフも確認できる。
 """
 
 import argparse
@@ -16,10 +19,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from card_crop import crop_frame_groups
-from formatter import TEXT_REPLACEMENTS, format_output
+from formatter import apply_text_replacements, format_output
 from frames import deduplicate_frames, detect_skill_frames
 from models import FrameGroup
-from ocr import create_backend
+from ocr import ImageEncoding, create_backend, format_bytes_sent, resolve_image_encoding
 
 
 # === 正解ファイルパーサ ===
@@ -68,8 +71,7 @@ def parse_ground_truth(path: Path) -> list[dict]:
 
 def normalize_text(text: str) -> str:
     """比較用にテキストを正規化"""
-    for search, replace in TEXT_REPLACEMENTS:
-        text = text.replace(search, replace)
+    text = apply_text_replacements(text)
     # 空白除去
     text = re.sub(r'\s+', '', text)
     return text
@@ -346,6 +348,7 @@ def run_ocr_mode(
     use_crop: bool,
     label: str,
     ocr_backend: str = "claude",
+    image_encoding: ImageEncoding | None = None,
 ) -> Path:
     """OCRを実行して結果ファイルを保存"""
     if use_crop:
@@ -353,9 +356,14 @@ def run_ocr_mode(
         crop_output.mkdir(parents=True, exist_ok=True)
         crop_frame_groups(frame_groups, str(crop_output))
 
-    backend = create_backend(ocr_backend)
+    backend_kwargs = {}
+    if image_encoding is not None:
+        backend_kwargs["image_encoding"] = image_encoding
+    backend = create_backend(ocr_backend, **backend_kwargs)
     jp_skills = backend.ocr_jp_skills(frame_groups, new_only=True)
     print(f"[{label}] OCR結果: {len(jp_skills)}スキル検出")
+    if hasattr(backend, "image_bytes_sent"):
+        print(f"[{label}] {format_bytes_sent(backend.image_bytes_sent)}")
 
     content = format_output(jp_skills, None, start_id=start_id)
 
@@ -386,8 +394,15 @@ def main():
     parser.add_argument("--nocrop-only", action="store_true", help="クロップなしのみ実行")
     parser.add_argument("--skip-ocr", action="store_true", help="OCRスキップ、保存済み結果で再比較")
     parser.add_argument("--ocr", default="claude", choices=["claude", "gemini", "ollama"], help="OCRバックエンド (default: claude)")
+    parser.add_argument("--image-format", default="png", choices=["png", "jpeg", "webp"], help="送信画像の形式 (default: png)")
+    parser.add_argument("--image-quality", type=int, default=90, help="jpeg/webp の品質 (default: 90)")
+    parser.add_argument("--image-max-pixels", type=int, default=None, help="送信画像の画素数上限、0で無制限 (default: バックエンド既定)")
     args = parser.parse_args()
 
+    image_encoding = None
+    if args.ocr != "ollama":
+        image_encoding = resolve_image_encoding(args.ocr, args.image_format, args.image_quality, args.image_max_pixels)
+
     # パス解決
     base_dir = Path(__file__).resolve().parent.parent
     data_dir = args.data_dir if args.data_dir.is_absolute() else base_dir / args.data_dir
@@ -432,12 +447,12 @@ def main():
         if run_crop:
             print("\n--- Run A: クロップあり ---")
             groups_crop = copy.deepcopy(base_groups)
-            run_ocr_mode(groups_crop, crop_dir, args.start_id, use_crop=True, label="crop", ocr_backend=args.ocr)
+            run_ocr_mode(groups_crop, crop_dir, args.start_id, use_crop=True, label="crop", ocr_backend=args.ocr, image_encoding=image_encoding)
 
         if run_nocrop:
             print("\n--- Run B: クロップなし ---")
             groups_nocrop = copy.deepcopy(base_groups)
-            run_ocr_mode(groups_nocrop, nocrop_dir, args.start_id, use_crop=False, label="nocrop", ocr_backend=args.ocr)
+            run_ocr_mode(groups_nocrop, nocrop_dir, args.start_id, use_crop=False, label="nocrop", ocr_backend=args.ocr, image_encoding=image_encoding)
     else:
         print("OCRスキップ: 保存済み結果を使用")
 
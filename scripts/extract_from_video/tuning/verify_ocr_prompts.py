@@ -15,7 +15,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from card_crop import crop_frame_groups
-from formatter import TEXT_REPLACEMENTS, format_output
+from formatter import apply_text_replacements, format_output
 from frames import deduplicate_frames, detect_skill_frames
 from models import FrameGroup
 import ocr as ocr_module
@@ -235,8 +235,7 @@ def parse_ground_truth(path: Path) -> list[dict]:
 
 def normalize_text(text: str) -> str:
     """比較用にテキストを正規化"""
-    for search, replace in TEXT_REPLACEMENTS:
-        text = text.replace(search, replace)
+    text = apply_text_replacements(text)
     text = re.sub(r'\s+', '', text)
     return text
 
@@ -586,6 +585,7 @@ def run_ocr_mode(
     # API呼び出し数
     if hasattr(backend, "api_call_count"):
         print(f"[{label}] API呼び出し: {backend.api_call_count}回")
+        print(f"[{label}] OCRキャッシュ: ヒット {backend.cache.hits} / ミス {backend.cache.misses}")
 
     content = format_output(jp_skills, None, start_id=start_id)
 
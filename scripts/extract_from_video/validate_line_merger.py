@@ -5,15 +5,18 @@ feh-skills.sqlite3 の description / refine_description / special_refine_descrip
 
 Usage:
     uv run python scripts/extract_from_video/validate_line_merger.py
+    uv run python scripts/extract_from_video/validate_line_merger.py --bench  # 行頭判定のベンチマーク
 """
 
+import argparse
 import re
 import sqlite3
 import sys
-from collections import defaultdict
+import time
+from collections import Counter, defaultdict
 from pathlib import Path
 
-from line_merger import _is_line_start
+from line_merger import LINE_START_PATTERNS, _is_line_start, match_line_start
 
 # DBでは独立行だが、OCRマージでは前行にくっつけたいパターン（漏れ報告から除外）
 KNOWN_MERGE_PATTERNS: list[re.Pattern[str]] = [
@@ -108,7 +111,59 @@ def print_misses(misses: dict[str, list[tuple[int, str, str]]]) -> None:
             print(f"        ID {skill_id}「{name}」→ \"{display_line}\"")
 
 
+def benchmark(descriptions: list[tuple[int, str, str]], repeat: int = 5) -> None:
+    """<br>区切りの全行で、パターンを1つずつ試す従来の判定と結合パターンの判定を比較する
+
+    判定結果が一致することを確認し、処理時間とルールごとの一致件数を表示する。
+    """
+    lines = [
+        line.strip()
+        for _, _, desc in descriptions
+        for line in desc.split("<br>")
+        if line.strip()
+    ]
+    compiled = [re.compile(p) for p in LINE_START_PATTERNS]
+
+    def legacy(line: str) -> bool:
+        return any(p.search(line) for p in compiled)
+
+    mismatches = [line for line in lines if legacy(line) != _is_line_start(line)]
+    if mismatches:
+        print(f"エラー: 判定結果の不一致 {len(mismatches)} 行 例: {mismatches[0]!r}", file=sys.stderr)
+        sys.exit(1)
+
+    def best_time(func) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for line in lines:
+                func(line)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    legacy_time = best_time(legacy)
+    matcher_time = best_time(_is_line_start)
+    print("=== 行頭判定ベンチマーク ===")
+    print(f"行数: {len(lines):,}（判定結果はすべて一致）")
+    print(f"パターンを順に試す（{len(compiled)}個）: {legacy_time * 1000:.1f} ms")
+    print(f"結合パターン: {matcher_time * 1000:.1f} ms ({legacy_time / matcher_time:.1f}x)")
+
+    fired = Counter(match_line_start(line) for line in lines)
+    unmatched = fired.pop(None, 0)
+    print(f"\nルールごとの一致件数（不一致 {unmatched:,} 行）:")
+    for pattern, count in fired.most_common():
+        print(f"  {count:>6,}  {pattern}")
+    unused = [p for p in LINE_START_PATTERNS if p not in fired]
+    if unused:
+        print(f"一致しなかったルール: {', '.join(unused)}")
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="LINE_START_PATTERNS をDBのスキル説明文と照合して検証する")
+    parser.add_argument("--bench", action="store_true",
+                        help="漏れ候補の代わりに行頭判定のベンチマークとルールごとの一致件数を表示する")
+    args = parser.parse_args()
+
     if not DB_PATH.exists():
         print(f"エラー: DB が見つかりません: {DB_PATH}", file=sys.stderr)
         sys.exit(1)
@@ -116,6 +171,10 @@ def main() -> None:
     descriptions = fetch_descriptions(DB_PATH)
     print(f"DB から {len(descriptions)} 件の説明文を取得\n")
 
+    if args.bench:
+        benchmark(descriptions)
+        return
+
     new_misses, old_misses, total_lines, matched, missed, known_merge = validate(
         descriptions,
     )
@@ -11,6 +11,9 @@
 """
 
 import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import cv2
@@ -71,15 +74,89 @@ def _load_templates(templates_dir: Path | None = None) -> dict[str, np.ndarray]:
     return templates
 
 
-# モジュールレベルでテンプレートをキャッシュ
-_templates_cache: dict[str, np.ndarray] | None = None
+def _match_score(search: np.ndarray, tmpl: np.ndarray) -> float | None:
+    """検索画像内でのテンプレートの最高スコア（テンプレートが検索画像より大きければNone）"""
+    th, tw = tmpl.shape[:2]
+    if search.shape[0] < th or search.shape[1] < tw:
+        return None
+    result = cv2.matchTemplate(search, tmpl, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, _ = cv2.minMaxLoc(result)
+    return max_val
+
+
+class WeaponIconMatcher:
+    """武器種アイコンのテンプレートマッチング（テンプレートは一度だけ読み込んで共有）
+
+    フレームごとに全テンプレートを照合し、最もスコアの高いものを返す。
+    cv2.matchTemplate はGILを解放するため、複数フレームはスレッドで並列に処理できる。
+    """
+
+    def __init__(self, templates: dict[str, np.ndarray]):
+        self.templates = templates
+
+    def match(
+        self,
+        img: np.ndarray,
+        search_region: tuple[float, float, float, float] = SEARCH_REGION,
+    ) -> tuple[str | None, float]:
+        """フレーム画像（BGR）で最もスコアの高いテンプレート名とスコアを返す"""
+        h, w = img.shape[:2]
+
+        # 標準サイズにリサイズ（テンプレートとのスケール合わせ）
+        if (w, h) != STANDARD_SIZE:
+            img = cv2.resize(img, STANDARD_SIZE)
+            h, w = STANDARD_SIZE[1], STANDARD_SIZE[0]
+
+        # 検索領域をクロップ
+        left, top, right, bottom = search_region
+        sy = int(h * top)
+        ey = int(h * bottom)
+        sx = int(w * left)
+        ex = int(w * right)
+        search = img[sy:ey, sx:ex]
+
+        best_score = 0.0
+        best_name: str | None = None
+        # 同点時は先に読み込んだテンプレートが残る
+        for tname, tmpl in self.templates.items():
+            max_val = _match_score(search, tmpl)
+            if max_val is None:
+                continue
+            if max_val > best_score:
+                best_score = max_val
+                best_name = tname
+        return best_name, best_score
+
+    def match_file(
+        self,
+        frame_path: str,
+        search_region: tuple[float, float, float, float] = SEARCH_REGION,
+    ) -> tuple[str | None, float] | None:
+        """フレーム画像ファイルを照合（読み込めなければNone）"""
+        img = cv2.imread(frame_path)
+        if img is None:
+            return None
+        return self.match(img, search_region)
+
+
+# テンプレートディレクトリごとに前処理済みのマッチャーをキャッシュ
+_matchers: dict[Path, WeaponIconMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_matcher(templates_dir: str | Path | None = None) -> WeaponIconMatcher:
+    """テンプレートディレクトリ（Noneでデフォルト）のマッチャーを返す"""
+    d = Path(templates_dir or TEMPLATES_DIR).resolve()
+    with _matchers_lock:
+        matcher = _matchers.get(d)
+        if matcher is None:
+            matcher = WeaponIconMatcher(_load_templates(d))
+            _matchers[d] = matcher
+        return matcher
 
 
 def _get_templates() -> dict[str, np.ndarray]:
-    global _templates_cache
-    if _templates_cache is None:
-        _templates_cache = _load_templates()
-    return _templates_cache
+    return get_matcher().templates
 
 
 def detect_weapon_type(
@@ -99,49 +176,15 @@ def detect_weapon_type(
     Returns:
         武器種名（"sword", "lance" 等）またはNone（非英雄紹介フレーム）
     """
-    if templates_dir:
-        templates = _load_templates(Path(templates_dir))
-    else:
-        templates = _get_templates()
-
-    if not templates:
+    matcher = get_matcher(templates_dir)
+    if not matcher.templates:
         print("警告: テンプレート画像が見つかりません")
         return None
 
-    img = cv2.imread(frame_path)
-    if img is None:
+    matched = matcher.match_file(frame_path, search_region)
+    if matched is None:
         return None
-
-    h, w = img.shape[:2]
-
-    # 標準サイズにリサイズ（テンプレートとのスケール合わせ）
-    if (w, h) != STANDARD_SIZE:
-        img = cv2.resize(img, STANDARD_SIZE)
-        h, w = STANDARD_SIZE[1], STANDARD_SIZE[0]
-
-    # 検索領域をクロップ
-    left, top, right, bottom = search_region
-    sy = int(h * top)
-    ey = int(h * bottom)
-    sx = int(w * left)
-    ex = int(w * right)
-    search = img[sy:ey, sx:ex]
-
-    best_score = 0.0
-    best_name: str | None = None
-
-    for tname, tmpl in templates.items():
-        th, tw = tmpl.shape[:2]
-        if search.shape[0] < th or search.shape[1] < tw:
-            continue
-
-        result = cv2.matchTemplate(search, tmpl, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, _ = cv2.minMaxLoc(result)
-
-        if max_val > best_score:
-            best_score = max_val
-            best_name = tname
-
+    best_name, best_score = matched
     if best_score >= threshold:
         return best_name
     return None
@@ -150,55 +193,33 @@ def detect_weapon_type(
 def detect_weapon_types_batch(
     frame_paths: list[str],
     threshold: float = DETECTION_THRESHOLD,
+    workers: int | None = None,
 ) -> list[tuple[str, str | None, float]]:
     """複数フレームに対して武器種検出を一括実行
 
+    フレームはスレッドプール（workers、NoneでCPU数）で並列に照合する。
+
     Returns:
-        [(frame_path, weapon_type, score), ...] のリスト
+        [(frame_path, weapon_type, score), ...] のリスト（入力順）
     """
-    templates = _get_templates()
-    if not templates:
+    matcher = get_matcher()
+    if not matcher.templates:
         print("警告: テンプレート画像が見つかりません")
         return [(p, None, 0.0) for p in frame_paths]
 
-    results = []
-    for path in frame_paths:
-        img = cv2.imread(path)
-        if img is None:
-            results.append((path, None, 0.0))
-            continue
-
-        h, w = img.shape[:2]
-        if (w, h) != STANDARD_SIZE:
-            img = cv2.resize(img, STANDARD_SIZE)
-            h, w = STANDARD_SIZE[1], STANDARD_SIZE[0]
-
-        left, top, right, bottom = SEARCH_REGION
-        sy = int(h * top)
-        ey = int(h * bottom)
-        sx = int(w * left)
-        ex = int(w * right)
-        search = img[sy:ey, sx:ex]
-
-        best_score = 0.0
-        best_name: str | None = None
-
-        for tname, tmpl in templates.items():
-            th, tw = tmpl.shape[:2]
-            if search.shape[0] < th or search.shape[1] < tw:
-                continue
-
-            result = cv2.matchTemplate(search, tmpl, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(result)
-
-            if max_val > best_score:
-                best_score = max_val
-                best_name = tname
-
+    def detect(path: str) -> tuple[str, str | None, float]:
+        matched = matcher.match_file(path)
+        if matched is None:
+            return path, None, 0.0
+        best_name, best_score = matched
         detected = best_name if best_score >= threshold else None
-        results.append((path, detected, best_score))
+        return path, detected, best_score
 
-    return results
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(frame_paths) <= 1:
+        return [detect(path) for path in frame_paths]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(detect, frame_paths))
 
 
 def get_weapon_code(weapon_type: str) -> str | None:
@@ -279,24 +300,23 @@ def crop_icon_region(img: Image.Image, cv_line_y: int) -> Image.Image:
     return img.crop((left, top, right, bottom))
 
 
-def classify_weapon_type_with_llm(
-    frame_path: str,
-    model: str = "gemini-2.5-flash",
-) -> str | None:
-    """英雄紹介フレームからLLMで武器種を推定（ヒント用途）
+# LLM分類のプロンプト（参照アイコンの後、クロップ画像の前に置く）
+_REFERENCE_HEADER = "Fire Emblem Heroes weapon type icon reference:\n"
+_CLASSIFY_INSTRUCTION = (
+    "\n\nThe image below is an ENLARGED crop from a Fire Emblem Heroes "
+    "hero introduction screen. It contains two small square icons: "
+    "the TOP icon is the weapon type, the BOTTOM icon is the movement type. "
+    "Identify the TOP icon's weapon type from the reference list above.\n\n"
+    "IMPORTANT: Reply with ONLY the exact weapon type name "
+    "(e.g. 'lance', 'red_tome', 'colorless_bow'). No explanation.\n"
+)
 
-    CV線を検出 → アイコン領域をクロップ → 拡大 → LLMに送信
+# 参照アイコン部分のコンテキストキャッシュの有効期間（秒）
+CONTEXT_CACHE_TTL = 600
 
-    Args:
-        frame_path: 英雄紹介フレーム画像のパス
-        model: Geminiモデル名
-
-    Returns:
-        武器種名（"lance", "red_tome" 等）またはNone
-    """
-    from google import genai
-    from google.genai import types
 
+def _crop_icon_png(frame_path: str) -> bytes | None:
+    """CV線を検出 → アイコン領域をクロップ → 拡大したPNG（CV線がなければNone）"""
     img = Image.open(frame_path)
     cv_y = find_cv_line_y(img)
     if cv_y is None:
@@ -312,58 +332,184 @@ def classify_weapon_type_with_llm(
     # 画像をバイトに変換
     buf = io.BytesIO()
     upscaled.save(buf, format="PNG")
-    crop_part = types.Part.from_bytes(data=buf.getvalue(), mime_type="image/png")
-
-    # Wiki参照アイコンをパーツとして構築
-    parts: list = [
-        "Fire Emblem Heroes weapon type icon reference:\n",
-    ]
-    for wt in ALL_WEAPON_TYPES:
-        icon_path = WIKI_ICONS_DIR / f"{wt}.png"
-        if icon_path.exists():
-            data = icon_path.read_bytes()
-            parts.append(f"\n{wt}:")
-            parts.append(types.Part.from_bytes(data=data, mime_type="image/png"))
-
-    parts.append(
-        "\n\nThe image below is an ENLARGED crop from a Fire Emblem Heroes "
-        "hero introduction screen. It contains two small square icons: "
-        "the TOP icon is the weapon type, the BOTTOM icon is the movement type. "
-        "Identify the TOP icon's weapon type from the reference list above.\n\n"
-        "IMPORTANT: Reply with ONLY the exact weapon type name "
-        "(e.g. 'lance', 'red_tome', 'colorless_bow'). No explanation.\n"
-    )
-    parts.append(crop_part)
-
-    client = genai.Client()
-    try:
-        response = client.models.generate_content(
-            model=model,
-            contents=parts,
-            config=types.GenerateContentConfig(temperature=0),
-        )
-        text = (response.text or "").strip().split("\n")[0].strip().strip("*").strip()
-        if text in ALL_WEAPON_TYPES:
-            return text
-        return None
-    except Exception as e:
-        print(f"  武器種LLM分類エラー: {e}")
-        return None
+    return buf.getvalue()
+
+
+def _parse_weapon_type(text: str | None) -> str | None:
+    text = (text or "").strip().split("\n")[0].strip().strip("*").strip()
+    if text in ALL_WEAPON_TYPES:
+        return text
+    return None
+
+
+class WeaponTypeClassifier:
+    """CV線アンカー + LLMによる武器種分類（ヒント用途）
+
+    Wiki参照アイコン（originals/*.png）のPartとGeminiクライアントは生成時に1度だけ
+    用意し、全フレームで使い回す。context_cache=True なら参照アイコン部分（全リクエストで
+    共通の先頭部分）をGeminiのコンテキストキャッシュに登録し、各リクエストでは指示文と
+    クロップ画像だけを送る。キャッシュを作成できない場合（最小トークン数に満たない、
+    モデルが未対応等）は参照アイコンを毎回送る従来の方式で続ける。
+    """
+
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash",
+        concurrency: int = 1,
+        context_cache: bool = False,
+    ):
+        from google import genai
+        from google.genai import types
+
+        self._types = types
+        self.model = model
+        self.concurrency = concurrency
+        self.client = genai.Client()
+        self.api_call_count = 0
+        self._count_lock = threading.Lock()
+
+        # Wiki参照アイコンをパーツとして構築
+        self.reference_parts: list = [_REFERENCE_HEADER]
+        for wt in ALL_WEAPON_TYPES:
+            icon_path = WIKI_ICONS_DIR / f"{wt}.png"
+            if icon_path.exists():
+                self.reference_parts.append(f"\n{wt}:")
+                self.reference_parts.append(
+                    types.Part.from_bytes(data=icon_path.read_bytes(), mime_type="image/png")
+                )
+
+        self._cache_name: str | None = None
+        self._cache_lock = threading.Lock()
+        self._use_context_cache = context_cache
+
+    def _context_cache_name(self) -> str | None:
+        """参照アイコン部分のコンテキストキャッシュ名（初回のみ作成、使えなければNone）"""
+        with self._cache_lock:
+            if self._cache_name is None and self._use_context_cache:
+                types = self._types
+                parts = [
+                    types.Part.from_text(text=part) if isinstance(part, str) else part
+                    for part in self.reference_parts
+                ]
+                try:
+                    cache = self.client.caches.create(
+                        model=self.model,
+                        config=types.CreateCachedContentConfig(
+                            contents=[types.Content(role="user", parts=parts)],
+                            display_name="feh-weapon-icon-reference",
+                            ttl=f"{CONTEXT_CACHE_TTL}s",
+                        ),
+                    )
+                    self._cache_name = cache.name
+                except Exception as e:
+                    print(f"  参照アイコンのコンテキストキャッシュを使用できません（毎回送信します）: {e}")
+                    self._use_context_cache = False
+            return self._cache_name
+
+    def classify(self, frame_path: str) -> str | None:
+        """英雄紹介フレームから武器種を推定
+
+        Returns:
+            武器種名（"lance", "red_tome" 等）またはNone
+        """
+        types = self._types
+        crop = _crop_icon_png(frame_path)
+        if crop is None:
+            return None
+        crop_part = types.Part.from_bytes(data=crop, mime_type="image/png")
+
+        cache_name = self._context_cache_name()
+        if cache_name is not None:
+            contents = [_CLASSIFY_INSTRUCTION, crop_part]
+            config = types.GenerateContentConfig(temperature=0, cached_content=cache_name)
+        else:
+            contents = [*self.reference_parts, _CLASSIFY_INSTRUCTION, crop_part]
+            config = types.GenerateContentConfig(temperature=0)
+
+        try:
+            with self._count_lock:
+                self.api_call_count += 1
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config,
+            )
+            return _parse_weapon_type(response.text)
+        except Exception as e:
+            print(f"  武器種LLM分類エラー: {e}")
+            return None
+
+    def classify_batch(self, frame_paths: list[str]) -> list[tuple[str, str | None]]:
+        """複数フレームを最大 concurrency 並列で分類（結果・エラー表示は入力順）"""
+        from ocr import OCRDispatcher
+
+        with OCRDispatcher(self.concurrency) as dispatcher:
+            pending = [dispatcher.submit(self.classify, path) for path in frame_paths]
+            return [(path, call.result()) for path, call in zip(frame_paths, pending)]
+
+    def close(self) -> None:
+        """コンテキストキャッシュを削除する（TTLで自動削除されるまで待たない）"""
+        with self._cache_lock:
+            if self._cache_name is None:
+                return
+            try:
+                self.client.caches.delete(name=self._cache_name)
+            except Exception as e:
+                print(f"  コンテキストキャッシュの削除に失敗: {e}")
+            self._cache_name = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# モデルごとに共有する分類器（単発の classify_weapon_type_with_llm 用、コンテキストキャッシュなし）
+_classifiers: dict[str, WeaponTypeClassifier] = {}
+_classifiers_lock = threading.Lock()
+
+
+def classify_weapon_type_with_llm(
+    frame_path: str,
+    model: str = "gemini-2.5-flash",
+) -> str | None:
+    """英雄紹介フレームからLLMで武器種を推定（ヒント用途）
+
+    CV線を検出 → アイコン領域をクロップ → 拡大 → LLMに送信
+
+    Args:
+        frame_path: 英雄紹介フレーム画像のパス
+        model: Geminiモデル名
+
+    Returns:
+        武器種名（"lance", "red_tome" 等）またはNone
+    """
+    with _classifiers_lock:
+        classifier = _classifiers.get(model)
+        if classifier is None:
+            classifier = WeaponTypeClassifier(model)
+            _classifiers[model] = classifier
+    return classifier.classify(frame_path)
 
 
 def classify_weapon_hints_batch(
     frame_paths: list[str],
     model: str = "gemini-2.5-flash",
+    concurrency: int = 1,
 ) -> list[tuple[str, str | None]]:
     """複数フレームに対してLLMで武器種ヒントを一括取得
 
+    参照アイコン・クライアントを共有した分類器で最大 concurrency 並列に分類する。
+    2フレーム以上なら参照アイコン部分をコンテキストキャッシュに載せ、終了時に削除する。
+
     Returns:
         [(frame_path, weapon_type_or_none), ...] のリスト
     """
-    results = []
-    for path in frame_paths:
-        weapon = classify_weapon_type_with_llm(path, model=model)
-        results.append((path, weapon))
+    with WeaponTypeClassifier(model, concurrency, context_cache=len(frame_paths) > 1) as classifier:
+        results = classifier.classify_batch(frame_paths)
+    for path, weapon in results:
         if weapon:
             code = get_weapon_code(weapon)
             print(f"  {Path(path).name}: {weapon} (code={code}) [LLMヒント]")
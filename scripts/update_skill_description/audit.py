@@ -0,0 +1,52 @@
+import argparse
+import sqlite3
+import time
+from collections import Counter
+
+from replace import COMPILED_REPLACEMENTS, ContentValidator
+from util import cyan_text, warn
+
+DESCRIPTION_COLUMNS = ['description', 'refine_description', 'refine_description2', 'special_refine_description']
+
+
+def print_findings(findings):
+    for finding in findings:
+        print(warn(f"{finding.source}: {finding.rule} match: {finding.matched!r}"))
+    counts = Counter(finding.rule for finding in findings)
+    for rule, count in counts.most_common():
+        print(f"  {count:5d}  {rule}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit skill descriptions with the check_content rules.')
+    parser.add_argument('--db', default='./../../feh-skills.sqlite3', help='Skill database')
+    parser.add_argument('--column', action='append',
+                        help=f'Column to audit (repeatable, default: {", ".join(DESCRIPTION_COLUMNS)})')
+    parser.add_argument('--dir', help='Audit *.txt files in this directory instead of the database')
+    parser.add_argument('--replace', action='store_true', help='Apply REPLACEMENTS to files before auditing (--dir)')
+    args = parser.parse_args()
+
+    validator = ContentValidator()
+    start = time.perf_counter()
+    if args.dir:
+        findings = validator.scan_directory(args.dir, COMPILED_REPLACEMENTS if args.replace else None)
+        targets = args.dir
+    else:
+        # 読み取り専用で開く（監査でDBファイルを変更しない）
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        try:
+            columns = args.column or DESCRIPTION_COLUMNS
+            findings = []
+            for column in columns:
+                findings.extend(validator.scan_column(conn, column))
+        finally:
+            conn.close()
+        targets = ', '.join(columns)
+    elapsed = time.perf_counter() - start
+
+    print_findings(findings)
+    print(cyan_text(f"{targets}: 警告 {len(findings)}件 ({elapsed * 1000:.0f} ms)"))
+
+
+if __name__ == '__main__':
+    main()
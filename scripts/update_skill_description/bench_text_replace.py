@@ -0,0 +1,102 @@
+"""fehdb.text_replace の置換エンジンのベンチマーク
+
+skills テーブルの説明文（description / refine_description / special_refine_description）
+全件に replace.REPLACEMENTS と replace.SKILL_NAME_REPLACEMENTS を適用し、従来の逐次
+str.replace とコンパイル済みの置換（ReplacementRules）の結果が一致することを確認して、
+処理時間を比べる。DBの説明文は置換済みでほとんど一致しないため、<br> を改行に戻した
+ものと、ルールの検索・置換文字列をつなげた合成テキストでも一致を確認する。
+
+時間は replace.replace() と同じ呼び出し方（モジュール読み込み時にコンパイルしたルールを
+compile_replacements に渡す）で計り、呼び出しのたびにリストからコンパイルし直す場合とも比べる。
+
+使い方:
+    python bench_text_replace.py [--db ../../feh-skills.sqlite3] [--repeat 5]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from fehdb.text_replace import compile_replacements
+
+from replace import COMPILED_REPLACEMENTS, COMPILED_SKILL_NAME_REPLACEMENTS
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent.parent / "feh-skills.sqlite3"
+
+DESCRIPTION_COLUMNS = ("description", "refine_description", "special_refine_description")
+
+
+def load_descriptions(db_path: str) -> list[str]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        texts = []
+        for column in DESCRIPTION_COLUMNS:
+            texts.extend(text for (text,) in conn.execute(f"SELECT {column} FROM skills") if text)
+        return texts
+    finally:
+        conn.close()
+
+
+def synthetic_texts(rules: list[tuple[str, str]], count: int, seed: int = 0) -> list[str]:
+    """ルールの検索・置換文字列をランダムにつなげたテキスト（ルール間の干渉の確認用）"""
+    rng = random.Random(seed)
+    pieces = [s for rule in rules for s in rule if s] + ["攻撃", "-", "一", "ー", "\r", "\n", "7"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 40))) for _ in range(count)]
+
+
+def _best_time(func, texts: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="置換エンジンの一致確認とベンチマーク")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="スキルDB")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数（最良値を表示）")
+    args = parser.parse_args()
+
+    descriptions = load_descriptions(args.db)
+    raw_descriptions = [text.replace("<br>", "\n") for text in descriptions]
+    failed = False
+    for label, compiled in (("replace.REPLACEMENTS", COMPILED_REPLACEMENTS),
+                            ("replace.SKILL_NAME_REPLACEMENTS", COMPILED_SKILL_NAME_REPLACEMENTS)):
+        # replace.replace() と同じ経路（コンパイル済みのルールはそのまま使われる）
+        def precompiled(text, compiled=compiled):
+            return compile_replacements(compiled).apply(text)
+
+        # 呼び出しのたびにルールのリストから引き直す経路（比較用）
+        def per_call(text, rules=compiled.rules):
+            return compile_replacements(rules).apply(text)
+
+        inputs = {
+            "DB説明文": descriptions,
+            "DB説明文(改行)": raw_descriptions,
+            "合成テキスト": synthetic_texts(compiled.rules, 20000),
+        }
+        print(f"{label}: {len(compiled.rules)}ルール → {len(compiled.stages)}段")
+        for name, texts in inputs.items():
+            mismatches = [t for t in texts if precompiled(t) != compiled.apply_sequential(t)]
+            if mismatches:
+                failed = True
+                print(f"  {name}: 不一致 {len(mismatches)}/{len(texts)}件 例: {mismatches[0]!r}", file=sys.stderr)
+                continue
+            sequential = _best_time(compiled.apply_sequential, texts, args.repeat)
+            single_pass = _best_time(precompiled, texts, args.repeat)
+            uncached = _best_time(per_call, texts, args.repeat)
+            print(f"  {name} {len(texts)}件: 一致 / 逐次 {sequential * 1000:.1f} ms,"
+                  f" コンパイル済み {single_pass * 1000:.1f} ms ({sequential / single_pass:.2f}x),"
+                  f" 呼び出しごとに引き直し {uncached * 1000:.1f} ms")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
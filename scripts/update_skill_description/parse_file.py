@@ -2,7 +2,7 @@ import re
 from typing import List
 from typing import Tuple
 
-from replace import REPLACEMENTS, SKILL_NAME_REPLACEMENTS
+from replace import COMPILED_REPLACEMENTS, COMPILED_SKILL_NAME_REPLACEMENTS
 from replace import replace
 
 
@@ -38,11 +38,11 @@ def parse_entry(entry: str) -> Tuple[str, str, dict]:
     if len(skill_lines) >= 2:
         entry_id_line = skill_lines[0].strip()  # 1行目がentry_id
         description = "\n".join(skill_lines[1:]).strip()  # 2行目以降をdescriptionとして結合
-        replaced = replace(description, REPLACEMENTS)
+        replaced = replace(description, COMPILED_REPLACEMENTS)
         field_dict = get_field_dict(replaced.split('<br>'), fields_comments)
 
         entries = entry_id_line.split('-')
-        entries[2] = replace(entries[2], SKILL_NAME_REPLACEMENTS)
+        entries[2] = replace(entries[2], COMPILED_SKILL_NAME_REPLACEMENTS)
         entry_id_line = '-'.join(entries)
         return entry_id_line, replaced, field_dict
 
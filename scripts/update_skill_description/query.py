@@ -1,24 +1,55 @@
 import argparse
+import os
 import re
 import sqlite3
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
 from typing import List, Tuple
 
+from fehdb.skill_db import ensure_indexes
 from unidecode import unidecode
 
 from parse_file import parse_file
 from util import warn, cyan_text, green_text
 
 
-def insert_data(conn, data: List[Tuple[str, str, dict]]) -> None:
+# 書き込みの段階（1エントリ内の従来の実行順）。
+# insert_data は連続するエントリの文を段階ごとにまとめ、同じ形の文を executemany で一括実行する。
+# 行の追加・スキル名の変更は最初の段階（description）でしか行わず、同じ段階の中では
+# エントリの順序を保つ。後の段階の文は後続エントリの追加・名前変更より後に実行されるため、
+# id で行を指定する文（追加済みの行の、最初の段階では書き込まない列を更新する）だけを
+# まとめてよい。名前で行を指定する文を後の段階に持つエントリでまとまりを区切り、
+# 後続エントリが追加・改名した同名の行にその文が及ばないようにする。
+STAGE_DESCRIPTION = 'description'  # 新規追加・錬成の説明文（名前での UPDATE が先行する INSERT に依存する）
+STAGE_ENGLISH_NAME = 'english_name'
+STAGE_CAN_STATUS_REFINE = 'can_status_refine'
+STAGE_SPECIAL_REFINE_HP = 'special_refine_hp'
+
+
+def plan_statements(data: List[Tuple[str, str, dict]]) -> list[dict[str, list[tuple[str, dict]]]]:
     """
-    データをテーブルに挿入する関数
+    エントリから実行する文を作り、連続するエントリのまとまりごとに段階別の (SQL, パラメータ) の
+    リストにまとめる
+
+    まとまりは、後の段階（英語名以降）に名前で行を指定する文を持つエントリで区切る。
+    そのため、名前で指定する文は従来どおり後続エントリの追加・名前変更より前に実行される。
 
-    :param conn:
     :param data: (info, description, dict) のタプルのリスト
+    :return: まとまりのリスト（実行順）。各まとまりは 段階→(SQL, パラメータ) のリスト
+             （段階は実行順、オプションの各フィールドも1段階）
     """
-    cursor = conn.cursor()
+    segments = []
+    stages = {STAGE_DESCRIPTION: [], STAGE_ENGLISH_NAME: []}
+    field_stages = {}
+    refine_stages = {STAGE_CAN_STATUS_REFINE: [], STAGE_SPECIAL_REFINE_HP: []}
+
+    def close_segment():
+        segments.append({**stages, **{f'field:{field}': s for field, s in field_stages.items()}, **refine_stages})
+
     for info, description, other_field_dict in data:
+        name_keyed = False  # 後の段階に名前で行を指定する文があるか
         split = info.split('-')
         skill_id, refinement_type, skill_name, *rest = split
         skill_e_name = None
@@ -54,53 +85,172 @@ def insert_data(conn, data: List[Tuple[str, str, dict]]) -> None:
         # 新規スキル
         if not is_refinement or int(skill_id) != 0:
             # noinspection SqlInsertValues
-            cursor.execute(f'''
+            query = f'''
             INSERT INTO skills ({','.join(fields)})
-            VALUES (?, ?, ?)
+            VALUES (:id, :skill_name, :description)
             ON CONFLICT({id_field}) DO UPDATE
             SET {name_field} = excluded.{name_field},
                 {description_field} = excluded.{description_field}
-            ''', (skill_id, skill_name, description))
+            '''
+            stages[STAGE_DESCRIPTION].append(
+                (query, {'id': skill_id, 'skill_name': skill_name, 'description': description}))
         else:
             # 武器錬成
             # 月光のように同じ名前がある場合は0以外のidを指定すること
             query = f"UPDATE skills SET {description_field} = :description WHERE name = :skill_name"
-            cursor.execute(query, {'description': description, 'skill_name': skill_name})
+            stages[STAGE_DESCRIPTION].append((query, {'description': description, 'skill_name': skill_name}))
         # 錬成と追加が同時な場合（錬成のスキルテキストが複数存在しない）は錬成にも通常と同じスキルテキストを入れる
         if is_new_refinement:
-            query = f"UPDATE skills SET refine_description = :description WHERE name = :skill_name"
-            cursor.execute(query, {'description': description, 'skill_name': skill_name})
+            query = "UPDATE skills SET refine_description = :description WHERE name = :skill_name"
+            stages[STAGE_DESCRIPTION].append((query, {'description': description, 'skill_name': skill_name}))
 
         # 英語名がある場合は入力
         if skill_e_name is not None:
             query = "UPDATE skills SET english_name = :english_name WHERE id = :id"
-            cursor.execute(query, {'english_name': skill_e_name, 'id': skill_id})
+            stages[STAGE_ENGLISH_NAME].append((query, {'english_name': skill_e_name, 'id': skill_id}))
 
-        # オプションの設定
+        # オプションの設定（フィールドごとに同じ形の文にして一括実行できるようにする）
         if other_field_dict and (not is_refinement or is_new_refinement):
-            # フィールドを安全に動的に更新するためのクエリ作成
-            set_clause = ", ".join([f"{field} = :{field}" for field in other_field_dict.keys()])
-            query = f"UPDATE skills SET {set_clause} WHERE id = :id"
-            cursor.execute(query, {**other_field_dict, 'id': skill_id})
+            for field, value in other_field_dict.items():
+                query = f"UPDATE skills SET {field} = :value WHERE id = :id"
+                field_stages.setdefault(field, []).append((query, {'value': value, 'id': skill_id}))
 
         # 武器錬成可能設定
         if is_refinement:
             if skill_id != 0:
-                query = f'UPDATE skills SET can_status_refine = "true" WHERE id = :id'
-                cursor.execute(query, {'id': skill_id})
+                query = 'UPDATE skills SET can_status_refine = "true" WHERE id = :id'
+                refine_stages[STAGE_CAN_STATUS_REFINE].append((query, {'id': skill_id}))
             else:
-                query = f'UPDATE skills SET can_status_refine = "true" WHERE name = :skill_name'
-                cursor.execute(query, {'name': skill_name})
+                query = 'UPDATE skills SET can_status_refine = "true" WHERE name = :skill_name'
+                refine_stages[STAGE_CAN_STATUS_REFINE].append((query, {'skill_name': skill_name}))
+                name_keyed = True
 
         # 特殊錬成のHP設定
         if is_special_refinement:
             if skill_id != 0:
-                query = f"UPDATE skills SET special_refine_hp = {special_refine_hp} WHERE id = :id"
-                cursor.execute(query, {'id': skill_id})
+                query = "UPDATE skills SET special_refine_hp = :hp WHERE id = :id"
+                refine_stages[STAGE_SPECIAL_REFINE_HP].append((query, {'hp': special_refine_hp, 'id': skill_id}))
             else:
-                query = f"UPDATE skills SET special_refine_hp = {special_refine_hp} WHERE name = :skill_name"
-                cursor.execute(query, {'name': skill_name})
-    conn.commit()
+                query = "UPDATE skills SET special_refine_hp = :hp WHERE name = :skill_name"
+                refine_stages[STAGE_SPECIAL_REFINE_HP].append(
+                    (query, {'hp': special_refine_hp, 'skill_name': skill_name}))
+                name_keyed = True
+
+        if name_keyed:
+            # このエントリまででまとまりを区切り、後続エントリは新しいまとまりに入れる
+            close_segment()
+            stages = {STAGE_DESCRIPTION: [], STAGE_ENGLISH_NAME: []}
+            field_stages = {}
+            refine_stages = {STAGE_CAN_STATUS_REFINE: [], STAGE_SPECIAL_REFINE_HP: []}
+
+    if any(stages.values()):
+        close_segment()
+    return segments
+
+
+def batch_statements(statements: List[Tuple[str, dict]]) -> List[Tuple[str, List[dict]]]:
+    """連続する同じSQLの文を1つにまとめる（順序は保つ）"""
+    batches = []
+    for query, params in statements:
+        if batches and batches[-1][0] == query:
+            batches[-1][1].append(params)
+        else:
+            batches.append((query, [params]))
+    return batches
+
+
+@contextmanager
+def bulk_write_pragmas(conn):
+    """
+    一括書き込み中だけ WAL・synchronous=NORMAL にする
+
+    終了時に元のジャーナルモードへ戻す（リポジトリで管理しているDBファイルを
+    WAL のまま残さず、-wal/-shm ファイルもチェックポイントして消す）。
+    """
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+
+
+def insert_data(conn, data: List[Tuple[str, str, dict]]) -> None:
+    """
+    データをテーブルに挿入する関数
+
+    エントリの文をまとまり・段階・形ごとにまとめ（plan_statements）、1つのトランザクション内で
+    executemany する。
+
+    :param conn:
+    :param data: (info, description, dict) のタプルのリスト
+    """
+    segments = plan_statements(data)
+    with bulk_write_pragmas(conn):
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            for stages in segments:
+                for statements in stages.values():
+                    for query, params in batch_statements(statements):
+                        cursor.executemany(query, params)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _natural_key(path: Path) -> list:
+    """ファイル名の数字部分を数値として比較するソートキー（8-9-6.txt < 10-01-01.txt）"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path.name)]
+
+
+def _parse_file_worker(path: str) -> Tuple[str, List[Tuple[str, str, dict]] | None, str | None]:
+    """プロセスプールで実行する parse_file（失敗したファイルは例外ではなくエラー文字列を返す）"""
+    try:
+        return path, parse_file(path), None
+    except (IndexError, ValueError, UnicodeDecodeError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def _entry_sort_key(entry: Tuple[str, str, dict]) -> Tuple[bool, int]:
+    """ID順（ID 0 の名前指定の錬成は、対象スキルの追加より後になるよう最後）"""
+    skill_id = int(entry[0].split('-')[0])
+    return skill_id == 0, skill_id
+
+
+def parse_directory(input_dir: str, workers: int | None = None) -> List[Tuple[str, str, dict]]:
+    """
+    ディレクトリ内の *.txt をプロセスプールで並列に parse_file し、ID順にまとめる
+
+    同じIDのエントリはファイル名順（数字は数値順）・ファイル内の順序を保つ。
+    読み込めなかったファイルは警告を出してスキップする。
+
+    :param input_dir: スキル説明ファイルのディレクトリ（sources/skill-desc 等）
+    :param workers: プロセス数（None なら CPU 数）
+    :return: insert_data に渡す (info, description, dict) のタプルのリスト
+    """
+    files = sorted(Path(input_dir).glob('*.txt'), key=_natural_key)
+    paths = [str(f) for f in files]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) <= 1:
+        results = [_parse_file_worker(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_parse_file_worker, paths))
+
+    entries = []
+    for path, parsed, error in results:
+        if error is not None:
+            print(warn(f"読み込めないファイルをスキップします: {path} ({error})"))
+            continue
+        entries.extend(parsed)
+    entries.sort(key=_entry_sort_key)
+    print(cyan_text(f"{len(paths)}ファイル、{len(entries)}エントリ"))
+    return entries
 
 
 def parse_field(parsed: List[Tuple[str, str]]) -> List[Tuple[str, str, str, str, str]]:
@@ -126,13 +276,18 @@ def main():
     parser.add_argument('--check-id', action='store_true', help='Check skill id')
 
     # ファイル名を引数として追加
-    parser.add_argument('input_file', type=str, help='Filename')
+    parser.add_argument('input_file', type=str, nargs='?', help='Filename')
+
+    parser.add_argument('--dir', type=str,
+                        help='Ingest all *.txt files in this directory (parsed in parallel, applied in ID order)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of processes used to parse files with --dir (default: CPU count)')
 
     # 引数を解析
     args = parser.parse_args()
 
-    if not args.input_file:
-        print("Error: input_file is required.", file=sys.stderr)
+    if bool(args.input_file) == bool(args.dir):
+        print("Error: specify either input_file or --dir.", file=sys.stderr)
         sys.exit(1)
 
     # dry-run フラグが設定されていれば True、されていなければ False
@@ -142,10 +297,16 @@ def main():
     conn = sqlite3.connect('./../../feh-skills.sqlite3')
 
     should_check_id = args.check_id
-    data_to_insert = parse_file(args.input_file)
+    if args.dir:
+        data_to_insert = parse_directory(args.dir, args.workers)
+    else:
+        data_to_insert = parse_file(args.input_file)
 
     # データを挿入する
     if not dry_run:
+        # 錬成の UPDATE ... WHERE name = ... がテーブル全体を走査しないようにする
+        # （--dry-run ではDBファイルを変更しないよう、書き込む場合だけ作成する）
+        ensure_indexes(conn)
         insert_data(conn, data_to_insert)
     else:
         check_id(conn, data_to_insert, should_check_id)
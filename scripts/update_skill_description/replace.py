@@ -1,6 +1,10 @@
 import os
 import sys
 import re
+from dataclasses import dataclass
+from typing import Tuple
+
+from fehdb.text_replace import compile_replacements
 
 from util import warn
 
@@ -114,10 +118,14 @@ SKILL_NAME_REPLACEMENTS = [
     ('•', '・'),
 ]
 
+# コンパイルは読み込み時に1回だけ行い、replace() にはコンパイル済みのルールを渡す
+COMPILED_REPLACEMENTS = compile_replacements(REPLACEMENTS)
+COMPILED_SKILL_NAME_REPLACEMENTS = compile_replacements(SKILL_NAME_REPLACEMENTS)
+
 def replace(input_text, replacements):
-    result = input_text
-    for search_word, replace_word in replacements:
-        result = result.replace(search_word, replace_word)
+    # 逐次の str.replace と同じ結果を、干渉しないルールをまとめた少ない走査で得る
+    # （replacements はコンパイル済みの ReplacementRules か、(検索, 置換) のリスト）
+    result = compile_replacements(replacements).apply(input_text)
     check_content(result)
     return result
 
@@ -132,33 +140,113 @@ def replace_in_file(input_file, output_file, replacements):
         outfile.write(content)
 
 
+# 置換後の本文に含まれていたら警告する語句
+WARNING_WORDS = [
+    '可能戦闘中',
+    '軽減奥義',
+    '計算自分から',
+    '、<br>',
+    'かっ',
+]
+
+# 置換後の本文が一致したら警告するパターン
+WARNING_PATTERNS = [
+    # 行頭、<br>以外に続く暗器効果(文の途中に出てくる)
+    r'(?<!^)(?<!<br>)【暗器\([0-9]\)】',
+    # ひらがな (\u3040-\u309F)、カタカナ (\u30A0-\u30FF)、および漢字 (\u4E00-\u9FAF)
+    # 反撃する<br>か反撃する、がおそらく正しい
+    r'距離に関係なく反撃する[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]+',
+    r'[0-9]戦闘開始時',
+    r'[0-9]周囲',
+    r'\([\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]{1,10}】',
+    r'【[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]{1,10}\)',
+]
+
+
+@dataclass(frozen=True)
+class Finding:
+    """check_content の警告1件"""
+    rule: str  # 警告語句またはパターン
+    is_pattern: bool
+    matched: str
+    span: Tuple[int, int]
+    content: str
+    source: str | None = None  # ファイルパス・DBの行など（一括検査時）
+
+    def message(self):
+        if self.is_pattern:
+            match = f"<re.Match object; span={self.span}, match={self.matched!r}>"
+            return f"{self.rule}が含まれます match: {match}, 本文: {self.content}"
+        return f"{self.rule}が含まれます 本文: {self.content}"
+
+
+class ContentValidator:
+    """
+    警告語句・パターンを1つの正規表現にまとめた検査器
+
+    本文はまず全ルールの結合パターンで1回だけ走査し、どのルールにも一致しなければ
+    そこで終わる（大半の本文）。一致があった本文だけ、ルールごとのコンパイル済み
+    パターンで最初の一致を調べる（結合パターンの走査では、一致位置が重なる他のルールが
+    隠れることがあるため）。結果は従来どおり語句→パターンの順に、ルールごとに1件。
+    """
+
+    def __init__(self, warning_words=None, patterns=None):
+        words = WARNING_WORDS if warning_words is None else warning_words
+        patterns = WARNING_PATTERNS if patterns is None else patterns
+        # (ルール, パターンかどうか, 個別のコンパイル済みパターン)
+        self.rules = [(word, False, re.compile(re.escape(word))) for word in words]
+        self.rules += [(pattern, True, re.compile(pattern)) for pattern in patterns]
+        self._combined = re.compile("|".join(f"(?:{compiled.pattern})" for _, _, compiled in self.rules))
+
+    def findings(self, content, source=None):
+        """本文の警告のリスト（警告がなければ空）"""
+        if not self._combined.search(content):
+            return []
+        findings = []
+        for rule, is_pattern, compiled in self.rules:
+            m = compiled.search(content)
+            if m:
+                findings.append(Finding(rule, is_pattern, m.group(), m.span(), content, source))
+        return findings
+
+    def scan(self, items):
+        """(source, 本文) の組をまとめて検査し、全件の警告を返す"""
+        results = []
+        for source, content in items:
+            if content:
+                results.extend(self.findings(content, source))
+        return results
+
+    def scan_column(self, conn, column, table='skills'):
+        """DBの列全体を検査（source は `id:name`）"""
+        rows = conn.execute(f"SELECT id, name, {column} FROM {table} ORDER BY id")
+        return self.scan((f"{skill_id}:{name}", content) for skill_id, name, content in rows)
+
+    def scan_directory(self, directory, replacements=None):
+        """ディレクトリ内の *.txt を検査（replacements 指定時は置換後の本文を検査）"""
+        rules = compile_replacements(replacements) if replacements is not None else None
+
+        def items():
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith('.txt'):
+                    path = os.path.join(directory, filename)
+                    with open(path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                    if rules is not None:
+                        content = rules.apply(content)
+                    yield path, content
+        return self.scan(items())
+
+
+_VALIDATOR = ContentValidator()
+
+
 def check_content(content):
-    warning_words = [
-        '可能戦闘中'
-        '軽減奥義',
-        '計算自分から',
-        '、<br>',
-        'かっ',
-    ]
-    for word in warning_words:
-        if word in content:
-            print(warn(f"{word}が含まれます 本文: {content}"))
-
-    patterns = [
-        # 行頭、<br>以外に続く暗器効果(文の途中に出てくる)
-        r'(?<!^)(?<!<br>)【暗器\([0-9]\)】',
-        # ひらがな (\u3040-\u309F)、カタカナ (\u30A0-\u30FF)、および漢字 (\u4E00-\u9FAF)
-        # 反撃する<br>か反撃する、がおそらく正しい
-        r'距離に関係なく反撃する[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]+',
-        r'[0-9]戦闘開始時',
-        r'[0-9]周囲',
-        r'\([\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]{1,10}】',
-        r'【[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]{1,10}\)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, content)
-        if match:
-            print(warn(f"{pattern}が含まれます match: {match}, 本文: {content}"))
+    """置換後の本文の警告を表示（警告のリストを返す）"""
+    findings = _VALIDATOR.findings(content)
+    for finding in findings:
+        print(warn(finding.message()))
+    return findings
 
 
 def main(input_dir, output_dir):
@@ -169,7 +257,7 @@ def main(input_dir, output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    replacements = REPLACEMENTS
+    replacements = COMPILED_REPLACEMENTS
     for filename in os.listdir(input_dir):
         if filename.endswith('.txt'):
             input_file = os.path.join(input_dir, filename)